@@ -0,0 +1,99 @@
+# alerts.py
+"""
+Low-stock alerts from per-item reorder points (migration 0007).
+
+The database answers "what is below its reorder point" from a partial
+index, so the app never downloads the catalog to find it. A background
+evaluator calls evaluate_stock_alerts() every ALERT_INTERVAL seconds and
+only the low/cleared transitions are stored; pages read the current list
+and the transition log instead of restyling every row on each render.
+"""
+import logging
+import os
+import threading
+from typing import List
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from db_supabase import get_frame_cache, get_supabase
+
+ALERT_INTERVAL = int(os.environ.get("ALPHACJ_ALERT_INTERVAL", "300"))
+DEFAULT_REORDER_POINT = 1
+LOW_STOCK_STYLE = "background-color: #CC0000"
+
+log = logging.getLogger(__name__)
+
+LOW_STOCK_COLUMNS = ["id", "item", "category", "quantity", "reorder_point", "lead_time_days", "shortfall", "unit_cost"]
+
+# ---------------- Queries ----------------
+@st.cache_data(ttl=60, show_spinner=False)
+def _low_stock(items_version: int, limit: int) -> list:
+    return get_supabase().rpc("low_stock_items", {"p_limit": int(limit)}).execute().data or []
+
+def low_stock_items(limit: int = 500) -> pd.DataFrame:
+    """Items below their reorder point, largest shortfall first (re-read after any item write)."""
+    rows = _low_stock(get_frame_cache().version("items"), limit)
+    return pd.DataFrame(rows, columns=LOW_STOCK_COLUMNS)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _summary(items_version: int) -> dict:
+    rows = get_supabase().rpc("low_stock_summary", {}).execute().data or [{}]
+    return rows[0]
+
+def low_stock_summary() -> dict:
+    s = _summary(get_frame_cache().version("items"))
+    return {"items_below": int(s.get("items_below") or 0), "total_shortfall": int(s.get("total_shortfall") or 0),
+            "reorder_value": float(s.get("reorder_value") or 0)}
+
+def recent_alerts(limit: int = 100) -> pd.DataFrame:
+    res = get_supabase().table("stock_alerts").select("*").order("created_at", desc=True).limit(limit).execute()
+    return pd.DataFrame(res.data or [])
+
+def evaluate() -> List[dict]:
+    """Record low/cleared transitions since the last run; returns them."""
+    return get_supabase().rpc("evaluate_stock_alerts", {}).execute().data or []
+
+# ---------------- Styling ----------------
+def low_stock_mask(df: pd.DataFrame) -> pd.Series:
+    """Vectorized quantity < reorder_point (items without one use DEFAULT_REORDER_POINT)."""
+    if df.empty or "quantity" not in df.columns:
+        return pd.Series(False, index=df.index)
+    reorder = pd.to_numeric(df.get("reorder_point", pd.Series(index=df.index, dtype=float)), errors="coerce")
+    qty = pd.to_numeric(df["quantity"], errors="coerce")
+    return (qty < reorder.fillna(DEFAULT_REORDER_POINT)).fillna(False)
+
+def low_stock_styles(df: pd.DataFrame) -> pd.DataFrame:
+    """Styler.apply(axis=None) callback: one style per cell from a single row mask."""
+    row_style = np.where(low_stock_mask(df).to_numpy(), LOW_STOCK_STYLE, "")
+    return pd.DataFrame(np.broadcast_to(row_style[:, None], df.shape), index=df.index, columns=df.columns)
+
+# ---------------- Evaluator ----------------
+class AlertEvaluator:
+    """Daemon thread running evaluate() every `interval` seconds."""
+
+    def __init__(self, interval: int = ALERT_INTERVAL):
+        self.interval = interval
+        self.last_transitions: List[dict] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="stock-alerts", daemon=True)
+
+    def start(self) -> "AlertEvaluator":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.last_transitions = evaluate()
+            except Exception as e:
+                log.warning("Stock alert evaluation failed: %s", e)
+            self._stop.wait(self.interval)
+
+@st.cache_resource
+def get_alert_evaluator() -> AlertEvaluator:
+    return AlertEvaluator().start()
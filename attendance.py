@@ -0,0 +1,207 @@
+# attendance.py
+"""
+QR-based employee attendance on the bundled SQLite database (employees,
+attendance with UNIQUE(employee_id, date)).
+
+Badges encode "EMP-<employee_id>"; badges printed before that format
+carry the bare employee id and are accepted as well. The first scan of the day checks in,
+later scans move check_out_time forward. Both go through the unique key
+in a single INSERT ... ON CONFLICT statement, so kiosks never
+read-then-write.
+"""
+import base64
+import io
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from migrate import SQLITE_DB_PATH, pending_sqlite
+
+QR_DIR = os.path.join("qr_codes", "employees")
+# A second scan within this window is treated as a double scan, not a check-out
+DEBOUNCE_MINUTES = 1
+
+_local = threading.local()
+_checked = set()
+_check_lock = threading.Lock()
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+def _check_schema(db_path: str):
+    """Refuse to run against a file with pending migrations; applying them is migrate.py's job."""
+    with _check_lock:
+        if db_path in _checked:
+            return
+        pending = pending_sqlite(db_path)
+        if pending:
+            raise SchemaOutOfDate(
+                f"{db_path} is missing migrations {', '.join(pending)}. Run `python migrate.py sqlite`."
+            )
+        _checked.add(db_path)
+
+def _connect(db_path: str = SQLITE_DB_PATH) -> sqlite3.Connection:
+    """One connection per thread; busy_timeout lets kiosk writers wait out page readers."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        _check_schema(db_path)
+        conn = sqlite3.connect(db_path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout=10000")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conns[db_path] = conn
+    return conn
+
+# ---------------- Employees & QR codes ----------------
+def view_employees(db_path: str = SQLITE_DB_PATH) -> pd.DataFrame:
+    conn = _connect(db_path)
+    rows = conn.execute(
+        "SELECT employee_id, name, department, qr_code_path, qr_code_url FROM employees ORDER BY name"
+    ).fetchall()
+    return pd.DataFrame([dict(r) for r in rows])
+
+def badge_payload(employee_id: int) -> str:
+    return f"EMP-{int(employee_id)}"
+
+def _render_qr(employee_id: int) -> tuple:
+    """Process-pool worker: PNG bytes of one badge (top-level so it pickles)."""
+    import qrcode
+
+    img = qrcode.make(badge_payload(employee_id), box_size=8, border=2)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return employee_id, buf.getvalue()
+
+def generate_qr_codes(force: bool = False, workers: Optional[int] = None,
+                      db_path: str = SQLITE_DB_PATH, on_progress=None) -> int:
+    """
+    Render badges for every employee lacking one (all with force=True) on a
+    process pool, write the PNGs under QR_DIR and store path + base64 once,
+    so reads never re-encode. Returns the number of badges generated.
+    """
+    conn = _connect(db_path)
+    where = "" if force else " WHERE qr_code_base64 IS NULL OR qr_code_base64 = ''"
+    ids = [r[0] for r in conn.execute(f"SELECT employee_id FROM employees{where}")]
+    if not ids:
+        return 0
+
+    os.makedirs(QR_DIR, exist_ok=True)
+    updates = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for n, (employee_id, png) in enumerate(pool.map(_render_qr, ids, chunksize=32), start=1):
+            path = os.path.join(QR_DIR, f"employee_{employee_id}_qr.png")
+            with open(path, "wb") as f:
+                f.write(png)
+            updates.append((path, base64.b64encode(png).decode("ascii"), employee_id))
+            if on_progress and n % 50 == 0:
+                on_progress(n / len(ids))
+
+    conn.execute("BEGIN")
+    conn.executemany("UPDATE employees SET qr_code_path = ?, qr_code_base64 = ? WHERE employee_id = ?", updates)
+    conn.execute("COMMIT")
+    qr_png.cache_clear()
+    return len(updates)
+
+@lru_cache(maxsize=4096)
+def qr_png(employee_id: int, db_path: str = SQLITE_DB_PATH) -> Optional[bytes]:
+    """Badge PNG, decoded once from the stored base64 and kept in memory."""
+    row = _connect(db_path).execute(
+        "SELECT qr_code_base64 FROM employees WHERE employee_id = ?", (int(employee_id),)
+    ).fetchone()
+    if not row or not row[0]:
+        return None
+    return base64.b64decode(row[0])
+
+# ---------------- Check-in ----------------
+_UPSERT_SQL = f"""
+    INSERT INTO attendance (employee_id, date, check_in_time) VALUES (?, ?, ?)
+    ON CONFLICT(employee_id, date) DO UPDATE SET check_out_time = excluded.check_in_time
+    WHERE julianday(excluded.check_in_time) - julianday(attendance.check_in_time) > {DEBOUNCE_MINUTES} / 1440.0
+    RETURNING attendance_id, employee_id, date, check_in_time, check_out_time
+"""
+
+_BADGE = re.compile(r"^(?:EMP-)?(\d+)$", re.IGNORECASE)
+
+def parse_badge(code: str) -> Optional[int]:
+    """Employee id from "EMP-<id>" or a bare "<id>" (older badges), else None."""
+    m = _BADGE.match(code.strip())
+    return int(m.group(1)) if m else None
+
+def check_in(employee_id: int, when: Optional[datetime] = None, db_path: str = SQLITE_DB_PATH) -> Optional[dict]:
+    """
+    Record a scan. Returns the attendance row, or None for a double scan
+    inside the debounce window. Raises sqlite3.IntegrityError for unknown employees.
+    """
+    when = when or datetime.now()
+    row = _connect(db_path).execute(
+        _UPSERT_SQL, (int(employee_id), when.date().isoformat(), when.isoformat())
+    ).fetchone()
+    return dict(row) if row else None
+
+def check_in_many(employee_ids: Iterable[int], when: Optional[datetime] = None,
+                  db_path: str = SQLITE_DB_PATH) -> Tuple[List[dict], List[int]]:
+    """
+    Clock in a whole crew in one transaction (e.g. a batch of badge photos).
+    Returns (attendance rows, ids with no employee record).
+    """
+    when = when or datetime.now()
+    conn = _connect(db_path)
+    day, ts = when.date().isoformat(), when.isoformat()
+    ids = [int(i) for i in employee_ids]
+    known = {r[0] for r in conn.execute(
+        f"SELECT employee_id FROM employees WHERE employee_id IN ({','.join('?' * len(ids))})", ids)} if ids else set()
+    rows = []
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for employee_id in ids:
+            if employee_id in known:
+                row = conn.execute(_UPSERT_SQL, (employee_id, day, ts)).fetchone()
+                if row:
+                    rows.append(dict(row))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return rows, [i for i in ids if i not in known]
+
+def check_in_badges(images: Iterable[bytes], db_path: str = SQLITE_DB_PATH) -> tuple:
+    """
+    Decode badge photos on the scanner's thread pool and clock everyone in.
+    Returns (attendance rows, unrecognized codes or employee ids).
+    """
+    from scanner import decode_batch
+
+    employee_ids, unknown = [], []
+    for codes, _ in decode_batch(images):
+        for code in codes:
+            employee_id = parse_badge(code)
+            if employee_id is None:
+                unknown.append(code)
+            else:
+                employee_ids.append(employee_id)
+    rows, missing = check_in_many(dict.fromkeys(employee_ids), db_path=db_path)
+    return rows, unknown + [badge_payload(i) for i in missing]
+
+# ---------------- Reports ----------------
+def view_attendance(start_date=None, end_date=None, db_path: str = SQLITE_DB_PATH) -> pd.DataFrame:
+    sql = """
+        SELECT a.attendance_id, a.employee_id, e.name, e.department, a.date, a.check_in_time, a.check_out_time
+        FROM attendance a JOIN employees e ON e.employee_id = a.employee_id
+    """
+    args = []
+    if start_date and end_date:
+        sql += " WHERE a.date BETWEEN ? AND ?"
+        args = [str(start_date), str(end_date)]
+    sql += " ORDER BY a.date DESC, a.check_in_time DESC"
+    rows = _connect(db_path).execute(sql, args).fetchall()
+    return pd.DataFrame([dict(r) for r in rows])
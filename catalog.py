@@ -0,0 +1,209 @@
+# catalog.py
+"""
+Item catalog shared by every session.
+
+Pages used to rescan the items frame on each rerun: sorted(unique()) for
+the item and category pickers, a boolean mask to find the selected item,
+a row-wise apply for the delete labels. The catalog holds that work
+precomputed: hash indexes by id, by name and by (item, category), the
+sorted name and category lists and the display labels. It is built once
+from the cached frame and then follows FrameCache's change events
+(upserts, removals, stock adjustments), so a write patches a few entries
+instead of triggering a rebuild and every lookup on a rerun is O(1).
+"""
+import bisect
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from db_supabase import get_frame_cache, view_items
+
+def _text(value) -> Optional[str]:
+    """Name/category as indexed; missing values (None/NaN) are left out of the lists."""
+    return value if isinstance(value, str) else None
+
+def _label(row: dict) -> str:
+    return f"{row.get('id')} - {_text(row.get('category')) or ''} - {_text(row.get('item')) or ''}"
+
+class Catalog:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.version = -1
+        self._reset()
+
+    def _reset(self):
+        self.by_id: Dict[int, dict] = {}
+        self.by_name: Dict[str, List[int]] = {}
+        self.by_key: Dict[Tuple[str, str], int] = {}
+        self.labels: Dict[int, str] = {}
+        self._name_counts, self._category_counts = Counter(), Counter()
+        self._names: List[str] = []
+        self._categories: List[str] = []
+        self._order: List[Tuple[str, int]] = []   # (item, id), the frame's sort order
+
+    # ---------------- Index maintenance ----------------
+    @staticmethod
+    def _count(counts: Counter, values: List[str], value: Optional[str], step: int):
+        if value is None:
+            return
+        counts[value] += step
+        if step > 0 and counts[value] == 1:
+            bisect.insort(values, value)
+        elif step < 0 and counts[value] <= 0:
+            del counts[value]
+            i = bisect.bisect_left(values, value)
+            if i < len(values) and values[i] == value:
+                del values[i]
+
+    def _index(self, row: dict, step: int):
+        """Add (step=1) or drop (step=-1) one row's entries in every index."""
+        item_id, name, category = row["id"], _text(row.get("item")), _text(row.get("category"))
+        order_key = (name or "", item_id)
+        if step > 0:
+            self.by_id[item_id] = row
+            self.labels[item_id] = _label(row)
+            if name is not None:
+                bisect.insort(self.by_name.setdefault(name, []), item_id)
+                self.by_key.setdefault((name, category), item_id)
+            bisect.insort(self._order, order_key)
+        else:
+            self.by_id.pop(item_id, None)
+            self.labels.pop(item_id, None)
+            if name is not None:
+                ids = self.by_name.get(name, [])
+                if item_id in ids:
+                    ids.remove(item_id)
+                if not ids:
+                    self.by_name.pop(name, None)
+                if self.by_key.get((name, category)) == item_id:
+                    del self.by_key[(name, category)]
+            i = bisect.bisect_left(self._order, order_key)
+            if i < len(self._order) and self._order[i] == order_key:
+                del self._order[i]
+        self._count(self._name_counts, self._names, name, step)
+        self._count(self._category_counts, self._categories, category, step)
+
+    def _upsert(self, rows: Iterable[dict]):
+        for row in rows:
+            item_id = int(row["id"])
+            old = self.by_id.get(item_id)
+            merged = {**(old or {}), **row, "id": item_id}
+            if old is not None:
+                self._index(old, -1)
+            self._index(merged, 1)
+
+    def rebuild(self, version: int, df: Optional[pd.DataFrame]):
+        with self._lock:
+            self._reset()
+            if df is not None and not df.empty:
+                rows = df.to_dict("records")
+                for row in rows:
+                    row["id"] = int(row["id"])
+                    self.by_id[row["id"]] = row
+                    self.labels[row["id"]] = _label(row)
+                    name, category = _text(row.get("item")), _text(row.get("category"))
+                    if name is not None:
+                        self.by_name.setdefault(name, []).append(row["id"])
+                        self.by_key.setdefault((name, category), row["id"])
+                        self._name_counts[name] += 1
+                    if category is not None:
+                        self._category_counts[category] += 1
+                for ids in self.by_name.values():
+                    ids.sort()
+                self._names = sorted(self._name_counts)
+                self._categories = sorted(self._category_counts)
+                self._order = sorted((_text(r.get("item")) or "", r["id"]) for r in rows)
+            self.version = version
+
+    # ---------------- FrameCache events ----------------
+    def on_change(self, version: int, event: str, payload, frame: Optional[pd.DataFrame]):
+        with self._lock:
+            try:
+                if event == "upsert":
+                    self._upsert(payload)
+                elif event == "remove" and payload[0] == "id":
+                    for item_id in payload[1]:
+                        row = self.by_id.get(int(item_id))
+                        if row is not None:
+                            self._index(row, -1)
+                elif event == "adjust" and payload[0] == "quantity" and payload[2] in ("id", "item"):
+                    _, delta, match_col, match_val = payload
+                    ids = [int(match_val)] if match_col == "id" else self.by_name.get(match_val, [])
+                    for item_id in ids:
+                        row = self.by_id.get(item_id)
+                        if row is not None:
+                            row["quantity"] = (row.get("quantity") or 0) + delta
+                elif event == "clear":
+                    self._reset()
+                elif event == "invalidate":
+                    self.version = -1   # reloaded by the next catalog() call
+                    return
+                else:
+                    self.rebuild(version, frame)
+                self.version = version
+            except Exception:
+                self.version = -1
+                raise
+
+    # ---------------- Lookups ----------------
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def __contains__(self, item_id) -> bool:
+        return int(item_id) in self.by_id
+
+    def get(self, item_id) -> Optional[dict]:
+        with self._lock:
+            row = self.by_id.get(int(item_id))
+            return dict(row) if row is not None else None
+
+    def find(self, item: str, category: Optional[str] = None) -> Optional[dict]:
+        """The row for (item, category), or the first row named `item` when no category is given."""
+        with self._lock:
+            if category is not None:
+                item_id = self.by_key.get((item, category))
+            else:
+                ids = self.by_name.get(item)
+                item_id = ids[0] if ids else None
+            return dict(self.by_id[item_id]) if item_id is not None else None
+
+    def label(self, item_id) -> str:
+        return self.labels.get(int(item_id), str(item_id))
+
+    @property
+    def names(self) -> List[str]:
+        """Distinct item names, sorted."""
+        with self._lock:
+            return list(self._names)
+
+    @property
+    def categories(self) -> List[str]:
+        """Distinct categories, sorted."""
+        with self._lock:
+            return list(self._categories)
+
+    @property
+    def ids(self) -> List[int]:
+        """Item ids in the items frame's order (by name)."""
+        with self._lock:
+            return [item_id for _, item_id in self._order]
+
+@st.cache_resource
+def get_catalog() -> Catalog:
+    catalog = Catalog()
+    get_frame_cache().subscribe("items", catalog.on_change)
+    return catalog
+
+def catalog() -> Catalog:
+    """The process-wide catalog, current with the cached items frame."""
+    cache = get_frame_cache()
+    c = get_catalog()
+    if not cache.fresh("items"):
+        view_items()   # the reload reaches the catalog as a "load" event
+    version = cache.version("items")
+    if c.version != version:
+        c.rebuild(version, cache.peek("items"))
+    return c
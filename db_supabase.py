@@ -1,16 +1,39 @@
 # db_supabase.py
+import os
 import streamlit as st
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 import pandas as pd
 from datetime import datetime, date
 from typing import Optional
 
+from frame_cache import FrameCache
+from transport import BackendUnavailable, build_http_client
+
+# Max age of a cached frame before it is re-read; bounds staleness against
+# writers outside this process (other app instances, SQL editor).
+FRAME_CACHE_TTL = 300
+
+BACKEND_UNAVAILABLE_MESSAGE = "The database is not reachable right now; nothing was recorded. Please try again shortly."
+
 # ---------------- Supabase Client ----------------
+def get_supabase_credentials():
+    """
+    (url, service_role_key). Environment variables win so headless entry
+    points (service, CLI) can run without a .streamlit/secrets.toml.
+    """
+    url = os.environ.get("SUPABASE_URL") or st.secrets["supabase"]["url"]
+    key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY") or st.secrets["supabase"]["service_role_key"]  # server-side only
+    return url, key
+
 @st.cache_resource
 def get_supabase() -> Client:
-    url = st.secrets["supabase"]["url"]
-    key = st.secrets["supabase"]["service_role_key"]  # server-side only
-    return create_client(url, key)
+    url, key = get_supabase_credentials()
+    # Pooled keep-alive connections, per-operation timeouts, read retries and a circuit breaker (transport.py)
+    return create_client(url, key, options=ClientOptions(httpx_client=build_http_client()))
+
+@st.cache_resource
+def get_frame_cache() -> FrameCache:
+    return FrameCache(ttl=FRAME_CACHE_TTL)
 
 # ---------------- Helpers ----------------
 def _to_date_str(d) -> str:
@@ -18,21 +41,35 @@ def _to_date_str(d) -> str:
         return d.strftime("%Y-%m-%d")
     return str(d)
 
+def _rows(data) -> list:
+    """Normalize an RPC/table response payload into a list of row dicts."""
+    if not data:
+        return []
+    if isinstance(data, dict):
+        return [data]
+    return [r for r in data if isinstance(r, dict)]
+
 # ---------------- VIEW FUNCTIONS (SELECTs) ----------------
 def view_items() -> pd.DataFrame:
-    sb = get_supabase()
-    res = sb.table("items").select("*").order("item").execute()
-    return pd.DataFrame(res.data or [])
+    def load():
+        sb = get_supabase()
+        res = sb.table("items").select("*").order("item").execute()
+        return pd.DataFrame(res.data or [])
+    return get_frame_cache().get("items", load, sort_by="item")
 
 def view_sales() -> pd.DataFrame:
-    sb = get_supabase()
-    res = sb.table("sales").select("*").order("date", desc=True).execute()
-    return pd.DataFrame(res.data or [])
+    def load():
+        sb = get_supabase()
+        res = sb.table("sales").select("*").order("date", desc=True).execute()
+        return pd.DataFrame(res.data or [])
+    return get_frame_cache().get("sales", load, sort_by="date", ascending=False)
 
 def view_customers() -> pd.DataFrame:
-    sb = get_supabase()
-    res = sb.table("customers").select("*").order("name").execute()
-    return pd.DataFrame(res.data or [])
+    def load():
+        sb = get_supabase()
+        res = sb.table("customers").select("*").order("name").execute()
+        return pd.DataFrame(res.data or [])
+    return get_frame_cache().get("customers", load, sort_by="name")
 
 def view_sales_by_customers(customer_id: Optional[int] = None) -> pd.DataFrame:
     sb = get_supabase()
@@ -85,34 +122,50 @@ def view_installations() -> pd.DataFrame:
     JOIN items it ON i.item_id = it.id
     ORDER BY i.date DESC
     """
-    sb = get_supabase()
-
-    # Supabase join syntax: use foreign table relationships
-    res = (
-        sb.table("installations")
-        .select(
-            "id, customer_id, customers(name), item_id, items(item), quantity, installed_by, date"
+    def load():
+        sb = get_supabase()
+
+        # Supabase join syntax: use foreign table relationships
+        res = (
+            sb.table("installations")
+            .select(
+                "id, customer_id, customers(name), item_id, items(item), quantity, installed_by, date"
+            )
+            .order("date", desc=True)
+            .execute()
         )
-        .order("date", desc=True)
-        .execute()
-    )
-
-    # Flatten nested results
-    rows = []
-    for r in res.data or []:
-        rows.append({
-            "id": r.get("id"),
-            "customer_id": r.get("customer_id"),
-            "customer_name": r.get("customers", {}).get("name"),
-            "item_id": r.get("item_id"),
-            "item_name": r.get("items", {}).get("item"),
-            "quantity": r.get("quantity"),
-            "installed_by": r.get("installed_by"),
-            "date": r.get("date"),
-        })
-
-    df = pd.DataFrame(rows)
-    return df
+        return pd.DataFrame([_flatten_installation(r) for r in res.data or []])
+
+    return get_frame_cache().get("installations", load, sort_by="date", ascending=False)
+
+def _flatten_installation(r: dict) -> dict:
+    """
+    Shape an installations row like installations_view. Names come from the
+    embedded join when present, otherwise from the cached customers/items frames.
+    """
+    customer_name = (r.get("customers") or {}).get("name")
+    item_name = (r.get("items") or {}).get("item")
+    cache = get_frame_cache()
+    if customer_name is None:
+        customer_name = _lookup(cache.peek("customers"), "id", r.get("customer_id"), "name")
+    if item_name is None:
+        item_name = _lookup(cache.peek("items"), "id", r.get("item_id"), "item")
+    return {
+        "id": r.get("id"),
+        "customer_id": r.get("customer_id"),
+        "customer_name": customer_name,
+        "item_id": r.get("item_id"),
+        "item_name": item_name,
+        "quantity": r.get("quantity"),
+        "installed_by": r.get("installed_by"),
+        "date": r.get("date"),
+    }
+
+def _lookup(df: Optional[pd.DataFrame], key_col: str, key, value_col: str):
+    if df is None or df.empty or key_col not in df.columns:
+        return None
+    hit = df.loc[df[key_col] == key, value_col]
+    return hit.iloc[0] if not hit.empty else None
 
 def view_audit_log(start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
     sb = get_supabase()
@@ -124,6 +177,28 @@ def view_audit_log(start_date: Optional[str] = None, end_date: Optional[str] = N
     res = q.order("timestamp", desc=True).execute()
     return pd.DataFrame(res.data or [])
 
+# ---------------- Chunked reader ----------------
+def iter_rows(table: str, columns: str = "*", order: str = "id", desc: bool = False,
+              filters: Optional[list] = None, chunk_size: int = 1000):
+    """
+    Yield every row of a table in pages of chunk_size via range(), so large
+    tables are never materialized in one response (PostgREST caps responses
+    at its max-rows setting anyway). filters: [(op, column, value), ...],
+    e.g. [("eq", "customer_id", 5), ("gte", "date", "2024-01-01")].
+    """
+    sb = get_supabase()
+    start = 0
+    while True:
+        q = sb.table(table).select(columns)
+        for op, col, val in filters or []:
+            q = getattr(q, op)(col, val)
+        res = q.order(order, desc=desc).range(start, start + chunk_size - 1).execute()
+        rows = res.data or []
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        start += chunk_size
+
 # ---------------- Pagination Utility (unchanged) ----------------
 def paginate_dataframe(df: pd.DataFrame, page_size: int = 20):
     total_rows = len(df)
@@ -139,7 +214,8 @@ def paginate_dataframe(df: pd.DataFrame, page_size: int = 20):
 def add_or_update_item(item: str, category: str, quantity: int, unit_cost: float,
                        selling_price: float, unit: str, user: str):
     """
-    Atomic upsert + audit via RPC add_or_update_item
+    Atomic upsert + audit via RPC add_or_update_item.
+    Returns the affected item row and patches it into the cached items frame.
     """
     sb = get_supabase()
     payload = {
@@ -152,7 +228,40 @@ def add_or_update_item(item: str, category: str, quantity: int, unit_cost: float
         "p_user": user,
     }
     res = sb.rpc("add_or_update_item", payload).execute()
-    return res.data[0] if res.data else None
+    rows = _rows(res.data)
+    cache = get_frame_cache()
+    if not cache.upsert("items", rows):
+        # RPC did not hand back the row; re-read items on next view
+        cache.invalidate("items")
+    return rows[0] if rows else None
+
+def upsert_items(records: list, batch_size: int = 500) -> list:
+    """
+    Bulk upsert on (item, category). Returns the affected rows and patches
+    them into the cached items frame.
+    """
+    sb = get_supabase()
+    affected = []
+    for i in range(0, len(records), batch_size):
+        chunk = records[i:i+batch_size]
+        res = sb.table("items").upsert(chunk, on_conflict="item,category").execute()
+        affected.extend(_rows(res.data))
+    cache = get_frame_cache()
+    if not cache.upsert("items", affected):
+        cache.invalidate("items")
+    return affected
+
+def set_reorder_point(item_id: int, reorder_point: int, lead_time_days: int) -> str:
+    sb = get_supabase()
+    try:
+        res = sb.table("items").update({"reorder_point": int(reorder_point), "lead_time_days": int(lead_time_days)}) \
+            .eq("id", int(item_id)).execute()
+    except Exception as e:
+        return f"Error updating reorder point: {e}"
+    cache = get_frame_cache()
+    if not cache.upsert("items", _rows(res.data)):
+        cache.invalidate("items")
+    return f"Reorder point set to {int(reorder_point)} (lead time {int(lead_time_days)} days)."
 
 def delete_item(item_id: int, user: str):
     """
@@ -160,7 +269,10 @@ def delete_item(item_id: int, user: str):
     """
     sb = get_supabase()
     res = sb.rpc("delete_item_with_audit", {"p_item_id": int(item_id), "p_user": user}).execute()
-    return bool(res.data) if res.data is not None else False
+    ok = bool(res.data) if res.data is not None else False
+    if ok:
+        get_frame_cache().remove("items", [int(item_id)])
+    return ok
 
 def record_sale(item: str, quantity: int, user: str, customer_id: Optional[int]):
     """
@@ -177,11 +289,25 @@ def record_sale(item: str, quantity: int, user: str, customer_id: Optional[int])
                 "p_customer_id": customer_id,
             }
         ).execute()
-        if not res.data:
+        cache = get_frame_cache()
+        rows = _rows(res.data)
+        # Names repeat across categories and the sale row carries no item id: patch the
+        # cached stock only when the name is unambiguous, otherwise reload it
+        items = cache.peek("items")
+        ids = items.loc[items["item"] == item, "id"].tolist() if items is not None and not items.empty else []
+        if len(ids) == 1:
+            cache.adjust("items", "quantity", -int(quantity), "id", ids[0])
+        else:
+            cache.invalidate("items")
+        if not cache.upsert("sales", rows):
+            cache.invalidate("sales")
+        if not rows:
             return "Sale recorded, but no data returned."
-        row = res.data[0]
+        row = rows[0]
         profit = float(row.get("profit", 0))
         return f"Sale recorded. Profit: ${profit:.2f}"
+    except BackendUnavailable:
+        return BACKEND_UNAVAILABLE_MESSAGE
     except Exception as e:
         msg = str(e)
         if "Not enough stock" in msg:
@@ -207,26 +333,41 @@ def record_installation(item_id: int, quantity: int, installed_by: str,
                 "p_installed_date": (_to_date_str(installed_date) + "T00:00:00Z") if installed_date else None
             }
         ).execute()
-        if not res.data:
-            return f"Installation recorded: Item {item_id}, Quantity {quantity}, for Customer {customer_id} on {installed_date} by {installed_by}."
+        cache = get_frame_cache()
+        cache.adjust("items", "quantity", -int(quantity), "id", int(item_id))
+        rows = [_flatten_installation(r) for r in _rows(res.data) if r.get("id") is not None]
+        if not cache.upsert("installations", rows):
+            cache.invalidate("installations")
         return f"Installation recorded: Item {item_id}, Quantity {quantity}, for Customer {customer_id} on {installed_date} by {installed_by}."
+    except BackendUnavailable:
+        return BACKEND_UNAVAILABLE_MESSAGE
     except Exception as e:
         msg = str(e)
         if "Not enough stock" in msg:
-            try:
-                item = sb.table("items").select("quantity").eq("id", item_id).single().execute().data
-                current_stock = item["quantity"] if item else "unknown"
-            except:
+            # The items frame is patched on every stock write, so no extra round trip for the message
+            current_stock = _lookup(get_frame_cache().peek("items"), "id", int(item_id), "quantity")
+            if current_stock is None:
                 current_stock = "unknown"
             return f"Not enough stock.  Current stock: {current_stock}, requested quantity: {quantity}."
         if "not found" in msg:
             return f"Item {item_id} not found in inventory."
         return f"Error recording installation: {msg}"
 
-def delete_customer(customer_name: str):
+def delete_customer(customer_name: str, customer_id: Optional[int] = None):
+    """Delete by id when known (names need not be unique), otherwise every customer with that name."""
     sb = get_supabase()
     try:
-        sb.table("customers").delete().eq("name", customer_name).execute()
+        q = sb.table("customers").delete()
+        q = q.eq("id", int(customer_id)) if customer_id is not None else q.eq("name", customer_name)
+        res = q.execute()
+        cache = get_frame_cache()
+        deleted = [r["id"] for r in _rows(res.data) if r.get("id") is not None]
+        if deleted:
+            cache.remove("customers", deleted)
+        elif customer_id is not None:
+            cache.remove("customers", [int(customer_id)])
+        else:
+            cache.remove("customers", [customer_name], column="name")
     except Exception as e:
         st.error(f"Error deleting customer: {e}")
 
@@ -237,6 +378,7 @@ def delete_customer_installation(installation_id: int):
     sb = get_supabase()
     try:
         sb.table("installations").delete().eq("id", int(installation_id)).execute()
+        get_frame_cache().remove("installations", [int(installation_id)])
         return f"Installation ID {installation_id} deleted successfully."
     except Exception as e:
         return f"Error deleting installation: {e}"
@@ -245,16 +387,75 @@ def delete_all_inventory():
     sb = get_supabase()
     try:
         sb.table("items").delete().neq("id", -1).execute()
+        get_frame_cache().clear("items")
     except Exception as e:
         st.error(f"Error deleting inventory: {e}")
 
-def delete_all_customers():
+def delete_all_customers() -> str:
+    """Delete every installation and customer. Returns a message for the caller to show."""
     sb = get_supabase()
     try:
         sb.table("installations").delete().neq("id", -1).execute()
         sb.table("customers").delete().neq("id", -1).execute()
+        cache = get_frame_cache()
+        cache.clear("installations")
+        cache.clear("customers")
+        return "All customers have been deleted."
     except Exception as e:
-        st.error(f"Error deleting customers: {e}")
+        return f"Error deleting customers: {e}"
+
+def insert_customers(records: list) -> list:
+    """
+    Insert one batch of customers. Returns the inserted rows and patches them
+    into the cached customers frame. Callers filter out existing names first.
+    """
+    sb = get_supabase()
+    res = sb.table("customers").insert(records).execute()
+    rows = _rows(res.data)
+    cache = get_frame_cache()
+    if not cache.upsert("customers", rows):
+        cache.invalidate("customers")
+    return rows
+
+def existing_customers() -> pd.DataFrame:
+    """id, name, phone, email of every customer, read in chunks (duplicate checks)."""
+    return pd.DataFrame(list(iter_rows("customers", "id, name, phone, email")),
+                        columns=["id", "name", "phone", "email"])
+
+def merge_customers(keep_id: int, duplicate_ids: list, user: str = "") -> str:
+    """
+    Fold duplicate customers into keep_id (RPC merge_customers): sales and
+    installations are repointed, then the duplicates are deleted.
+    """
+    sb = get_supabase()
+    dups = [int(d) for d in duplicate_ids if int(d) != int(keep_id)]
+    if not dups:
+        return "Nothing to merge."
+    try:
+        res = sb.rpc("merge_customers", {"p_keep": int(keep_id), "p_duplicates": dups, "p_user": user}).execute()
+        counts = (_rows(res.data) or [{}])[0]
+        kept = _rows(sb.table("customers").select("*").eq("id", int(keep_id)).execute().data)
+    except Exception as e:
+        return f"Error merging customers: {e}"
+
+    cache = get_frame_cache()
+    cache.remove("customers", dups)
+    cache.upsert("customers", kept)
+    repoint = {d: int(keep_id) for d in dups}
+    cache.apply("sales", lambda df: df.assign(customer_id=df["customer_id"].replace(repoint))
+                if "customer_id" in df.columns else df)
+
+    def patch_installs(df):
+        if "customer_id" not in df.columns:
+            return df
+        moved = df["customer_id"].isin(dups)
+        df.loc[moved, "customer_id"] = int(keep_id)
+        if kept and "customer_name" in df.columns:
+            df.loc[moved, "customer_name"] = kept[0].get("name")
+        return df
+    cache.apply("installations", patch_installs)
+    return (f"Merged {counts.get('customers_removed', len(dups))} customer(s) into #{keep_id}: "
+            f"{counts.get('sales_moved', 0)} sale(s), {counts.get('installations_moved', 0)} installation(s) moved.")
 
 def add_customer(name: str, phone: str, email: str, address: str) -> str:
     """
@@ -265,64 +466,25 @@ def add_customer(name: str, phone: str, email: str, address: str) -> str:
     existing = sb.table("customers").select("id").eq("name", name).limit(1).execute().data
     if existing:
         return f"Customer '{name}' already exists."
-    sb.table("customers").insert({"name": name, "phone": phone, "email": email, "address": address}).execute()
+    res = sb.table("customers").insert({"name": name, "phone": phone, "email": email, "address": address}).execute()
+    cache = get_frame_cache()
+    if not cache.upsert("customers", _rows(res.data)):
+        cache.invalidate("customers")
     return f"Customer '{name}' added successfully!"
 
 # ---------------- Import / Upsert items from CSV/Excel ----------------
-def import_items_and_add_or_insert():
+def import_items_and_add_or_insert(file_path: Optional[str] = None):
     """
-    Console-driven import to mirror your original.
+    Console import kept for compatibility; prompts for the path when none is given.
+    For unattended loads use the CLI: python importer.py items --file <path>
     Expects columns: item (or item_id -> mapped to 'item'), category, unit_cost, selling_price, quantity/stock_quantity, unit (optional)
     """
-    import os
-    import pandas as pd
-
-    file_path = input("Please enter the full path to your Excel or CSV file: ").strip()
-    ext = os.path.splitext(file_path)[1].lower()
-
-    if ext == ".csv":
-        df = pd.read_csv(file_path)
-    elif ext == ".xlsx":
-        df = pd.read_excel(file_path, engine="openpyxl")
-    elif ext == ".xls":
-        df = pd.read_excel(file_path, engine="xlrd")
-    else:
-        raise ValueError("Unsupported file format. Please upload a CSV or Excel file.")
-
-    def get_col(row, *names, default=None):
-        for n in names:
-            if n in row and pd.notna(row[n]):
-                return row[n]
-        return default
-
-    records = []
-    for _, row in df.iterrows():
-        item_name = get_col(row, "item", "item_id")
-        if not item_name:
-            continue
-        category = str(get_col(row, "category", default="") or "")
-        unit_cost = float(get_col(row, "unit_cost", default=0) or 0)
-        selling_price = float(get_col(row, "selling_price", default=0) or 0)
-        quantity = int(get_col(row, "stock_quantity", "quantity", default=0) or 0)
-        unit = get_col(row, "unit", default=None)
-
-        records.append({
-            "item": str(item_name),
-            "category": category,
-            "quantity": quantity,
-            "unit_cost": unit_cost,
-            "selling_price": selling_price,
-            "unit": unit
-        })
-
-    if not records:
+    from importer import import_file
+
+    if file_path is None:
+        file_path = input("Please enter the full path to your Excel or CSV file: ").strip()
+    stats, _ = import_file("items", file_path, workers=1)
+    if not stats.rows_total:
         print("No rows to import.")
         return
-
-    sb = get_supabase()
-    BATCH = 500
-    for i in range(0, len(records), BATCH):
-        chunk = records[i:i+BATCH]
-        sb.table("items").upsert(chunk, on_conflict="item,category").execute()
-
-    print("Items updated or inserted successfully.")
\ No newline at end of file
+    print(f"Items updated or inserted: {stats.summary()}")
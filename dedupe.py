@@ -0,0 +1,211 @@
+# dedupe.py
+"""
+Duplicate detection for customers.
+
+Records are only compared inside blocks that share a key: normalized phone,
+email, email local part, the token-sorted name, or a pair of name-token
+prefixes.
+Exact contact keys link each record to the first one in its block (any two
+records in such a block are duplicates of each other anyway), and name
+blocks larger than MAX_BLOCK are too common to be informative and are
+skipped. The work therefore grows with the number of near-duplicates, not
+with N².
+"""
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import pandas as pd
+
+MAX_BLOCK = 100
+# A name-only match needs this similarity; a shared phone or email is flagged regardless
+NAME_MIN_SIMILARITY = 0.88
+
+# Titles, suffixes and surname particles ("DELA CRUZ" = "DE LA CRUZ" = "CRUZ") carry no identity
+NAME_NOISE = {"JR", "SR", "II", "III", "IV", "MR", "MRS", "MS", "MISS", "DR", "ENGR", "ATTY", "SIR", "MAAM",
+              "DE", "DEL", "DELA", "DELOS", "LA", "LAS", "LOS", "Y"}
+# Name blocks use token prefixes, so "CRUZ" and "CRUS" still meet
+BLOCK_PREFIX = 3
+GENERIC_LOCAL_PARTS = {"INFO", "ADMIN", "SALES", "CONTACT", "OFFICE", "SUPPORT", "NOREPLY", "HELLO", "BILLING"}
+
+# ---------------- Normalization ----------------
+def normalize_phone(phone) -> str:
+    """Last 10 digits, so 0917..., +63 917... and 63-917-... agree; too short to be a number -> ""."""
+    digits = re.sub(r"\D", "", str(phone or ""))
+    return digits[-10:] if len(digits) >= 7 else ""
+
+def normalize_email(email) -> Tuple[str, str]:
+    """(full address, local part) upper-cased; +tags and dots in the local part are ignored."""
+    email = str(email or "").strip().upper()
+    if "@" not in email:
+        return "", ""
+    local, domain = email.rsplit("@", 1)
+    local = local.split("+", 1)[0].replace(".", "")
+    if not local or not domain:
+        return "", ""
+    return f"{local}@{domain}", ("" if local in GENERIC_LOCAL_PARTS else local)
+
+def name_tokens(name) -> Tuple[str, ...]:
+    tokens = re.sub(r"[^A-Z0-9 ]", " ", str(name or "").upper()).split()
+    return tuple(sorted({t for t in tokens if t not in NAME_NOISE}))
+
+class Customer(NamedTuple):
+    id: int
+    name: str
+    phone_key: str
+    email_key: str
+    local_key: str
+    tokens: Tuple[str, ...]
+    name_key: str
+
+def prepare(df: pd.DataFrame) -> List[Customer]:
+    """Comparison keys for each customer row (plain tuples: the hot loops stay out of pandas)."""
+    col = lambda c: df[c].tolist() if c in df.columns else [""] * len(df)
+    rows = []
+    for cid, name, phone, email in zip(df["id"].astype(int).tolist(), df["name"].fillna("").astype(str).tolist(),
+                                       col("phone"), col("email")):
+        email_key, local_key = normalize_email(email)
+        tokens = name_tokens(name)
+        rows.append(Customer(cid, name, normalize_phone(phone), email_key, local_key, tokens, " ".join(tokens)))
+    return rows
+
+# ---------------- Blocking ----------------
+def candidate_pairs(rows: List[Customer]) -> set:
+    """Position pairs (i, j), i < j, that share at least one blocking key."""
+    pairs = set()
+
+    # Exact keys: a star around the first record links the whole block
+    for field in ("phone_key", "email_key", "name_key"):
+        first: Dict[str, int] = {}
+        for pos, row in enumerate(rows):
+            key = getattr(row, field)
+            if key:
+                head = first.setdefault(key, pos)
+                if head != pos:
+                    pairs.add((head, pos))
+
+    # Fuzzy keys: all pairs inside small blocks
+    blocks: Dict[tuple, List[int]] = defaultdict(list)
+    for pos, row in enumerate(rows):
+        prefixes = sorted({t[:BLOCK_PREFIX] for t in row.tokens})
+        keys = list(combinations(prefixes, 2)) if len(prefixes) > 1 else [tuple(prefixes)]
+        if row.local_key:
+            keys.append(("@", row.local_key))
+        for key in keys:
+            blocks[key].append(pos)
+    for members in blocks.values():
+        if 1 < len(members) <= MAX_BLOCK:
+            pairs.update(combinations(members, 2))
+    return pairs
+
+# ---------------- Scoring ----------------
+def score_pair(a, b) -> Tuple[float, List[str]]:
+    """Similarity in [0, 1] and the reasons behind it, for two prepared rows."""
+    reasons = []
+    contact = False
+    if a.phone_key and a.phone_key == b.phone_key:
+        reasons.append("same phone")
+        contact = True
+    if a.email_key and a.email_key == b.email_key:
+        reasons.append("same email")
+        contact = True
+    elif a.local_key and a.local_key == b.local_key:
+        reasons.append("same email name")
+
+    ta, tb = set(a.tokens), set(b.tokens)
+    if ta and ta == tb:
+        sim = 1.0
+        reasons.append("same name")
+    elif ta and tb and (ta <= tb or tb <= ta):
+        sim = 0.95
+        reasons.append("name contained")
+    elif a.name_key and b.name_key:
+        la, lb = len(a.name_key), len(b.name_key)
+        # Length and quick_ratio() are cheap upper bounds; only contact matches need the exact value below them
+        if contact or 2 * min(la, lb) / (la + lb) >= NAME_MIN_SIMILARITY:
+            m = SequenceMatcher(None, a.name_key, b.name_key)
+            sim = m.ratio() if contact or m.quick_ratio() >= NAME_MIN_SIMILARITY else 0.0
+        else:
+            sim = 0.0
+        if sim >= NAME_MIN_SIMILARITY:
+            reasons.append("similar name")
+    else:
+        sim = 0.0
+
+    score = 0.6 + 0.4 * sim if contact else min(1.0, sim + (0.05 if "same email name" in reasons else 0.0))
+    return round(score, 3), reasons
+
+def _is_duplicate(score: float, reasons: List[str]) -> bool:
+    return "same phone" in reasons or "same email" in reasons or score >= NAME_MIN_SIMILARITY
+
+def find_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Likely duplicate pairs among customers, best first. The older record
+    (lower id) is proposed as the one to keep.
+    """
+    columns = ["keep_id", "keep_name", "duplicate_id", "duplicate_name", "score", "reasons"]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    rows = prepare(df)
+    out = []
+    for i, j in candidate_pairs(rows):
+        a, b = rows[i], rows[j]
+        score, reasons = score_pair(a, b)
+        if _is_duplicate(score, reasons):
+            keep, dup = (a, b) if a.id < b.id else (b, a)
+            out.append((keep.id, keep.name, dup.id, dup.name, score, ", ".join(reasons)))
+    return pd.DataFrame(out, columns=columns).sort_values(
+        ["score", "keep_id"], ascending=[False, True], ignore_index=True)
+
+def match_incoming(existing: pd.DataFrame, incoming: List[dict]) -> Dict[int, Tuple[int, str, float, str]]:
+    """
+    For import: incoming record index -> (existing id, existing name, score, reasons)
+    of its best likely duplicate. Repeats inside the file map to id None.
+    """
+    new = pd.DataFrame(incoming, columns=["name", "phone", "email"])
+    new["id"] = -(new.index + 1)   # negative ids keep incoming rows apart from stored ones
+    both = pd.concat([existing.reindex(columns=["id", "name", "phone", "email"]), new], ignore_index=True)
+    dups = find_duplicates(both)
+    best: Dict[int, Tuple[int, str, float, str]] = {}
+    # keep_id < duplicate_id, so an incoming row (negative id) is always on the keep side
+    for r in dups.itertuples(index=False):
+        if r.keep_id >= 0:
+            continue
+        # Pair of two incoming rows: the later row in the file is the repeat
+        if r.duplicate_id < 0:
+            idx, other = -r.duplicate_id - 1, None
+            if -r.keep_id - 1 > idx:
+                idx = -r.keep_id - 1
+        else:
+            idx, other = -r.keep_id - 1, (int(r.duplicate_id), r.duplicate_name)
+        if idx not in best or (other and (best[idx][0] is None or r.score > best[idx][2])):
+            best[idx] = (other[0] if other else None, other[1] if other else "", r.score, r.reasons)
+    return best
+
+# ---------------- Merge planning ----------------
+def plan_merges(pairs: Iterable[Tuple[int, int]]) -> Dict[int, List[int]]:
+    """
+    Group accepted pairs into clusters (A~B and B~C merge together) and keep
+    the lowest id of each cluster. Returns {keep_id: [duplicate ids]}.
+    """
+    parent: Dict[int, int] = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in pairs:
+        ra, rb = find(int(a)), find(int(b))
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for x in list(parent):
+        root = find(x)
+        if x != root:
+            clusters[root].append(x)
+    return {keep: sorted(dups) for keep, dups in clusters.items()}
@@ -0,0 +1,215 @@
+# export.py
+"""
+On-demand table exports (CSV, Excel, Parquet).
+
+Pages hand st.download_button a callable, so nothing is serialized until
+someone clicks. The file is then written straight from iter_rows() one
+chunk at a time (csv writer, openpyxl write-only workbook, Parquet row
+groups) instead of from a full DataFrame, and kept on disk keyed by the
+query, the format and the FrameCache version of the table, so repeated
+downloads of unchanged data are served from the file.
+"""
+import csv
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from db_supabase import FRAME_CACHE_TTL, get_frame_cache, iter_rows
+
+EXPORT_DIR = os.environ.get("ALPHACJ_EXPORT_DIR", "exports")
+CHUNK_SIZE = 1000
+MAX_CACHED_EXPORTS = 32
+
+FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+# Output columns of each exported table and their Arrow types (schema plus migrations).
+# Parquet files are typed from these instead of from the first chunk: PostgREST sends
+# whole-valued numerics as JSON ints, and a nullable column can be empty for a whole chunk.
+TABLE_COLUMNS: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "items": (("id", "int64"), ("item", "string"), ("category", "string"), ("quantity", "int64"),
+              ("unit_cost", "float64"), ("selling_price", "float64"), ("unit", "string"),
+              ("barcode", "string"), ("reorder_point", "int64"), ("lead_time_days", "int64")),
+    "sales": (("id", "int64"), ("item", "string"), ("quantity", "int64"), ("selling_price", "float64"),
+              ("total_sale", "float64"), ("cost", "float64"), ("profit", "float64"), ("date", "string"),
+              ("customer_id", "int64")),
+    "customers": (("id", "int64"), ("name", "string"), ("phone", "string"), ("email", "string"),
+                  ("address", "string")),
+    "audit_log": (("id", "int64"), ("item", "string"), ("category", "string"), ("action", "string"),
+                  ("quantity", "int64"), ("unit_cost", "float64"), ("selling_price", "float64"),
+                  ("user", "string"), ("timestamp", "string")),
+    # As shaped by _flatten_installation
+    "installations": (("id", "int64"), ("customer_id", "int64"), ("customer_name", "string"),
+                      ("item_id", "int64"), ("item_name", "string"), ("quantity", "int64"),
+                      ("installed_by", "string"), ("date", "string")),
+}
+
+@dataclass(frozen=True)
+class ExportQuery:
+    """What to export: arguments for iter_rows() plus the cached frame whose version tracks the table."""
+    table: str
+    columns: str = "*"
+    order: str = "id"
+    desc: bool = False
+    filters: tuple = ()                 # ((op, column, value), ...)
+    frame_key: Optional[str] = None     # FrameCache key; defaults to the table name
+    transform: Optional[Callable[[dict], dict]] = field(default=None, compare=False, repr=False)
+    schema: tuple = ()                  # ((column, arrow type), ...); defaults to TABLE_COLUMNS[table]
+
+    def column_types(self) -> Dict[str, Optional[str]]:
+        """Output column -> Arrow type name, in file order; None means inferred from the data."""
+        if self.schema:
+            return dict(self.schema)
+        if self.table in TABLE_COLUMNS:
+            return dict(TABLE_COLUMNS[self.table])
+        if self.columns.strip() != "*" and not self.transform:
+            return {c.strip(): None for c in self.columns.split(",")}
+        return {}
+
+    def rows(self) -> Iterator[dict]:
+        rows = iter_rows(self.table, self.columns, order=self.order, desc=self.desc,
+                         filters=list(self.filters), chunk_size=CHUNK_SIZE)
+        return map(self.transform, rows) if self.transform else rows
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _chunks(rows: Iterator[dict], size: int = CHUNK_SIZE) -> Iterator[List[dict]]:
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+# ---------------- Writers ----------------
+# Writers take the rows and the query's column_types(); the declared columns give the
+# header of an empty result.
+def _write_csv(rows: Iterator[dict], path: str, types: Dict[str, Optional[str]]):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerow(row)
+        if writer is None and types:
+            csv.writer(f).writerow(list(types))
+
+def _write_xlsx(rows: Iterator[dict], path: str, types: Dict[str, Optional[str]]):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)   # rows go straight to the file, no cell objects kept
+    ws = wb.create_sheet("data")
+    header = None
+    for row in rows:
+        if header is None:
+            header = list(row)
+            ws.append(header)
+        ws.append([row.get(c) for c in header])
+    if header is None and types:
+        ws.append(list(types))
+    wb.save(path)
+
+def _arrow_column(name: str, values: list, arrow_type):
+    """values as an array of arrow_type; only lossless conversions pass (ints to float, nulls)."""
+    import pyarrow as pa
+
+    arr = pa.array(values)
+    if arr.type == arrow_type or pa.types.is_null(arr.type):
+        return arr.cast(arrow_type)
+    if pa.types.is_string(arr.type) != pa.types.is_string(arrow_type):
+        raise pa.ArrowTypeError(f"Column {name}: expected {arrow_type}, got {arr.type}")
+    return arr.cast(arrow_type, safe=True)   # 10.5 into int64 raises instead of truncating
+
+def _write_parquet(rows: Iterator[dict], path: str, types: Dict[str, Optional[str]]):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = schema = None
+    try:
+        for chunk in _chunks(rows):
+            if schema is None:
+                fields = []
+                for name in dict.fromkeys(k for row in chunk for k in row):
+                    if types.get(name):
+                        arrow_type = pa.type_for_alias(types[name])
+                    else:
+                        # Undeclared: typed from this chunk; a column empty here becomes string
+                        arrow_type = pa.array([row.get(name) for row in chunk]).type
+                        arrow_type = pa.string() if pa.types.is_null(arrow_type) else arrow_type
+                    fields.append(pa.field(name, arrow_type))
+                schema = pa.schema(fields)
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(pa.Table.from_arrays(
+                [_arrow_column(f.name, [row.get(f.name) for row in chunk], f.type) for f in schema], schema=schema))
+        if writer is None:
+            pq.write_table(pa.schema([pa.field(name, pa.type_for_alias(t or "string"))
+                                      for name, t in types.items()]).empty_table(), path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+_WRITERS = {"csv": _write_csv, "xlsx": _write_xlsx, "parquet": _write_parquet}
+
+# ---------------- Cache ----------------
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+_build_locks: Dict[str, threading.Lock] = {}
+
+def data_version(query: ExportQuery) -> tuple:
+    """
+    In-process writes bump the FrameCache version; the TTL window bounds
+    staleness against writers in other processes, as for the frames themselves.
+    """
+    return get_frame_cache().version(query.frame_key or query.table), int(time.time() // FRAME_CACHE_TTL)
+
+def _cache_key(query: ExportQuery, fmt: str) -> str:
+    return hashlib.sha1(repr((query, fmt, data_version(query))).encode()).hexdigest()[:16]
+
+def export_file(query: ExportQuery, fmt: str = "csv") -> str:
+    """Path of the exported file, building it on first request for this data version."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    key = _cache_key(query, fmt)
+    with _cache_lock:
+        path = _cache.get(key)
+        if path and os.path.exists(path):
+            _cache.move_to_end(key)
+            return path
+        lock = _build_locks.setdefault(key, threading.Lock())
+
+    with lock:   # concurrent clicks on the same export build it once
+        with _cache_lock:
+            path = _cache.get(key)
+        if path and os.path.exists(path):
+            return path
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        path = os.path.join(EXPORT_DIR, f"{query.table}_{key}{FORMATS[fmt][1]}")
+        tmp = path + ".part"
+        _WRITERS[fmt](query.rows(), tmp, query.column_types())
+        os.replace(tmp, path)
+
+    with _cache_lock:
+        _cache[key] = path
+        _build_locks.pop(key, None)
+        while len(_cache) > MAX_CACHED_EXPORTS:
+            _, old = _cache.popitem(last=False)
+            if os.path.exists(old):
+                os.remove(old)
+    return path
+
+def export_bytes(query: ExportQuery, fmt: str = "csv") -> bytes:
+    with open(export_file(query, fmt), "rb") as f:
+        return f.read()
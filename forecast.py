@@ -0,0 +1,257 @@
+# forecast.py
+"""
+Weekly demand forecasts and suggested order quantities.
+
+Sales and installations are folded into one item x week demand matrix
+(np.add.at over all rows at once). Moving average, simple exponential
+smoothing and seasonal naive are then fitted for every item together as
+array operations, and each item uses the model with the lowest recent
+one-step error. The matrix and the smoothing state are kept per process;
+later refreshes only fetch rows with a higher id and re-run smoothing
+from the earliest week those rows touched. The running week has its own
+column, so rows fetched mid-week are kept and count once the week is over.
+"""
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from db_supabase import FRAME_CACHE_TTL, get_frame_cache, iter_rows, view_items
+
+PERIOD_DAYS = 7
+HISTORY_PERIODS = 104
+SEASON = 52
+MA_WINDOW = 8
+SES_ALPHA = 0.3
+# Models are compared on one-step errors over the last EVAL_PERIODS weeks
+EVAL_PERIODS = 12
+SERVICE_Z = 1.65                # ~95% cycle service level
+REVIEW_PERIODS = 1              # orders are placed weekly
+DEFAULT_LEAD_TIME_DAYS = 7
+# Deleted or back-dated rows are only picked up by a full rebuild
+REBUILD_INTERVAL = 24 * 3600
+
+MODELS = ("moving_average", "exp_smoothing", "seasonal_naive")
+log = logging.getLogger(__name__)
+
+SUGGESTION_COLUMNS = ["id", "item", "category", "quantity", "lead_time_days", "model", "weekly_forecast",
+                      "lead_time_demand", "safety_stock", "order_up_to", "suggested_order", "order_value"]
+
+def parse_dates(dates) -> pd.Series:
+    """
+    UTC timestamps from ISO 8601 strings in any mix of forms (with or without
+    fractional seconds, "Z" or an offset, date only); unparseable values are NaT.
+    """
+    return pd.to_datetime(pd.Series(dates), utc=True, format="ISO8601", errors="coerce")
+
+def period_of(dates) -> np.ndarray:
+    """Monday-based week number since 1970 for an array of timestamps/dates (all parseable)."""
+    days = parse_dates(dates).dt.tz_localize(None).to_numpy(dtype="datetime64[D]").astype(np.int64)
+    return (days + 3) // PERIOD_DAYS   # 1970-01-01 was a Thursday
+
+def period_start(period: int) -> date:
+    return date(1970, 1, 1) + timedelta(days=int(period) * PERIOD_DAYS - 3)
+
+def _moving_average(d: np.ndarray, window: int) -> np.ndarray:
+    """One-step forecasts: fc[:, t] = mean of the `window` weeks before t (fewer at the start)."""
+    c = np.concatenate([np.zeros((d.shape[0], 1)), np.cumsum(d, axis=1)], axis=1)
+    t = np.arange(d.shape[1] + 1)
+    lo = np.maximum(t - window, 0)
+    n = np.maximum(t - lo, 1)
+    return (c[:, t] - c[:, lo]) / n     # column t forecasts week t; the last column is next week
+
+def _seasonal_naive(d: np.ndarray, season: int) -> np.ndarray:
+    fc = np.full((d.shape[0], d.shape[1] + 1), np.nan)
+    if d.shape[1] >= season:
+        fc[:, season:] = d[:, :d.shape[1] + 1 - season]
+    return fc
+
+class Forecaster:
+    """
+    Demand matrix (HISTORY_PERIODS complete weeks plus the running week in
+    the last column) and the exponential smoothing state, for all items.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.rows: Dict[int, int] = {}        # item id -> matrix row
+        self.demand = np.zeros((0, HISTORY_PERIODS + 1))
+        self.first_period = 0                 # week of column 0
+        self.ses = np.zeros((0, HISTORY_PERIODS + 1))
+        self.ses_valid = 0                    # ses columns up to here are current
+        self.watermarks = {"sales": 0, "installations": 0}
+        self.unparsed_rows = 0                # movements skipped for an unreadable date
+        self.built_at = 0.0
+        self.data_version = None
+
+    # ---------------- Loading ----------------
+    def _fetch(self, table: str, columns: str) -> pd.DataFrame:
+        since = period_start(self.first_period).isoformat()
+        rows = iter_rows(table, columns, order="id",
+                         filters=[("gt", "id", self.watermarks[table]), ("gte", "date", since)])
+        df = pd.DataFrame(list(rows), columns=columns.split(","))
+        if not df.empty:
+            self.watermarks[table] = int(df["id"].max())
+        return df
+
+    def _ensure_rows(self, item_ids: np.ndarray) -> np.ndarray:
+        new = [i for i in pd.unique(item_ids).tolist() if i not in self.rows]
+        if new:
+            for i in new:
+                self.rows[i] = len(self.rows)
+            self.demand = np.vstack([self.demand, np.zeros((len(new), self.demand.shape[1]))])
+            self.ses = np.vstack([self.ses, np.zeros((len(new), self.ses.shape[1]))])
+            self.ses_valid = 0
+        return np.fromiter((self.rows[i] for i in item_ids.tolist()), dtype=np.int64, count=len(item_ids))
+
+    def _advance(self, current: int):
+        """Slide the window so the last column is the running week; its predecessor becomes complete."""
+        first = current - HISTORY_PERIODS
+        shift = first - self.first_period
+        if shift <= 0:
+            return
+        if shift >= self.demand.shape[1]:
+            self.demand[:] = 0
+            self.ses_valid = 0
+        else:
+            self.demand = np.concatenate([self.demand[:, shift:], np.zeros((self.demand.shape[0], shift))], axis=1)
+            self.ses = np.concatenate([self.ses[:, shift:], np.zeros((self.ses.shape[0], shift))], axis=1)
+            self.ses_valid = max(self.ses_valid - shift, 0)
+        self.first_period = first
+
+    def update(self, items: pd.DataFrame, now: Optional[pd.Timestamp] = None):
+        """Fold movements newer than the watermarks into the matrix and refresh the fit."""
+        with self._lock:
+            current = int(period_of([now or pd.Timestamp.now(tz="UTC")])[0])
+            if time.time() - self.built_at > REBUILD_INTERVAL:
+                self._reset()
+                self.first_period = current - HISTORY_PERIODS
+                self.built_at = time.time()
+            self._advance(current)
+
+            # Sales carry the item name; resolve it to an id through the items frame
+            sales = self._fetch("sales", "id,item,quantity,date")
+            by_name = items.drop_duplicates("item").set_index("item")["id"] if not items.empty else pd.Series(dtype=int)
+            sales["item_id"] = sales["item"].map(by_name)
+            inst = self._fetch("installations", "id,item_id,quantity,date")
+            moves = pd.concat([sales[["item_id", "quantity", "date"]], inst[["item_id", "quantity", "date"]]],
+                              ignore_index=True).dropna(subset=["item_id"])
+
+            self._ensure_rows(items["id"].astype(np.int64).to_numpy() if not items.empty else np.empty(0, np.int64))
+            if not moves.empty:
+                unparsed = parse_dates(moves["date"]).isna().to_numpy()
+                if unparsed.any():
+                    self.unparsed_rows += int(unparsed.sum())
+                    log.warning("Forecast skipped %d movement(s) with unreadable dates", int(unparsed.sum()))
+                    moves = moves[~unparsed]
+                cols = period_of(moves["date"]) - self.first_period
+                keep = (cols >= 0) & (cols <= HISTORY_PERIODS)
+                rows = self._ensure_rows(moves["item_id"].astype(np.int64).to_numpy()[keep])
+                cols = cols[keep]
+                qty = pd.to_numeric(moves["quantity"], errors="coerce").fillna(0).to_numpy()[keep]
+                np.add.at(self.demand, (rows, cols), qty)
+                if len(cols):
+                    self.ses_valid = min(self.ses_valid, int(cols.min()))
+            self._smooth()
+
+    def _smooth(self):
+        """Exponential smoothing over complete weeks, re-run only from the first column whose input changed."""
+        n = HISTORY_PERIODS
+        t0 = self.ses_valid
+        if t0 == 0:
+            # Initialise with the mean of the first weeks so a slow start does not drag the level down
+            self.ses[:, 0] = self.demand[:, :MA_WINDOW].mean(axis=1)
+        level = self.ses[:, t0].copy()
+        for t in range(t0, n):   # loop over weeks, each step covers all items
+            level = SES_ALPHA * self.demand[:, t] + (1 - SES_ALPHA) * level
+            self.ses[:, t + 1] = level
+        self.ses_valid = n
+
+    def _complete(self) -> np.ndarray:
+        return self.demand[:, :HISTORY_PERIODS]
+
+    # ---------------- Fit ----------------
+    def fit(self) -> pd.DataFrame:
+        """Per item: chosen model, next-week forecast and residual spread (indexed by item id)."""
+        with self._lock:
+            d = self._complete().copy()
+            ses = self.ses.copy()
+            ids = np.array(list(self.rows), dtype=np.int64)
+        forecasts = np.stack([_moving_average(d, MA_WINDOW), ses, _seasonal_naive(d, SEASON)])
+        # One-step errors on the last EVAL_PERIODS weeks; a model without a forecast there never wins
+        err = np.abs(forecasts[:, :, -EVAL_PERIODS - 1:-1] - d[None, :, -EVAL_PERIODS:])
+        mae = np.where(np.isnan(err).any(axis=2), np.inf, err.mean(axis=2))
+        best = mae.argmin(axis=0)
+        pick = np.arange(d.shape[0])
+        resid = forecasts[best, pick, -EVAL_PERIODS - 1:-1] - d[:, -EVAL_PERIODS:]
+        return pd.DataFrame({
+            "model": np.array(MODELS)[best],
+            "weekly_forecast": np.maximum(forecasts[best, pick, -1], 0),
+            "sigma": np.nan_to_num(resid.std(axis=1)),
+        }, index=pd.Index(ids, name="id"))
+
+    def history(self, item_id: int) -> pd.DataFrame:
+        """Weekly demand of one item over the window, for charts."""
+        with self._lock:
+            row = self.rows.get(int(item_id))
+            values = self._complete()[row] if row is not None else np.zeros(HISTORY_PERIODS)
+            first = self.first_period
+        weeks = [period_start(first + i) for i in range(len(values))]
+        return pd.DataFrame({"week": pd.to_datetime(weeks), "demand": values})
+
+@st.cache_resource
+def get_forecaster() -> Forecaster:
+    return Forecaster()
+
+def forecaster() -> Forecaster:
+    """The process-wide forecaster, brought up to date when sales or installations changed."""
+    f = get_forecaster()
+    cache = get_frame_cache()
+    version = (cache.version("sales"), cache.version("installations"), cache.version("items"),
+               int(time.time() // FRAME_CACHE_TTL))
+    if version != f.data_version:
+        f.update(view_items())
+        f.data_version = version
+    return f
+
+# ---------------- Suggestions ----------------
+def suggestions(items: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Order-up-to quantities per item: forecast demand over lead time plus one
+    review period, plus safety stock for the forecast error, minus stock on hand.
+    """
+    items = view_items() if items is None else items
+    if items.empty:
+        return pd.DataFrame(columns=SUGGESTION_COLUMNS)
+    fit = forecaster().fit()
+    df = items.join(fit, on="id")
+    df["model"] = df["model"].fillna(MODELS[0])
+    for c in ("weekly_forecast", "sigma"):
+        df[c] = df[c].fillna(0.0)
+    lead = pd.to_numeric(df.get("lead_time_days", pd.Series(index=df.index, dtype=float)), errors="coerce") \
+        .fillna(DEFAULT_LEAD_TIME_DAYS)
+    reorder = pd.to_numeric(df.get("reorder_point", pd.Series(index=df.index, dtype=float)), errors="coerce").fillna(0)
+    on_hand = pd.to_numeric(df["quantity"], errors="coerce").fillna(0)
+
+    lead_periods = lead / PERIOD_DAYS
+    cover = lead_periods + REVIEW_PERIODS
+    df["lead_time_days"] = lead.astype(int)
+    df["lead_time_demand"] = (df["weekly_forecast"] * lead_periods).round(1)
+    df["safety_stock"] = np.ceil(SERVICE_Z * df["sigma"] * np.sqrt(cover))
+    df["order_up_to"] = np.maximum(np.ceil(df["weekly_forecast"] * cover + df["safety_stock"]), reorder)
+    df["suggested_order"] = np.maximum(df["order_up_to"] - on_hand, 0).astype(int)
+    df["weekly_forecast"] = df["weekly_forecast"].round(2)
+    unit_cost = pd.to_numeric(df.get("unit_cost", pd.Series(index=df.index, dtype=float)), errors="coerce").fillna(0)
+    df["order_value"] = (df["suggested_order"] * unit_cost).round(2)
+    return df[SUGGESTION_COLUMNS].sort_values(["order_value", "suggested_order"], ascending=False, ignore_index=True)
+
+def suggested_order_total(df: pd.DataFrame) -> float:
+    return float(df["order_value"].sum()) if not df.empty else 0.0
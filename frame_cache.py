@@ -0,0 +1,174 @@
+# frame_cache.py
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+# listener(version, event, payload, frame); frame is the cached DataFrame itself and must not be modified
+Listener = Callable[[int, str, object, Optional[pd.DataFrame]], None]
+
+class FrameCache:
+    """
+    Process-wide store for the DataFrames returned by the view_* functions.
+
+    Reads are served from memory until the TTL expires; if the reload then
+    fails (backend down), the expired frame keeps being served. Writes do not
+    invalidate a frame; the mutation functions hand their affected rows to
+    upsert()/remove() and the cached frame is patched in place, so the next
+    render costs no extra SELECT. Concurrent misses on one key share a single
+    load (a page asking for a frame the prefetcher is loading waits for it).
+
+    Indexes derived from a frame subscribe() to it and receive every change
+    as an event: "load" (frame replaced), "upsert" (rows), "remove" (column,
+    values), "adjust" (column, delta, match_col, match_val), "clear",
+    "apply" (arbitrary fn, rebuild from the frame) and "invalidate".
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._frames: Dict[str, Tuple[pd.DataFrame, float]] = {}
+        self._sort: Dict[str, Tuple[str, bool]] = {}
+        self._versions: Dict[str, int] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+        self._listeners: Dict[str, List[Listener]] = {}
+
+    def _bump(self, key: str):
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def subscribe(self, key: str, listener: Listener):
+        with self._lock:
+            self._listeners.setdefault(key, []).append(listener)
+
+    def _notify(self, key: str, event: str, payload=None, frame: Optional[pd.DataFrame] = None):
+        # Called with the lock held, so listeners see changes in the order they were made
+        for listener in self._listeners.get(key, ()):
+            try:
+                listener(self._versions.get(key, 0), event, payload, frame)
+            except Exception:
+                log.exception("FrameCache listener failed on %s %s", key, event)
+
+    # ---------------- Reads ----------------
+    def get(self, key: str, loader: Callable[[], pd.DataFrame],
+            sort_by: Optional[str] = None, ascending: bool = True) -> pd.DataFrame:
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                return entry[0].copy()
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            with self._lock:
+                entry = self._frames.get(key)
+                if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                    return entry[0].copy()   # loaded by the thread we waited for
+            try:
+                df = loader()
+            except Exception:
+                if entry is None:
+                    raise
+                return entry[0].copy()   # stale but usable; the next read tries the backend again
+            with self._lock:
+                self._frames[key] = (df, time.monotonic())
+                self._bump(key)
+                if sort_by:
+                    self._sort[key] = (sort_by, ascending)
+                self._notify(key, "load", frame=df)
+        return df.copy()
+
+    def peek(self, key: str) -> Optional[pd.DataFrame]:
+        """Cached frame (even if expired) without triggering a load."""
+        with self._lock:
+            entry = self._frames.get(key)
+            return entry[0].copy() if entry is not None else None
+
+    def fresh(self, key: str) -> bool:
+        """True if the frame is cached and within its TTL (a get() would not load)."""
+        with self._lock:
+            entry = self._frames.get(key)
+            return entry is not None and time.monotonic() - entry[1] < self.ttl
+
+    def version(self, key: str) -> int:
+        """Counter bumped on every reload or delta, for caches derived from a frame."""
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    # ---------------- Deltas ----------------
+    def apply(self, key: str, fn: Callable[[pd.DataFrame], pd.DataFrame],
+              event: str = "apply", payload=None) -> bool:
+        """
+        Replace the cached frame with fn(frame). No-op if the frame is not cached.
+        Keeps the original load time so the TTL still bounds staleness
+        against writers outside this process. `event`/`payload` describe the
+        change to listeners (the delta helpers below pass their own).
+        """
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is None:
+                return False
+            df = fn(entry[0].copy())
+            sort = self._sort.get(key)
+            if sort and not df.empty and sort[0] in df.columns:
+                df = df.sort_values(sort[0], ascending=sort[1], kind="stable").reset_index(drop=True)
+            self._frames[key] = (df, entry[1])
+            self._bump(key)
+            self._notify(key, event, payload, df)
+            return True
+
+    def upsert(self, key: str, rows: Iterable[dict], id_col: str = "id") -> bool:
+        """Insert new rows and update existing ones (matched on id_col) with the given columns."""
+        rows = [r for r in (rows or []) if r.get(id_col) is not None]
+        if not rows:
+            return False
+
+        def patch(df: pd.DataFrame) -> pd.DataFrame:
+            new_rows: List[dict] = []
+            for row in rows:
+                mask = df[id_col] == row[id_col] if id_col in df.columns else None
+                if mask is not None and mask.any():
+                    for col, val in row.items():
+                        df.loc[mask, col] = val
+                else:
+                    new_rows.append(row)
+            if new_rows:
+                df = pd.concat([df, pd.DataFrame(new_rows)], ignore_index=True)
+            return df
+
+        return self.apply(key, patch, "upsert", rows)
+
+    def remove(self, key: str, values: Iterable, column: str = "id") -> bool:
+        values = list(values or [])
+        if not values:
+            return False
+        return self.apply(
+            key, lambda df: df[~df[column].isin(values)].reset_index(drop=True) if column in df.columns else df,
+            "remove", (column, values)
+        )
+
+    def adjust(self, key: str, column: str, delta: float, match_col: str, match_val) -> bool:
+        """Add delta to `column` on rows where match_col == match_val (e.g. stock decrement)."""
+        def patch(df: pd.DataFrame) -> pd.DataFrame:
+            if column in df.columns and match_col in df.columns:
+                mask = df[match_col] == match_val
+                df.loc[mask, column] = df.loc[mask, column] + delta
+            return df
+        return self.apply(key, patch, "adjust", (column, delta, match_col, match_val))
+
+    def clear(self, key: str) -> bool:
+        """Keep the columns, drop every row (delete-all operations)."""
+        return self.apply(key, lambda df: df.iloc[0:0], "clear")
+
+    def invalidate(self, key: Optional[str] = None):
+        with self._lock:
+            if key is None:
+                for k in self._frames:
+                    self._bump(k)
+                    self._notify(k, "invalidate")
+                self._frames.clear()
+            else:
+                self._frames.pop(key, None)
+                self._bump(key)
+                self._notify(key, "invalidate")
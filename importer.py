@@ -0,0 +1,436 @@
+# importer.py
+"""
+Non-interactive importer for supplier/customer feeds.
+
+    python importer.py items --file feed.csv --batch-size 500 --workers 4
+    python importer.py customers --file customers.xlsx --sheet Sheet1 --dry-run
+
+The file is read, cleaned and uploaded one chunk at a time, so memory stays
+bounded for large feeds. Batches are uploaded in parallel (bounded by
+--workers) with retry and jittered exponential backoff; customer inserts
+are not idempotent and are only retried when the request never reached the
+backend. Exit status is non-zero if any row failed,
+so cron can alert on it.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+# ---------------- Value cleaning ----------------
+def clean_currency_str(x: str) -> str:
+    if x is None:
+        return ""
+    s = str(x).strip()
+    if s == "" or s.lower() in ("nan", "none", "null"):
+        return ""
+    s = re.sub(r"[^\d,.\-]", "", s)
+    if "," in s and "." in s:
+        s = s.replace(",", "")
+    elif "," in s and "." not in s:
+        s = s.replace(",", ".")
+    return s
+
+def as_float_safe(v, default=0.0):
+    try:
+        if v is None or (isinstance(v, float) and (v != v)):
+            return float(default)
+        s = clean_currency_str(v)
+        if s == "":
+            return float(default)
+        f = float(s)
+        if f in (float("inf"), float("-inf")):
+            return float(default)
+        return float(f)
+    except Exception:
+        return float(default)
+
+def as_int_safe(v, default=0):
+    try:
+        f = as_float_safe(v, default=default)
+        return int(round(f))
+    except Exception:
+        return int(default)
+
+def as_str_safe(v, default=""):
+    if v is None:
+        return default
+    s = str(v).strip()
+    if s.lower() in ("nan", "none", "null"):
+        return default
+    return s
+
+# ---------------- Reading ----------------
+ITEM_COLUMNS = {"item": ("item", "item_id"), "quantity": ("quantity", "stock_quantity")}
+REQUIRED_COLUMNS = {
+    "items": ["item", "category", "quantity", "unit_cost", "selling_price"],
+    "customers": ["name", "phone", "email", "address"],
+}
+
+def read_frames(path: str, sheet: Optional[str] = None, chunk_rows: int = 50_000) -> Iterator[pd.DataFrame]:
+    """
+    Yield the file as DataFrames. CSVs are streamed in chunks so a large feed
+    is never fully in memory; Excel sheets are read in one go.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows, dtype=str, keep_default_na=False)
+    elif ext in (".xlsx", ".xls"):
+        engine = "openpyxl" if ext == ".xlsx" else "xlrd"
+        yield pd.read_excel(path, sheet_name=sheet or 0, engine=engine, dtype=str)
+    else:
+        raise ValueError("Unsupported file format. Please upload a CSV or Excel file.")
+
+def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.rename(columns=lambda c: str(c).strip())
+    for canonical, aliases in ITEM_COLUMNS.items():
+        if canonical not in df.columns:
+            for alias in aliases:
+                if alias in df.columns:
+                    df = df.rename(columns={alias: canonical})
+                    break
+    return df
+
+def missing_columns(kind: str, df: pd.DataFrame) -> List[str]:
+    return [c for c in REQUIRED_COLUMNS[kind] if c not in df.columns]
+
+# ---------------- Preparing ----------------
+def prepare_items(df: pd.DataFrame, row_offset: int = 0) -> Tuple[List[dict], List[tuple]]:
+    """Clean item rows. Returns (records, errors) where errors are (row # 1-based, reason)."""
+    df = _normalize_columns(df)
+    records, errors = [], []
+    has_unit = "unit" in df.columns
+    # Optional columns are only sent when the file has them, so re-imports keep existing settings
+    reorder_columns = {c: d for c, d in (("reorder_point", 1), ("lead_time_days", 7)) if c in df.columns}
+    for pos, row in enumerate(df.to_dict("records")):
+        item = as_str_safe(row.get("item", ""))
+        if not item:
+            errors.append((row_offset + pos + 1, "Missing item name"))
+            continue
+        unit = as_str_safe(row.get("unit", "")) if has_unit else ""
+        records.append({
+            "item": item,
+            "category": as_str_safe(row.get("category", "")),
+            "quantity": as_int_safe(row.get("quantity", 0)),
+            "unit_cost": as_float_safe(row.get("unit_cost", 0.0)),
+            "selling_price": as_float_safe(row.get("selling_price", 0.0)),
+            "unit": unit or None,
+            **{c: as_int_safe(row.get(c), default) for c, default in reorder_columns.items()},
+        })
+    return records, errors
+
+def prepare_customers(df: pd.DataFrame, row_offset: int = 0) -> Tuple[List[dict], List[tuple]]:
+    """Clean customer rows; names/emails/addresses are upper-cased like the Add Customer page."""
+    df = _normalize_columns(df)
+    records, errors = [], []
+    for pos, row in enumerate(df.to_dict("records")):
+        name = as_str_safe(row.get("name", "")).upper()
+        if not name:
+            errors.append((row_offset + pos + 1, "Missing customer name"))
+            continue
+        records.append({
+            "name": name,
+            "phone": as_str_safe(row.get("phone", "")),
+            "email": as_str_safe(row.get("email", "")).upper(),
+            "address": as_str_safe(row.get("address", "")).upper(),
+        })
+    return records, errors
+
+def dedupe_items(records: List[dict]) -> Tuple[List[dict], int]:
+    """
+    Keep the last row per (item, category). Postgres rejects an upsert batch
+    that touches the same conflict key twice.
+    """
+    by_key = {}
+    for r in records:
+        by_key[(r["item"], r["category"])] = r
+    return list(by_key.values()), len(records) - len(by_key)
+
+# ---------------- Uploading ----------------
+@dataclass
+class ImportStats:
+    rows_total: int = 0
+    rows_ok: int = 0
+    rows_failed: int = 0
+    rows_skipped: int = 0
+    batches: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+    failures: List[tuple] = field(default_factory=list)  # (batch #, rows, error)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows_ok / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.rows_ok}/{self.rows_total} rows ok, {self.rows_failed} failed, "
+                f"{self.rows_skipped} skipped, {self.batches} batches, {self.retries} retries, "
+                f"{self.elapsed:.2f}s ({self.rows_per_sec:,.0f} rows/s)")
+
+def _is_retryable(exc: Exception) -> bool:
+    # Constraint/data errors (SQLSTATE class 22/23) fail the same way every time
+    code = str(getattr(exc, "code", "") or "")
+    return not (len(code) == 5 and code[:2] in ("22", "23"))
+
+def _not_sent(exc: Exception) -> bool:
+    """The request never reached the backend (connect failure, open circuit)."""
+    import httpx
+    from transport import BackendUnavailable
+
+    return isinstance(exc, (BackendUnavailable, httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+def with_retry(fn: Callable, retries: int = 3, backoff: float = 0.5, on_retry: Callable = None,
+               retry_if: Callable[[Exception], bool] = _is_retryable):
+    """Call fn(), retrying failures accepted by retry_if with jittered exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= retries or not retry_if(e):
+                raise
+            if on_retry:
+                on_retry(e)
+            time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+def upload_batches(batches: Iterable[Optional[List[dict]]], send: Callable[[List[dict]], object],
+                   workers: int = 4, retries: int = 3, backoff: float = 0.5,
+                   on_progress: Callable[[ImportStats], None] = None,
+                   should_stop: Callable[[], bool] = None,
+                   retry_if: Callable[[Exception], bool] = _is_retryable) -> ImportStats:
+    """
+    Send batches on a thread pool with at most `workers` in flight. Batches
+    are pulled lazily from the iterable, so memory stays bounded for large feeds.
+    A None in `batches` waits for the batches in flight before going on, for
+    rows that must land after an earlier one. Only failures accepted by
+    retry_if are retried; pass _not_sent for writes that are not idempotent.
+    """
+    stats = ImportStats()
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def count_retry(_):
+        with lock:
+            stats.retries += 1
+
+    def run(n, batch):
+        try:
+            with_retry(lambda: send(batch), retries=retries, backoff=backoff, on_retry=count_retry,
+                       retry_if=retry_if)
+            return n, batch, None
+        except Exception as e:
+            return n, batch, e
+
+    def collect(done):
+        for fut in done:
+            n, batch, err = fut.result()
+            with lock:
+                stats.batches += 1
+                if err is None:
+                    stats.rows_ok += len(batch)
+                else:
+                    stats.rows_failed += len(batch)
+                    stats.failures.append((n, len(batch), str(err)))
+                stats.elapsed = time.perf_counter() - started
+            if on_progress:
+                on_progress(stats)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending, n = set(), 0
+        for batch in batches:
+            if should_stop and should_stop():
+                break
+            if batch is None:
+                done, pending = wait(pending)
+                collect(done)
+                continue
+            n += 1
+            stats.rows_total += len(batch)
+            pending.add(pool.submit(run, n, batch))
+            if len(pending) >= workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        done, _ = wait(pending)
+        collect(done)
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+def _chunks(records: List[dict], size: int) -> Iterator[List[dict]]:
+    for i in range(0, len(records), size):
+        yield records[i:i + size]
+
+# ---------------- Streaming ----------------
+@dataclass
+class _Tally:
+    """What the batch stream has seen so far; complete once it is exhausted."""
+    errors: List[tuple] = field(default_factory=list)
+    skipped: int = 0
+    duplicates: int = 0
+    existing: int = 0
+    likely: int = 0
+
+def _frames(kind: str, path: str, sheet: Optional[str], tally: _Tally) -> Iterator[List[dict]]:
+    """Prepared records per frame read from the file."""
+    prepare = prepare_items if kind == "items" else prepare_customers
+    offset = 0
+    for df in read_frames(path, sheet):
+        df = _normalize_columns(df)
+        missing = missing_columns(kind, df)
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}. Found: {list(df.columns)}")
+        records, errors = prepare(df, row_offset=offset)
+        tally.errors.extend(errors)
+        tally.skipped += len(errors)
+        offset += len(df)
+        yield records
+
+def _item_batches(frames: Iterator[List[dict]], batch_size: int, tally: _Tally) -> Iterator[Optional[List[dict]]]:
+    """
+    Item batches, one (item, category) at most per batch. A key repeated in a
+    later frame is sent after a barrier, so the last occurrence wins.
+    """
+    sent = set()
+    for records in frames:
+        records, dupes = dedupe_items(records)
+        tally.duplicates += dupes
+        keys = {(r["item"], r["category"]) for r in records}
+        repeats = len(keys & sent)
+        if repeats:
+            tally.duplicates += repeats
+            yield None
+        sent |= keys
+        yield from _chunks(records, batch_size)
+
+def _customer_batches(frames: Iterator[List[dict]], batch_size: int, tally: _Tally,
+                      skip_duplicates: bool) -> Iterator[List[dict]]:
+    """
+    Customer batches without names that already exist or repeat in the file;
+    with skip_duplicates, likely duplicates (dedupe.py) are dropped as well.
+    """
+    from db_supabase import existing_customers
+
+    existing = None
+    known = set()
+    earlier_ids = set()   # ids given to rows accepted from earlier frames, for match_incoming
+    for records in frames:
+        if existing is None and records:
+            existing = existing_customers()
+            known = set(existing["name"])
+        fresh = []
+        for r in records:
+            if r["name"] in known:
+                tally.existing += 1
+                continue
+            known.add(r["name"])
+            fresh.append(r)
+        if skip_duplicates and fresh:
+            from dedupe import match_incoming
+            likely = match_incoming(existing, fresh)
+            for idx, (other_id, other_name, score, reasons) in sorted(likely.items()):
+                target = (f"#{other_id} {other_name}" if other_id is not None and other_id not in earlier_ids
+                          else "an earlier row in this file")
+                tally.errors.append((None, f"Skipped {fresh[idx]['name']}: likely duplicate of {target} ({reasons})"))
+            fresh = [r for i, r in enumerate(fresh) if i not in likely]
+            tally.likely += len(likely)
+            # Later frames are matched against these rows too
+            base = int(existing["id"].max()) + 1 if len(existing) else 1
+            ids = list(range(base, base + len(fresh)))
+            earlier_ids.update(ids)
+            accepted = pd.DataFrame(fresh, columns=["name", "phone", "email"]).assign(id=ids)
+            existing = pd.concat([existing, accepted[["id", "name", "phone", "email"]]], ignore_index=True)
+        yield from _chunks(fresh, batch_size)
+
+# ---------------- Import entry point ----------------
+def import_file(kind: str, path: str, sheet: Optional[str] = None, batch_size: int = 500,
+                workers: int = 4, retries: int = 3, dry_run: bool = False,
+                on_progress: Callable[[ImportStats], None] = None,
+                should_stop: Callable[[], bool] = None,
+                skip_duplicates: bool = False) -> Tuple[ImportStats, List[tuple]]:
+    """
+    Import items or customers from a file. Returns (stats, row errors).
+    With dry_run the file is read and validated but nothing is written.
+    skip_duplicates also drops customers that look like an existing one
+    (same phone/email or near-identical name, see dedupe.py).
+    """
+    if kind not in REQUIRED_COLUMNS:
+        raise ValueError(f"Unknown import kind: {kind}")
+
+    # Rows are read, cleaned and sent one file chunk at a time
+    tally = _Tally()
+    frames = _frames(kind, path, sheet, tally)
+    if kind == "items":
+        batches = _item_batches(frames, batch_size, tally)
+    else:
+        batches = _customer_batches(frames, batch_size, tally, skip_duplicates)
+
+    if dry_run:
+        stats = ImportStats(rows_total=sum(len(b) for b in batches if b))
+    else:
+        from db_supabase import insert_customers, upsert_items
+        if kind == "items":
+            # Upserts are idempotent: any transient failure is retried
+            send, retry_if = (lambda b: upsert_items(b, batch_size=len(b))), _is_retryable
+        else:
+            # A timed-out insert may have been applied; retry only if it was never sent
+            send, retry_if = insert_customers, _not_sent
+        stats = upload_batches(batches, send, workers=workers, retries=retries,
+                               on_progress=on_progress, should_stop=should_stop, retry_if=retry_if)
+
+    errors = tally.errors
+    if tally.duplicates:
+        errors.append((None, f"{tally.duplicates} duplicate (item, category) rows collapsed to the last occurrence"))
+    if tally.existing:
+        errors.append((None, f"{tally.existing} customers already exist and were skipped"))
+    stats.rows_skipped = tally.skipped + tally.existing + tally.likely
+    return stats, errors
+
+# ---------------- CLI ----------------
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import items or customers from CSV/Excel.")
+    parser.add_argument("kind", choices=sorted(REQUIRED_COLUMNS))
+    parser.add_argument("--file", required=True, help="CSV, XLSX or XLS file")
+    parser.add_argument("--sheet", default=None, help="Excel sheet name (default: first sheet)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4, help="parallel batch uploads")
+    parser.add_argument("--retries", type=int, default=3, help="retries per batch on transient errors")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, write nothing")
+    parser.add_argument("--skip-duplicates", action="store_true",
+                        help="customers: skip rows that look like an existing customer")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+
+    def progress(s: ImportStats):
+        if not args.quiet:
+            print(f"\r{s.rows_ok + s.rows_failed}/{s.rows_total} rows, {s.rows_per_sec:,.0f} rows/s",
+                  end="", file=sys.stderr, flush=True)
+
+    try:
+        stats, errors = import_file(args.kind, args.file, sheet=args.sheet, batch_size=args.batch_size,
+                                    workers=args.workers, retries=args.retries, dry_run=args.dry_run,
+                                    on_progress=progress, skip_duplicates=args.skip_duplicates)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if not args.quiet:
+        print(file=sys.stderr)
+
+    for row, reason in errors:
+        print(f"row {row}: {reason}" if row else reason)
+    for n, rows, err in stats.failures:
+        print(f"batch {n} ({rows} rows) failed: {err}")
+    if args.dry_run:
+        print(f"dry run: {stats.rows_total} rows valid, {stats.rows_skipped} skipped")
+    else:
+        print(stats.summary())
+    return 1 if stats.rows_failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
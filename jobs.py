@@ -0,0 +1,283 @@
+# jobs.py
+"""
+Background jobs for long operations (imports, bulk deletes, SOA generation).
+
+Jobs run on a small worker pool inside the Streamlit server process, so a
+browser refresh or rerun does not lose them. State lives in a SQLite job
+table (jobs.db next to the app, override with ALPHACJ_JOBS_DB) that any
+session can poll; jobs still running when the process stopped are marked
+failed on the next start.
+"""
+import json
+import os
+import sqlite3
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import streamlit as st
+
+JOBS_DB_PATH = os.environ.get("ALPHACJ_JOBS_DB", "jobs.db")
+JOB_FILES_DIR = os.environ.get("ALPHACJ_JOB_FILES", "job_files")
+JOB_WORKERS = 2
+# Result files of finished jobs are deleted this many days after the job ended
+JOB_FILES_MAX_AGE_DAYS = float(os.environ.get("ALPHACJ_JOB_FILES_MAX_AGE_DAYS", 7))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+_HANDLERS: Dict[str, Callable] = {}
+
+def job(kind: str):
+    """Register fn(ctx, params) -> result dict as the handler for a job kind."""
+    def register(fn):
+        _HANDLERS[kind] = fn
+        return fn
+    return register
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+class JobCancelled(Exception):
+    pass
+
+# ---------------- Store ----------------
+class JobStore:
+    def __init__(self, path: str = JOBS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    params TEXT,
+                    progress REAL DEFAULT 0,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    submitted_by TEXT,
+                    cancel_requested INTEGER DEFAULT 0,
+                    created_at TEXT,
+                    started_at TEXT,
+                    finished_at TEXT
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at DESC)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _write(self, sql: str, args: tuple):
+        with self._lock, self._connect() as conn:
+            conn.execute(sql, args)
+
+    def create(self, job_id: str, kind: str, params: dict, user: str):
+        self._write(
+            "INSERT INTO jobs (id, kind, status, params, submitted_by, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, kind, QUEUED, json.dumps(params, default=str), user, _now()),
+        )
+
+    def update(self, job_id: str, **fields):
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        self._write(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def recent(self, limit: int = 50) -> List[dict]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._decode(r) for r in rows]
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def fail_interrupted(self):
+        self._write(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status IN (?, ?)",
+            (FAILED, "Interrupted by server restart", _now(), QUEUED, RUNNING),
+        )
+
+    def finished_before(self, cutoff: str) -> List[str]:
+        """Ids of jobs that finished before the ISO timestamp cutoff."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?, ?) AND finished_at < ?", (*FINISHED, cutoff),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    @staticmethod
+    def _decode(row) -> dict:
+        d = dict(row)
+        d["params"] = json.loads(d["params"]) if d.get("params") else {}
+        d["result"] = json.loads(d["result"]) if d.get("result") else None
+        return d
+
+# ---------------- Runner ----------------
+class JobContext:
+    """Handed to a job handler for progress reporting and cooperative cancellation."""
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+
+    def progress(self, fraction: float, message: str = ""):
+        self.store.update(self.job_id, progress=max(0.0, min(1.0, float(fraction))), message=message)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.store.cancel_requested(self.job_id)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def artifact_path(self, name: str) -> str:
+        os.makedirs(JOB_FILES_DIR, exist_ok=True)
+        return os.path.join(JOB_FILES_DIR, f"{self.job_id}_{name}")
+
+class JobRunner:
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS):
+        self.store = store
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.store.fail_interrupted()
+        self.prune_artifacts()
+
+    def prune_artifacts(self, max_age_days: float = JOB_FILES_MAX_AGE_DAYS) -> int:
+        """Delete the artifact_path files of jobs that finished more than max_age_days ago."""
+        if not os.path.isdir(JOB_FILES_DIR):
+            return 0
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).isoformat(timespec="seconds")
+        old = set(self.store.finished_before(cutoff))
+        removed = 0
+        for name in os.listdir(JOB_FILES_DIR):
+            if name.split("_", 1)[0] in old:
+                try:
+                    os.remove(os.path.join(JOB_FILES_DIR, name))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def submit(self, kind: str, params: dict, user: str = "") -> str:
+        if kind not in _HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex[:12]
+        self.store.create(job_id, kind, params, user)
+        self.pool.submit(self._run, job_id, kind, params)
+        return job_id
+
+    def cancel(self, job_id: str):
+        """Queued jobs never start; running jobs stop at their next cancellation check."""
+        self.store.update(job_id, cancel_requested=1)
+
+    def _run(self, job_id: str, kind: str, params: dict):
+        ctx = JobContext(self.store, job_id)
+        if ctx.cancelled:
+            self.store.update(job_id, status=CANCELLED, finished_at=_now())
+            return
+        self.store.update(job_id, status=RUNNING, started_at=_now())
+        try:
+            result = _HANDLERS[kind](ctx, params)
+            fields = {"status": CANCELLED if ctx.cancelled else SUCCEEDED,
+                      "result": json.dumps(result, default=str), "finished_at": _now()}
+            if fields["status"] == SUCCEEDED:
+                fields["progress"] = 1.0
+            self.store.update(job_id, **fields)
+        except JobCancelled:
+            self.store.update(job_id, status=CANCELLED, finished_at=_now())
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, error=f"{e}\n{traceback.format_exc(limit=3)}",
+                              finished_at=_now())
+
+@st.cache_resource
+def get_job_runner() -> JobRunner:
+    return JobRunner(JobStore())
+
+def save_upload(uploaded_file) -> str:
+    """Persist a Streamlit upload so a job can read it after the rerun that received it."""
+    os.makedirs(JOB_FILES_DIR, exist_ok=True)
+    ext = os.path.splitext(uploaded_file.name)[1].lower()
+    path = os.path.join(JOB_FILES_DIR, f"upload_{uuid.uuid4().hex[:12]}{ext}")
+    with open(path, "wb") as f:
+        f.write(uploaded_file.getbuffer())
+    return path
+
+# ---------------- Handlers ----------------
+def _import_handler(kind: str):
+    def run(ctx: JobContext, params: dict) -> dict:
+        from importer import import_file
+
+        path = params["path"]
+        try:
+            stats, errors = import_file(
+                kind, path, sheet=params.get("sheet"),
+                batch_size=int(params.get("batch_size", 500)),
+                workers=int(params.get("workers", 4)),
+                on_progress=lambda s: ctx.progress(
+                    (s.rows_ok + s.rows_failed) / s.rows_total if s.rows_total else 0,
+                    f"{s.rows_ok + s.rows_failed} rows, {s.rows_per_sec:,.0f} rows/s"),
+                should_stop=lambda: ctx.cancelled,
+                skip_duplicates=bool(params.get("skip_duplicates")),
+            )
+        finally:
+            if params.get("delete_file", True) and os.path.exists(path):
+                os.remove(path)
+        return {
+            "summary": stats.summary(),
+            "rows_ok": stats.rows_ok,
+            "rows_failed": stats.rows_failed,
+            "errors": [list(e) for e in errors[:200]],
+            "failures": [list(f) for f in stats.failures[:200]],
+        }
+    return run
+
+job("import_items")(_import_handler("items"))
+job("import_customers")(_import_handler("customers"))
+
+@job("delete_all_customers")
+def _delete_all_customers(ctx: JobContext, params: dict) -> dict:
+    from db_supabase import delete_all_customers
+
+    ctx.progress(0.0, "Deleting installations and customers")
+    result = delete_all_customers()
+    if result.startswith("Error"):
+        raise RuntimeError(result)
+    return {"summary": result}
+
+@job("soa")
+def _generate_soa(ctx: JobContext, params: dict) -> dict:
+    from db_supabase import view_sales_by_customer_and_date
+    from soa import build_soa_pdf, soa_filename
+
+    ctx.progress(0.1, "Fetching sales")
+    sales = view_sales_by_customer_and_date(params["customer_id"], params["start_date"], params["end_date"])
+    if sales.empty:
+        return {"summary": "No sales records found for this customer in the selected period."}
+    ctx.raise_if_cancelled()
+    ctx.progress(0.4, f"Rendering {len(sales)} rows")
+    pdf = build_soa_pdf(params["customer_name"], params["customer_id"],
+                        params["start_date"], params["end_date"], sales)
+    file_name = soa_filename(params["customer_name"], params["customer_id"])
+    path = ctx.artifact_path(file_name)
+    with open(path, "wb") as f:
+        f.write(pdf)
+    return {"summary": f"SOA generated ({len(sales)} transactions).", "file": path,
+            "file_name": file_name, "mime": "application/pdf"}
+
+@job("generate_employee_qr")
+def _generate_employee_qr(ctx: JobContext, params: dict) -> dict:
+    from attendance import generate_qr_codes
+
+    n = generate_qr_codes(force=bool(params.get("force")), on_progress=lambda f: ctx.progress(f, "Rendering badges"))
+    return {"summary": f"Generated {n} QR badge(s)."}
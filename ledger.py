@@ -0,0 +1,123 @@
+# ledger.py
+"""
+Point-in-time inventory from the stock movement ledger (migration 0004).
+
+Every quantity change lands in stock_movements via triggers, and
+stock_snapshots holds periodic per-item balances. A historical question
+is answered as nearest snapshot + the movements since it, so its cost
+depends on the snapshot interval, not on how long the history is.
+"""
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from db_supabase import _to_date_str, get_supabase, iter_rows
+
+SNAPSHOT_MAX_AGE = timedelta(days=1)
+# How often a process re-checks snapshot freshness
+SNAPSHOT_CHECK_INTERVAL = 3600
+
+_last_check = 0.0
+_check_lock = threading.Lock()
+
+def _ts(d, end_of_day: bool = False) -> str:
+    """ISO timestamp for a date/datetime; dates mean start (or end) of that day, UTC."""
+    if isinstance(d, datetime):
+        return d.isoformat()
+    if isinstance(d, date):
+        return datetime.combine(d, dtime.max if end_of_day else dtime.min, tzinfo=timezone.utc).isoformat()
+    return str(d)
+
+# ---------------- Snapshots ----------------
+def latest_snapshot_at() -> Optional[datetime]:
+    sb = get_supabase()
+    res = sb.table("stock_snapshots").select("taken_at").order("taken_at", desc=True).limit(1).execute()
+    return pd.to_datetime(res.data[0]["taken_at"], utc=True).to_pydatetime() if res.data else None
+
+def take_snapshots() -> int:
+    sb = get_supabase()
+    res = sb.rpc("take_stock_snapshots", {}).execute()
+    return int(res.data or 0)
+
+def ensure_recent_snapshot(max_age: timedelta = SNAPSHOT_MAX_AGE) -> bool:
+    """
+    Take a snapshot if the newest one is older than max_age. Cheap to call on
+    every render: the backend is consulted at most once per SNAPSHOT_CHECK_INTERVAL.
+    Deployments with pg_cron can schedule take_stock_snapshots() instead.
+    """
+    global _last_check
+    with _check_lock:
+        if time.monotonic() - _last_check < SNAPSHOT_CHECK_INTERVAL:
+            return False
+        _last_check = time.monotonic()
+    latest = latest_snapshot_at()
+    if latest is None or datetime.now(timezone.utc) - latest > max_age:
+        take_snapshots()
+        return True
+    return False
+
+# ---------------- Point-in-time ----------------
+def on_hand_at(item_id: int, at) -> Tuple[int, float]:
+    """(quantity, unit_cost) of one item at a moment in the past."""
+    sb = get_supabase()
+    res = sb.rpc("stock_on_hand_at", {"p_item_id": int(item_id), "p_at": _ts(at, end_of_day=True)}).execute()
+    row = (res.data or [{}])[0]
+    return int(row.get("quantity") or 0), float(row.get("unit_cost") or 0)
+
+def stock_value_at(at) -> pd.DataFrame:
+    """Per-item quantity and value for the whole catalog at a moment in the past."""
+    sb = get_supabase()
+    res = sb.rpc("stock_value_at", {"p_at": _ts(at, end_of_day=True)}).execute()
+    return pd.DataFrame(res.data or [], columns=["item_id", "quantity", "unit_cost", "value"])
+
+def view_movements(item_id: int, start, end) -> pd.DataFrame:
+    rows = iter_rows(
+        "stock_movements", "id, kind, quantity, unit_cost, ref_id, created_at", order="created_at",
+        filters=[("eq", "item_id", int(item_id)), ("gt", "created_at", _ts(start)),
+                 ("lte", "created_at", _ts(end, end_of_day=True))],
+    )
+    return pd.DataFrame(list(rows), columns=["id", "kind", "quantity", "unit_cost", "ref_id", "created_at"])
+
+def stock_level_series(item_id: int, start, end) -> pd.DataFrame:
+    """
+    Daily end-of-day quantity and value for one item between start and end:
+    the balance at start plus a cumulative sum over the movements in range.
+    """
+    base_qty, base_cost = on_hand_at(item_id, _ts(start))
+    moves = view_movements(item_id, start, end)
+    days = pd.date_range(_to_date_str(start), _to_date_str(end), freq="D")
+    if moves.empty:
+        qty = pd.Series(base_qty, index=days)
+        cost = pd.Series(base_cost, index=days)
+    else:
+        day = pd.to_datetime(moves["created_at"], utc=True).dt.tz_localize(None).dt.normalize()
+        qty = (moves.groupby(day)["quantity"].sum().cumsum() + base_qty).reindex(days).ffill().fillna(base_qty)
+        cost = moves.assign(day=day).dropna(subset=["unit_cost"]).groupby("day")["unit_cost"].last()
+        cost = cost.reindex(days).ffill().fillna(base_cost)
+    out = pd.DataFrame({"date": days, "quantity": qty.astype(int).values, "unit_cost": cost.astype(float).values})
+    out["value"] = out["quantity"] * out["unit_cost"]
+    return out
+
+# ---------------- Cost lots ----------------
+LOT_COLUMNS = ["id", "kind", "quantity", "qty_remaining", "unit_cost", "received_at"]
+
+def view_open_lots(item_id: int) -> pd.DataFrame:
+    """Lots of one item that still have stock, oldest (next to be consumed) first (migration 0008)."""
+    rows = iter_rows("stock_lots", ", ".join(LOT_COLUMNS), order="id",
+                     filters=[("eq", "item_id", int(item_id)), ("gt", "qty_remaining", 0)])
+    return pd.DataFrame(list(rows), columns=LOT_COLUMNS)
+
+def stock_lot_value() -> pd.DataFrame:
+    """Per-item remaining quantity and value at FIFO lot cost."""
+    sb = get_supabase()
+    res = sb.rpc("stock_lot_value", {}).execute()
+    return pd.DataFrame(res.data or [], columns=["item_id", "quantity", "value", "oldest_lot_at"])
+
+def stock_value_history(start, end) -> pd.DataFrame:
+    """Total stock value per snapshot day."""
+    sb = get_supabase()
+    res = sb.rpc("stock_value_history", {"p_start": _ts(start), "p_end": _ts(end, end_of_day=True)}).execute()
+    return pd.DataFrame(res.data or [], columns=["taken_on", "value"])
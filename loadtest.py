@@ -0,0 +1,620 @@
+# loadtest.py
+"""
+Concurrent-session load test for solar.py.
+
+Every simulated session is a Streamlit AppTest driven from its own thread
+through a staff workflow (login, Home, View Inventory paging, Record
+Installations, Customer SOA). The script runs against an in-memory
+stand-in for Supabase that sleeps for a configurable latency on every
+request, so each widget interaction costs what a full rerun costs in
+production: script time plus backend round trips. Caches (cache_resource,
+cache_data, FrameCache) are shared by all sessions as in one server process.
+
+    python loadtest.py --sessions 50 --iterations 3 --latency-ms 40
+    python loadtest.py --sessions 20 --json baseline.json
+    python loadtest.py --sessions 20 --compare baseline.json   # exit 1 on regression
+
+Reported per step and overall: p50/p95/p99 rerun latency, backend queries
+per interaction, errors, and traced Python memory per additional session.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solar.py")
+SESSION_KEY = "_loadtest_session"
+NAV_KEY = "_loadtest_nav"
+USERNAME, PASSWORD = "admin", "1234"
+
+# ---------------- Backend stand-in ----------------
+def _cmp_value(v):
+    return (0, v) if isinstance(v, (int, float)) and not isinstance(v, bool) else (1, str(v))
+
+_OPS = {
+    "eq": lambda a, b: a == b or (a is not None and str(a) == str(b)),
+    "neq": lambda a, b: not (a == b or (a is not None and str(a) == str(b))),
+    "gt": lambda a, b: a is not None and _cmp_value(a) > _cmp_value(b),
+    "gte": lambda a, b: a is not None and _cmp_value(a) >= _cmp_value(b),
+    "lt": lambda a, b: a is not None and _cmp_value(a) < _cmp_value(b),
+    "lte": lambda a, b: a is not None and _cmp_value(a) <= _cmp_value(b),
+    "in_": lambda a, b: a in b,
+    "is_": lambda a, b: a is None if b in (None, "null") else a == b,
+    "ilike": lambda a, b: a is not None and re.fullmatch(
+        re.escape(str(b)).replace("%", ".*").replace("_", "."), str(a), re.I) is not None,
+}
+
+class FakeQuery:
+    """The subset of the postgrest query builder used by the app, evaluated over in-memory rows."""
+
+    def __init__(self, backend: "FakeBackend", table: str):
+        self.backend, self.table = backend, table
+        self.columns, self.count = "*", None
+        self.filters, self.orders = [], []
+        self.bounds, self.one = None, False
+        self.write = None
+
+    def select(self, columns: str = "*", count: Optional[str] = None):
+        self.columns, self.count = columns, count
+        return self
+
+    def __getattr__(self, op):
+        if op not in _OPS:
+            raise AttributeError(op)
+
+        def add(column, value):
+            self.filters.append((op, column, value))
+            return self
+        return add
+
+    def order(self, column: str, desc: bool = False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n: int):
+        self.bounds = (0, n - 1)
+        return self
+
+    def range(self, start: int, end: int):
+        self.bounds = (start, end)
+        return self
+
+    def single(self):
+        self.one = True
+        return self
+
+    maybe_single = single
+
+    def insert(self, rows, **_):
+        self.write = ("insert", rows)
+        return self
+
+    def upsert(self, rows, on_conflict: Optional[str] = None, **_):
+        self.write = ("upsert", rows, on_conflict)
+        return self
+
+    def update(self, values: dict):
+        self.write = ("update", values)
+        return self
+
+    def delete(self):
+        self.write = ("delete",)
+        return self
+
+    def execute(self):
+        return self.backend.execute(self)
+
+class FakeRpc:
+    def __init__(self, backend: "FakeBackend", name: str, params: dict):
+        self.backend, self.name, self.params = backend, name, params or {}
+
+    def execute(self):
+        return self.backend.call(self.name, self.params)
+
+class FakeBackend:
+    """
+    In-memory tables behind a supabase-py shaped client. Every execute()
+    sleeps for the configured latency and is counted against the session
+    whose script issued it (background threads count as None).
+    """
+
+    def __init__(self, latency_ms: float = 30.0, jitter_ms: float = 10.0, seed: int = 0):
+        self.latency, self.jitter = latency_ms / 1000.0, jitter_ms / 1000.0
+        self.rng = random.Random(seed)
+        self.tables: Dict[str, List[dict]] = defaultdict(list)
+        self._lock = threading.RLock()
+        self._indexes: Dict[tuple, Dict[str, list]] = {}
+        self.queries: Dict[object, int] = defaultdict(int)
+        self.total_queries = 0
+
+    # ---------------- Client surface ----------------
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> FakeRpc:
+        return FakeRpc(self, name, params)
+
+    # ---------------- Accounting ----------------
+    def _round_trip(self):
+        session = None
+        try:
+            from streamlit.runtime.scriptrunner import get_script_run_ctx
+            ctx = get_script_run_ctx(suppress_warning=True)
+            if ctx is not None and SESSION_KEY in ctx.session_state:
+                session = ctx.session_state[SESSION_KEY]
+        except Exception:
+            pass
+        with self._lock:
+            self.queries[session] += 1
+            self.total_queries += 1
+        time.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter)))
+
+    def take_queries(self, session) -> int:
+        with self._lock:
+            return self.queries.pop(session, 0)
+
+    # ---------------- Tables ----------------
+    def _candidates(self, q: FakeQuery) -> List[dict]:
+        """Rows of the table, narrowed through a lazy hash index when the first filter is eq."""
+        rows = self.tables[q.table]
+        if q.filters and q.filters[0][0] == "eq":
+            _, col, val = q.filters[0]
+            key = (q.table, col)
+            if key not in self._indexes:
+                index = defaultdict(list)
+                for r in rows:
+                    index[str(r.get(col))].append(r)
+                self._indexes[key] = index
+            return self._indexes[key].get(str(val), [])
+        return rows
+
+    def _project(self, row: dict, columns: str) -> dict:
+        if columns.strip() == "*":
+            return dict(row)
+        out = {}
+        for col in (c.strip() for c in columns.split(",")):
+            m = re.fullmatch(r"(\w+)\((.*)\)", col)
+            if m:   # embedded resource: customers(name) via customer_id
+                rel, inner = m.groups()
+                target = self._candidates(SimpleNamespace(
+                    table=rel, filters=[("eq", "id", row.get(rel.rstrip("s") + "_id"))]))
+                out[rel] = {c.strip(): target[0].get(c.strip()) for c in inner.split(",")} if target else None
+            elif col:
+                out[col] = row.get(col)
+        return out
+
+    def execute(self, q: FakeQuery):
+        self._round_trip()
+        with self._lock:
+            if q.write:
+                return self._write(q)
+            rows = [r for r in self._candidates(q) if all(_OPS[op](r.get(c), v) for op, c, v in q.filters)]
+            for col, desc in reversed(q.orders):
+                rows.sort(key=lambda r: (r.get(col) is None, _cmp_value(r.get(col))), reverse=desc)
+            count = len(rows) if q.count else None
+            if q.bounds:
+                rows = rows[q.bounds[0]:q.bounds[1] + 1]
+            data = [self._project(r, q.columns) for r in rows]
+        if q.one:
+            if not data:
+                raise RuntimeError("PGRST116: no rows returned")
+            data = data[0]
+        return SimpleNamespace(data=data, count=count)
+
+    def _write(self, q: FakeQuery):
+        kind, table = q.write[0], self.tables[q.table]
+        self._indexes = {k: v for k, v in self._indexes.items() if k[0] != q.table}
+        if kind in ("insert", "upsert"):
+            rows = q.write[1] if isinstance(q.write[1], list) else [q.write[1]]
+            keys = [c.strip() for c in (q.write[2] or "").split(",")] if kind == "upsert" and q.write[2] else None
+            out = []
+            for r in rows:
+                hit = next((t for t in table if keys and all(t.get(k) == r.get(k) for k in keys)), None)
+                if hit is not None:
+                    hit.update(r)
+                    out.append(dict(hit))
+                else:
+                    new = dict(r, id=r.get("id") or self._next_id(q.table))
+                    table.append(new)
+                    out.append(dict(new))
+            return SimpleNamespace(data=out, count=None)
+        matched = [r for r in table if all(_OPS[op](r.get(c), v) for op, c, v in q.filters)]
+        if kind == "update":
+            for r in matched:
+                r.update(q.write[1])
+        else:
+            ids = {id(r) for r in matched}
+            self.tables[q.table] = [r for r in table if id(r) not in ids]
+        return SimpleNamespace(data=[dict(r) for r in matched], count=None)
+
+    def _next_id(self, table: str) -> int:
+        return max((r.get("id") or 0 for r in self.tables[table]), default=0) + 1
+
+    # ---------------- RPCs ----------------
+    def call(self, name: str, params: dict):
+        self._round_trip()
+        handler = getattr(self, f"_rpc_{name}", None)
+        with self._lock:
+            data = handler(params) if handler else []
+        return SimpleNamespace(data=data, count=None)
+
+    def _rpc_schema_index_report(self, params):
+        from migrate import expected_indexes
+        return [{"index_name": n} for n in sorted(expected_indexes("postgres"))]
+
+    def _low_stock(self):
+        rows = [r for r in self.tables["items"] if (r.get("quantity") or 0) < r.get("reorder_point", 1)]
+        return sorted(({**r, "shortfall": r.get("reorder_point", 1) - (r.get("quantity") or 0)} for r in rows),
+                      key=lambda r: -r["shortfall"])
+
+    def _rpc_low_stock_items(self, params):
+        return self._low_stock()[:params.get("p_limit") or None]
+
+    def _rpc_low_stock_summary(self, params):
+        rows = self._low_stock()
+        return [{"items_below": len(rows), "total_shortfall": sum(r["shortfall"] for r in rows),
+                 "reorder_value": sum(r["shortfall"] * (r.get("unit_cost") or 0) for r in rows)}]
+
+    def _timeseries(self, table: str, columns: List[str], params: dict):
+        from timeseries import bucket_start
+        buckets: Dict[date, dict] = {}
+        start, end = params.get("p_start"), params.get("p_end")
+        for r in self.tables[table]:
+            if (start and r["day"] < start) or (end and r["day"] > end):
+                continue
+            b = buckets.setdefault(bucket_start(date.fromisoformat(r["day"]), params["p_bucket"]),
+                                   dict.fromkeys(columns, 0))
+            for c in columns:
+                b[c] += r[c]
+        return [{"bucket": k.isoformat(), **v} for k, v in sorted(buckets.items())]
+
+    def _rpc_sales_timeseries(self, params):
+        return self._timeseries("sales_daily", ["total_sale", "cost", "profit", "sales_count"], params)
+
+    def _rpc_installations_timeseries(self, params):
+        return self._timeseries("installations_daily", ["quantity", "install_count"], params)
+
+    def _rpc_record_installation(self, params):
+        item = next((r for r in self.tables["items"] if r["id"] == params["p_item_id"]), None)
+        if item is None:
+            raise RuntimeError(f"Item {params['p_item_id']} not found")
+        if (item.get("quantity") or 0) < params["p_quantity"]:
+            raise RuntimeError("Not enough stock")
+        item["quantity"] -= params["p_quantity"]
+        row = {"id": self._next_id("installations"), "customer_id": params["p_customer_id"],
+               "item_id": item["id"], "quantity": params["p_quantity"], "installed_by": params["p_installed_by"],
+               "date": params.get("p_installed_date") or datetime.now(timezone.utc).isoformat()}
+        self.tables["installations"].append(row)
+        self._indexes = {k: v for k, v in self._indexes.items() if k[0] not in ("items", "installations")}
+        return [row]
+
+    # ---------------- Data ----------------
+    def seed(self, items: int = 2000, customers: int = 5000, sales: int = 20000, installations: int = 10000,
+             days: int = 730):
+        """Deterministic catalog, customers and history spread over the last `days` days."""
+        rng = random.Random(1)
+        today = date.today()
+        categories = ["Panel", "Inverter", "Battery", "Cable", "Mount", "Breaker", "Controller", "Connector"]
+        first = ["JUAN", "MARIA", "JOSE", "ANA", "PEDRO", "LUZ", "MARK", "GRACE", "PAOLO", "JOY"]
+        last = ["SANTOS", "REYES", "CRUZ", "BAUTISTA", "GARCIA", "MENDOZA", "TORRES", "FLORES", "RAMOS", "VILLANUEVA"]
+        t = self.tables
+        for i in range(1, items + 1):
+            cost = round(rng.uniform(5, 5000), 2)
+            t["items"].append({"id": i, "item": f"{rng.choice(categories)} {i:05d}", "category": rng.choice(categories),
+                               "quantity": rng.randint(0, 200), "unit_cost": cost,
+                               "selling_price": round(cost * 1.3, 2), "unit": "pcs", "barcode": f"48{i:011d}",
+                               "reorder_point": rng.randint(1, 10), "lead_time_days": rng.choice([7, 14, 30])})
+        for i in range(1, customers + 1):
+            t["customers"].append({"id": i, "name": f"{rng.choice(first)} {rng.choice(last)} {i}",
+                                   "phone": f"09{rng.randint(100000000, 999999999)}",
+                                   "email": f"customer{i}@example.com", "address": f"{i} Rizal St."})
+        sales_daily, installs_daily = defaultdict(lambda: [0.0, 0.0, 0.0, 0]), defaultdict(lambda: [0, 0])
+        for i in range(1, sales + 1):
+            item = t["items"][rng.randrange(items)]
+            qty = rng.randint(1, 5)
+            day = today - timedelta(days=rng.randrange(days))
+            total, cost = item["selling_price"] * qty, item["unit_cost"] * qty
+            t["sales"].append({"id": i, "item": item["item"], "quantity": qty, "selling_price": item["selling_price"],
+                               "total_sale": total, "cost": cost, "profit": total - cost,
+                               "date": f"{day.isoformat()}T10:00:00+00:00", "customer_id": rng.randint(1, customers)})
+            d = sales_daily[day]
+            d[0], d[1], d[2], d[3] = d[0] + total, d[1] + cost, d[2] + total - cost, d[3] + 1
+        for i in range(1, installations + 1):
+            qty = rng.randint(1, 10)
+            day = today - timedelta(days=rng.randrange(days))
+            t["installations"].append({"id": i, "customer_id": rng.randint(1, customers),
+                                       "item_id": rng.randint(1, items), "quantity": qty, "installed_by": "crew",
+                                       "date": f"{day.isoformat()}T09:00:00+00:00"})
+            installs_daily[day][0] += qty
+            installs_daily[day][1] += 1
+        t["sales_daily"] = [{"day": d.isoformat(), "total_sale": v[0], "cost": v[1], "profit": v[2], "sales_count": v[3]}
+                            for d, v in sorted(sales_daily.items())]
+        t["installations_daily"] = [{"day": d.isoformat(), "quantity": v[0], "install_count": v[1]}
+                                    for d, v in sorted(installs_daily.items())]
+        return self
+
+# ---------------- Harness ----------------
+def fake_option_menu(menu_title, options, icons=None, menu_icon=None, default_index=0, **kwargs):
+    """streamlit_option_menu stand-in: the session picks entries through st.session_state[NAV_KEY]."""
+    import streamlit as st
+    choice = st.session_state.get(NAV_KEY, {}).get(menu_title)
+    return choice if choice in options else options[default_index]
+
+def install(backend: FakeBackend):
+    """Route get_supabase() to the stand-in and replace the option menu component, process-wide."""
+    os.environ.setdefault("SUPABASE_URL", "http://loadtest.invalid")
+    os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "loadtest")
+    import streamlit_option_menu
+    import db_supabase
+    streamlit_option_menu.option_menu = fake_option_menu
+    db_supabase.create_client = lambda url, key, **kwargs: backend
+    db_supabase.get_supabase.clear()
+    db_supabase.get_frame_cache.clear()
+    _share_test_runtime()
+
+def _share_test_runtime():
+    """
+    Make AppTest behave like one server process. Each run installs a mock
+    Runtime singleton and clears it when done, which breaks runs still in
+    flight in other threads, so the last mock keeps being handed out. Each
+    run also compiles the script into a fresh ScriptCache; a server compiles
+    once, and concurrent compiles trip a CPython ast thread-safety bug, so
+    all runs share one cache. The appTest flag each run toggles stays set.
+    """
+    from streamlit import config
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    if getattr(Runtime, "_loadtest_shared", False):
+        return
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    last = {}
+    original = Runtime.instance.__func__
+
+    def instance(cls):
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+            return cls._instance
+        return last["runtime"] if last else original(cls)
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(last))
+    Runtime._loadtest_shared = True
+    config.set_option("global.appTest", True)
+
+class Session:
+    """One logged-in user clicking through the app; each interaction is one script rerun."""
+
+    def __init__(self, n: int, backend: FakeBackend, args, record: Callable):
+        from streamlit.testing.v1 import AppTest
+        self.n, self.backend, self.args, self.record = n, backend, args, record
+        self.rng = random.Random(n)
+        self.at = AppTest.from_file(SCRIPT, default_timeout=args.timeout)
+        self.at.session_state[SESSION_KEY] = n
+
+    def _widget(self, kind: str, label: str = None, key: str = None):
+        if key:
+            return getattr(self.at, kind)(key=key)
+        return next(w for w in getattr(self.at, kind) if w.label == label)
+
+    def _step(self, name: str, action: Callable):
+        self.backend.take_queries(self.n)
+        t0 = time.perf_counter()
+        error = None
+        try:
+            action()
+            if self.at.exception:
+                error = self.at.exception[0].message
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.record(name, time.perf_counter() - t0, self.backend.take_queries(self.n), error)
+        if self.args.think_ms:
+            time.sleep(self.rng.uniform(0, 2 * self.args.think_ms) / 1000.0)
+
+    def _navigate(self, main: str, sub: str):
+        self.at.session_state[NAV_KEY] = {"Main Menu": main, main: sub}
+        self.at.run()
+
+    # ---------------- Flows ----------------
+    def login(self):
+        self._step("login page", self.at.run)
+
+        def submit():
+            self._widget("text_input", "Username").input(USERNAME)
+            self._widget("text_input", "Password").input(PASSWORD)
+            self._widget("button", "Login").click().run()
+        self._step("login", submit)
+
+    def home(self):
+        self._step("home", lambda: self._navigate("Home", "Home"))
+
+    def view_inventory(self):
+        self._step("view inventory", lambda: self._navigate("Inventory", "View Inventory"))
+        for page in range(2, 2 + self.args.pages):
+            self._step("inventory page", lambda page=page: self._widget("number_input", "Page").set_value(page).run())
+
+    def record_installation(self):
+        self._step("record installations", lambda: self._navigate("Customer", "Record Installations"))
+        self._step("search customer", lambda: self._widget(
+            "text_input", key="install_customer_query").input(self.rng.choice(["juan", "maria", "cruz", "0917"])).run())
+        self._step("search item", lambda: self._widget(
+            "text_input", key="install_item_query").input(self.rng.choice(["panel", "inv", "cable", "48"])).run())
+
+        def submit():
+            self._widget("text_input", "Installed By: ").input(f"loadtest-{self.n}")
+            self._widget("button", "Record Installation").click().run()
+        self._step("save installation", submit)
+
+    def soa(self):
+        self._step("customer soa", lambda: self._navigate("Customer", "Customer Statement of Account"))
+        self._step("soa customer", lambda: self._widget(
+            "text_input", key="soa_customer_query").input(self.rng.choice(["santos", "reyes", "ana", "grace"])).run())
+        self._step("soa period", lambda: self._widget(
+            "date_input", "Start Date").set_value(date.today() - timedelta(days=365)).run())
+
+    def run(self):
+        self.login()
+        for _ in range(self.args.iterations):
+            self.home()
+            self.view_inventory()
+            self.record_installation()
+            self.soa()
+
+# ---------------- Report ----------------
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.steps: Dict[str, List[tuple]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, step: str, seconds: float, queries: int, error: Optional[str]):
+        with self._lock:
+            self.steps[step].append((seconds, queries))
+            if error:
+                self.errors[f"{step}: {error.splitlines()[0][:120]}"] += 1
+
+    def summary(self) -> dict:
+        def stats(samples):
+            lat = np.array([s for s, _ in samples]) * 1000
+            q = np.array([n for _, n in samples])
+            return {"n": len(samples), "p50_ms": round(float(np.percentile(lat, 50)), 1),
+                    "p95_ms": round(float(np.percentile(lat, 95)), 1),
+                    "p99_ms": round(float(np.percentile(lat, 99)), 1),
+                    "queries_mean": round(float(q.mean()), 2), "queries_max": int(q.max())}
+        every = [s for samples in self.steps.values() for s in samples]
+        return {"steps": {k: stats(v) for k, v in self.steps.items()},
+                "overall": stats(every) if every else {}, "errors": dict(self.errors)}
+
+def print_report(report: dict):
+    header = f"{'step':<22}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["steps"].items()) + [("overall", report["overall"])]
+    for name, s in rows:
+        print(f"{name:<22}{s['n']:>6}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}"
+              f"{s['queries_mean']:>10.2f}")
+    mem = report.get("memory")
+    if mem:
+        print(f"\nmemory: {mem['per_session_kb']:,.0f} KiB per session "
+              f"({mem['total_kb']:,.0f} KiB for {report['config']['memory_sessions']} sessions, "
+              f"peak {mem['peak_kb']:,.0f} KiB)")
+    print(f"throughput: {report['interactions_per_sec']:.1f} interactions/s over {report['wall_seconds']:.1f}s, "
+          f"{report['background_queries']} background queries")
+    for err, n in sorted(report["errors"].items(), key=lambda e: -e[1]):
+        print(f"error x{n}: {err}")
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Steps whose p95 latency or mean query count grew by more than `tolerance` over the baseline."""
+    regressions = []
+    for name, s in list(report["steps"].items()) + [("overall", report["overall"])]:
+        b = baseline["overall"] if name == "overall" else baseline["steps"].get(name)
+        if not b:
+            continue
+        if s["p95_ms"] > b["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {b['p95_ms']:.0f} -> {s['p95_ms']:.0f} ms")
+        if s["queries_mean"] > b["queries_mean"] * (1 + tolerance) + 0.5:
+            regressions.append(f"{name}: queries {b['queries_mean']:.1f} -> {s['queries_mean']:.1f}")
+    return regressions
+
+# ---------------- CLI ----------------
+def run(args) -> dict:
+    backend = FakeBackend(args.latency_ms, args.jitter_ms, seed=args.seed).seed(
+        items=args.items, customers=args.customers, sales=args.sales, installations=args.installations)
+    install(backend)
+    results = Results()
+    sessions = [Session(n, backend, args, results.record) for n in range(args.sessions)]
+
+    def drive(session: Session):
+        time.sleep(random.uniform(0, args.ramp_up))
+        session.run()
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        list(pool.map(drive, sessions))
+    wall = time.perf_counter() - t0
+
+    report = results.summary()
+    if args.memory:
+        report["memory"] = measure_memory(backend, args)
+    report["config"] = {k: v for k, v in vars(args).items() if k not in ("json", "compare")}
+    report["wall_seconds"] = round(wall, 2)
+    report["interactions_per_sec"] = round(report["overall"].get("n", 0) / wall, 2) if wall else 0.0
+    report["background_queries"] = backend.queries.get(None, 0)
+    del sessions
+    return report
+
+def measure_memory(backend: FakeBackend, args) -> dict:
+    """
+    Python heap retained per additional session, after one workflow round.
+    Measured on its own after the timed phase (caches already warm) because
+    tracemalloc slows every allocation down several times over.
+    """
+    count = max(1, args.memory_sessions)
+    discard = lambda *a: None
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    extra = []
+    for n in range(count):
+        session = Session(args.sessions + n, backend, SimpleNamespace(**{**vars(args), "iterations": 1}), discard)
+        session.run()
+        extra.append(session)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"total_kb": (current - base) / 1024, "peak_kb": (peak - base) / 1024,
+            "per_session_kb": (current - base) / 1024 / count}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated sessions through solar.py.")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent logged-in users")
+    parser.add_argument("--iterations", type=int, default=2, help="workflow rounds per session")
+    parser.add_argument("--pages", type=int, default=2, help="inventory pages flipped per round")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="backend round-trip latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="std deviation of the latency")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between interactions")
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="seconds over which sessions start")
+    parser.add_argument("--timeout", type=float, default=60.0, help="max seconds per rerun")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--sales", type=int, default=20000)
+    parser.add_argument("--installations", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory-sessions", type=int, default=5,
+                        help="extra sessions opened after the timed run to measure memory per session")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the memory measurement")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="baseline report; exit 1 if p95 or queries regressed")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression ratio (default 20%%)")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"regression: {r}")
+        if regressions:
+            return 1
+    return 1 if report["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# migrate.py
+"""
+Versioned SQL migrations for Supabase/Postgres and the bundled SQLite schema.
+
+    python migrate.py sqlite [--db inventory.db]      apply pending SQLite migrations
+    python migrate.py postgres --dsn <postgres-url>   apply pending Postgres migrations (needs psycopg)
+    python migrate.py check [--db inventory.db]       report missing indexes
+
+Files live in migrations/<dialect>/NNNN_name.sql and are applied in order.
+The expected index set is read from the files themselves, so a new
+migration is picked up by the startup check without touching this module.
+"""
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import sys
+from typing import List, Optional, Set, Tuple
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+SQLITE_DB_PATH = os.environ.get("ALPHACJ_SQLITE_DB", "inventory.db")
+
+_INDEX_RE = re.compile(r"create\s+(?:unique\s+)?index\s+if\s+not\s+exists\s+(\w+)", re.IGNORECASE)
+
+def migration_files(dialect: str) -> List[Tuple[str, str]]:
+    """[(version, path)] sorted by version, e.g. ("0001", ".../0001_query_indexes.sql")."""
+    paths = sorted(glob.glob(os.path.join(MIGRATIONS_DIR, dialect, "*.sql")))
+    return [(os.path.basename(p).split("_", 1)[0], p) for p in paths]
+
+def expected_indexes(dialect: str) -> Set[str]:
+    names = set()
+    for _, path in migration_files(dialect):
+        with open(path, encoding="utf-8") as f:
+            names.update(n.lower() for n in _INDEX_RE.findall(f.read()))
+    return names
+
+# ---------------- SQLite ----------------
+def apply_sqlite(db_path: str = SQLITE_DB_PATH) -> List[str]:
+    """Apply pending migrations to a SQLite file. Returns the versions applied."""
+    applied = []
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS schema_migrations (version TEXT PRIMARY KEY, applied_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+        done = {r[0] for r in conn.execute("SELECT version FROM schema_migrations")}
+        for version, path in migration_files("sqlite"):
+            if version in done:
+                continue
+            with open(path, encoding="utf-8") as f:
+                sql = f.read()
+            # executescript commits first, so wrap the file in its own transaction
+            conn.executescript(f"BEGIN;\n{sql}\nINSERT INTO schema_migrations (version) VALUES ('{version}');\nCOMMIT;")
+            applied.append(version)
+    finally:
+        conn.close()
+    return applied
+
+def pending_sqlite(db_path: str = SQLITE_DB_PATH) -> List[str]:
+    """Versions not yet applied to the SQLite file (read-only; never creates or changes anything)."""
+    versions = [v for v, _ in migration_files("sqlite")]
+    if not os.path.exists(db_path):
+        return versions
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'").fetchone():
+            return versions
+        done = {r[0] for r in conn.execute("SELECT version FROM schema_migrations")}
+    finally:
+        conn.close()
+    return [v for v in versions if v not in done]
+
+def check_sqlite(db_path: str = SQLITE_DB_PATH) -> Set[str]:
+    """Expected index names missing from the SQLite file."""
+    conn = sqlite3.connect(db_path)
+    try:
+        present = {r[0].lower() for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    finally:
+        conn.close()
+    return expected_indexes("sqlite") - present
+
+# ---------------- Postgres ----------------
+def apply_postgres(dsn: str) -> List[str]:
+    try:
+        import psycopg
+    except ImportError:
+        raise SystemExit("psycopg is required: pip install 'psycopg[binary]' "
+                         "(or paste migrations/postgres/*.sql into the Supabase SQL editor)")
+    applied = []
+    with psycopg.connect(dsn, autocommit=False) as conn:
+        conn.execute("create table if not exists schema_migrations (version text primary key, applied_at timestamptz not null default now())")
+        conn.commit()
+        done = {r[0] for r in conn.execute("select version from schema_migrations")}
+        for version, path in migration_files("postgres"):
+            if version in done:
+                continue
+            with open(path, encoding="utf-8") as f:
+                conn.execute(f.read())
+            conn.execute("insert into schema_migrations (version) values (%s) on conflict do nothing", (version,))
+            conn.commit()
+            applied.append(version)
+    return applied
+
+def check_postgres_indexes(sb) -> Set[str]:
+    """
+    Expected index names missing in Supabase, via the schema_index_report()
+    RPC installed by migration 0001. If the RPC itself is missing, nothing
+    has been applied and every expected index is reported.
+    """
+    expected = expected_indexes("postgres")
+    try:
+        res = sb.rpc("schema_index_report", {}).execute()
+    except Exception as e:
+        if "schema_index_report" in str(e) or "PGRST202" in str(e):
+            return expected
+        raise
+    present = {r["index_name"].lower() for r in res.data or []}
+    return expected - present
+
+# ---------------- CLI ----------------
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply or check schema migrations.")
+    parser.add_argument("command", choices=["sqlite", "postgres", "check"])
+    parser.add_argument("--db", default=SQLITE_DB_PATH, help="SQLite file (default: %(default)s)")
+    parser.add_argument("--dsn", default=os.environ.get("SUPABASE_DB_URL"), help="Postgres connection string")
+    args = parser.parse_args(argv)
+
+    if args.command == "sqlite":
+        applied = apply_sqlite(args.db)
+        print(f"Applied: {', '.join(applied)}" if applied else "SQLite schema is up to date.")
+    elif args.command == "postgres":
+        if not args.dsn:
+            parser.error("--dsn (or SUPABASE_DB_URL) is required")
+        applied = apply_postgres(args.dsn)
+        print(f"Applied: {', '.join(applied)}" if applied else "Postgres schema is up to date.")
+    else:
+        missing = check_sqlite(args.db)
+        print(f"SQLite missing indexes: {sorted(missing)}" if missing else "SQLite indexes OK.")
+        return 1 if missing else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
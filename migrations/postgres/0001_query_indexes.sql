@@ -0,0 +1,44 @@
+-- 0001_query_indexes.sql
+-- Indexes and constraints matching the app's query patterns (db_supabase.py).
+-- Run in the Supabase SQL editor or via: python migrate.py postgres --dsn <postgres-url>
+
+create table if not exists schema_migrations (
+    version    text primary key,
+    applied_at timestamptz not null default now()
+);
+
+-- upsert(..., on_conflict="item,category") needs a unique index on exactly these columns.
+-- Also serves view_items() ORDER BY item (leading column).
+create unique index if not exists items_item_category_key on items (item, category);
+
+-- view_sales_by_customer_and_date / view_sales_by_customers:
+--   WHERE customer_id = ? AND date BETWEEN ? AND ? ORDER BY date DESC
+create index if not exists idx_sales_customer_date on sales (customer_id, date desc);
+-- view_sales(): ORDER BY date DESC
+create index if not exists idx_sales_date on sales (date desc);
+
+-- view_installations(): ORDER BY date DESC; per-customer filters
+create index if not exists idx_installations_date on installations (date desc);
+create index if not exists idx_installations_customer_date on installations (customer_id, date desc);
+-- FK lookups when items are deleted / joined
+create index if not exists idx_installations_item_id on installations (item_id);
+
+-- view_audit_log(): WHERE timestamp BETWEEN ? AND ? ORDER BY timestamp DESC
+create index if not exists idx_audit_log_timestamp on audit_log ("timestamp" desc);
+
+-- add_customer(): WHERE name = ? LIMIT 1; view_customers(): ORDER BY name
+create index if not exists idx_customers_name on customers (name);
+
+-- Used by the startup check (migrate.check_postgres_indexes) through PostgREST,
+-- which cannot read pg_catalog directly.
+create or replace function schema_index_report()
+returns table (table_name text, index_name text)
+language sql stable security definer
+set search_path = public
+as $$
+    select tablename::text, indexname::text
+    from pg_indexes
+    where schemaname = 'public';
+$$;
+
+insert into schema_migrations (version) values ('0001') on conflict do nothing;
@@ -0,0 +1,8 @@
+-- 0002_item_barcodes.sql
+-- Optional printed barcode/QR payload per item, used by the stock scanner (scanner.py).
+-- Labels may also encode the item id ("123" or "ITEM-123"), so the column can stay empty.
+
+alter table items add column if not exists barcode text;
+create unique index if not exists idx_items_barcode on items (barcode) where barcode is not null;
+
+insert into schema_migrations (version) values ('0002') on conflict do nothing;
@@ -0,0 +1,25 @@
+-- 0003_attendance.sql
+-- Employees/attendance tables matching the bundled SQLite schema, for deployments
+-- that move attendance to Supabase. Check-ins upsert through unique (employee_id, date).
+
+create table if not exists employees (
+    employee_id    bigserial primary key,
+    name           text not null,
+    department     text,
+    qr_code_path   text,
+    qr_code_base64 text,
+    qr_code_url    text
+);
+
+create table if not exists attendance (
+    attendance_id  bigserial primary key,
+    employee_id    bigint not null references employees (employee_id),
+    date           date not null,
+    check_in_time  timestamptz not null,
+    check_out_time timestamptz,
+    unique (employee_id, date)
+);
+
+create index if not exists idx_attendance_date on attendance (date);
+
+insert into schema_migrations (version) values ('0003') on conflict do nothing;
@@ -0,0 +1,210 @@
+-- 0004_stock_ledger.sql
+-- Stock movement ledger + periodic per-item snapshots for point-in-time inventory (ledger.py).
+--
+-- Every change to items.quantity is captured by a trigger, so RPCs, bulk upserts and
+-- SQL-editor edits all land in the ledger. Sales/installations inserts label the
+-- movement made in the same transaction ('sale' / 'installation' + ref_id), whichever
+-- order the RPC performs the two writes in.
+
+create table if not exists stock_movements (
+    id         bigserial primary key,
+    item_id    bigint not null,
+    item       text,
+    category   text,
+    kind       text not null,      -- opening | receipt | issue | sale | installation | delete
+    quantity   integer not null,   -- signed delta
+    unit_cost  numeric,
+    ref_id     bigint,             -- sales.id / installations.id
+    txid       bigint not null default txid_current(),
+    created_at timestamptz not null default now()
+);
+create index if not exists idx_stock_movements_item_time on stock_movements (item_id, created_at);
+create index if not exists idx_stock_movements_time on stock_movements (created_at);
+
+create table if not exists stock_snapshots (
+    item_id   bigint not null,
+    taken_at  timestamptz not null,
+    quantity  integer not null,
+    unit_cost numeric,
+    primary key (item_id, taken_at)
+);
+create index if not exists idx_stock_snapshots_taken_at on stock_snapshots (taken_at);
+
+-- ---------------- Capture ----------------
+create or replace function trg_items_stock_movement()
+returns trigger language plpgsql as $$
+declare
+    v_kind  text   := nullif(current_setting('app.movement_kind', true), '');
+    v_ref   bigint := nullif(current_setting('app.movement_ref', true), '')::bigint;
+    v_delta integer;
+begin
+    if tg_op = 'DELETE' then
+        if coalesce(old.quantity, 0) <> 0 then
+            insert into stock_movements (item_id, item, category, kind, quantity, unit_cost)
+            values (old.id, old.item, old.category, 'delete', -old.quantity, old.unit_cost);
+        end if;
+        return old;
+    end if;
+
+    v_delta := coalesce(new.quantity, 0) - (case when tg_op = 'UPDATE' then coalesce(old.quantity, 0) else 0 end);
+    if v_delta <> 0 then
+        insert into stock_movements (item_id, item, category, kind, quantity, unit_cost, ref_id)
+        values (new.id, new.item, new.category,
+                case when v_delta < 0 and v_kind is not null then v_kind
+                     when v_delta < 0 then 'issue' else 'receipt' end,
+                v_delta, new.unit_cost, case when v_delta < 0 then v_ref end);
+        if v_delta < 0 and v_kind is not null then
+            perform set_config('app.movement_kind', '', true);
+            perform set_config('app.movement_ref', '', true);
+        end if;
+    end if;
+    return new;
+end $$;
+
+drop trigger if exists items_stock_movement on items;
+create trigger items_stock_movement
+    after insert or update of quantity or delete on items
+    for each row execute function trg_items_stock_movement();
+
+-- Label the stock decrement of the same transaction, or leave a hint for it if it comes later.
+create or replace function label_stock_movement(p_kind text, p_item_id bigint, p_ref bigint)
+returns void language plpgsql as $$
+begin
+    update stock_movements
+       set kind = p_kind, ref_id = p_ref
+     where id = (select id from stock_movements
+                  where item_id = p_item_id and txid = txid_current() and kind = 'issue'
+                  order by id desc limit 1);
+    if not found then
+        perform set_config('app.movement_kind', p_kind, true);
+        perform set_config('app.movement_ref', p_ref::text, true);
+    end if;
+end $$;
+
+create or replace function trg_sales_stock_movement()
+returns trigger language plpgsql as $$
+begin
+    perform label_stock_movement('sale', (select id from items where item = new.item order by id limit 1), new.id);
+    return new;
+end $$;
+
+drop trigger if exists sales_stock_movement on sales;
+create trigger sales_stock_movement after insert on sales
+    for each row execute function trg_sales_stock_movement();
+
+create or replace function trg_installations_stock_movement()
+returns trigger language plpgsql as $$
+begin
+    perform label_stock_movement('installation', new.item_id, new.id);
+    return new;
+end $$;
+
+drop trigger if exists installations_stock_movement on installations;
+create trigger installations_stock_movement after insert on installations
+    for each row execute function trg_installations_stock_movement();
+
+-- ---------------- Snapshots ----------------
+-- Called daily (pg_cron: select cron.schedule('stock-snapshots', '5 0 * * *', 'select take_stock_snapshots()'))
+-- or by ledger.ensure_recent_snapshot() when the Reports page is opened.
+create or replace function take_stock_snapshots()
+returns integer language sql as $$
+    with ins as (
+        insert into stock_snapshots (item_id, taken_at, quantity, unit_cost)
+        select id, now(), coalesce(quantity, 0), unit_cost from items
+        on conflict do nothing
+        returning 1
+    )
+    select count(*)::integer from ins;
+$$;
+
+-- ---------------- Point-in-time ----------------
+-- Nearest snapshot at or before p_at, plus the movements between it and p_at.
+create or replace function stock_on_hand_at(p_item_id bigint, p_at timestamptz)
+returns table (quantity integer, unit_cost numeric) language sql stable as $$
+    with snap as (
+        select s.taken_at, s.quantity, s.unit_cost
+        from stock_snapshots s
+        where s.item_id = p_item_id and s.taken_at <= p_at
+        order by s.taken_at desc
+        limit 1
+    ), delta as (
+        select coalesce(sum(m.quantity), 0) as qty
+        from stock_movements m
+        where m.item_id = p_item_id
+          and m.created_at > coalesce((select taken_at from snap), '-infinity')
+          and m.created_at <= p_at
+    ), last_cost as (
+        select m.unit_cost from stock_movements m
+        where m.item_id = p_item_id and m.created_at <= p_at and m.unit_cost is not null
+        order by m.created_at desc limit 1
+    )
+    select (coalesce((select quantity from snap), 0) + (select qty from delta))::integer,
+           coalesce((select unit_cost from last_cost), (select unit_cost from snap));
+$$;
+
+-- Whole-catalog quantity and value at p_at, computed per item exactly like stock_on_hand_at:
+-- each item reads its latest snapshot at or before p_at and only the movements between the
+-- two (idx_stock_movements_item_time), so the cost does not grow with the ledger's history.
+-- Items are the current catalog, the last snapshot batch (items deleted since) and any item
+-- that moved after that batch; the cost falls back from the item's last movement to its snapshot.
+create or replace function stock_value_at(p_at timestamptz)
+returns table (item_id bigint, quantity integer, unit_cost numeric, value numeric) language sql stable as $$
+    with batch as (
+        select max(s.taken_at) as taken_at from stock_snapshots s where s.taken_at <= p_at
+    ), ids as (
+        select i.id as item_id from items i
+        union
+        select s.item_id from stock_snapshots s join batch on s.taken_at = batch.taken_at
+        union
+        select m.item_id from stock_movements m, batch
+        where m.created_at > coalesce(batch.taken_at, '-infinity') and m.created_at <= p_at
+    )
+    select ids.item_id, h.quantity, h.unit_cost, h.quantity * coalesce(h.unit_cost, 0)
+    from ids
+    left join lateral (
+        select s.taken_at, s.quantity, s.unit_cost
+        from stock_snapshots s
+        where s.item_id = ids.item_id and s.taken_at <= p_at
+        order by s.taken_at desc
+        limit 1
+    ) snap on true
+    cross join lateral (
+        select count(*) as moves, coalesce(sum(m.quantity), 0) as qty
+        from stock_movements m
+        where m.item_id = ids.item_id
+          and m.created_at > coalesce(snap.taken_at, '-infinity')
+          and m.created_at <= p_at
+    ) delta
+    cross join lateral (
+        select (coalesce(snap.quantity, 0) + delta.qty)::integer as quantity,
+               coalesce((select m.unit_cost from stock_movements m
+                         where m.item_id = ids.item_id and m.created_at <= p_at and m.unit_cost is not null
+                         order by m.created_at desc limit 1), snap.unit_cost) as unit_cost
+    ) h
+    where snap.taken_at is not null or delta.moves > 0;
+$$;
+
+-- Total stock value per snapshot day, for the Reports chart.
+create or replace function stock_value_history(p_start timestamptz, p_end timestamptz)
+returns table (taken_on date, value numeric) language sql stable as $$
+    -- Several snapshots can land on one day (manual + scheduled); only the last per item counts
+    select taken_on, sum(quantity * coalesce(unit_cost, 0))
+    from (
+        select distinct on (item_id, taken_at::date) taken_at::date as taken_on, quantity, unit_cost
+        from stock_snapshots
+        where taken_at between p_start and p_end
+        order by item_id, taken_at::date, taken_at desc
+    ) latest
+    group by 1 order by 1;
+$$;
+
+-- ---------------- Seed ----------------
+-- Opening balance per item so the ledger replays to today's quantities, plus a first snapshot.
+insert into stock_movements (item_id, item, category, kind, quantity, unit_cost)
+select id, item, category, 'opening', quantity, unit_cost
+from items
+where coalesce(quantity, 0) <> 0
+  and not exists (select 1 from stock_movements);
+select take_stock_snapshots();
+
+insert into schema_migrations (version) values ('0004') on conflict do nothing;
@@ -0,0 +1,141 @@
+-- 0005_daily_rollups.sql
+-- Per-day rollups of sales and installations for dashboard charts (timeseries.py).
+--
+-- Triggers keep one row per calendar day up to date, so a chart reads at most one
+-- row per day in range and re-buckets to week/month on the server instead of
+-- shipping every sale to the browser.
+
+create table if not exists sales_daily (
+    day         date primary key,
+    total_sale  numeric not null default 0,
+    cost        numeric not null default 0,
+    profit      numeric not null default 0,
+    sales_count integer not null default 0
+);
+
+create table if not exists installations_daily (
+    day           date primary key,
+    quantity      bigint not null default 0,
+    install_count integer not null default 0
+);
+
+create or replace function bump_sales_daily(p_day date, p_sign integer, p_total numeric, p_cost numeric, p_profit numeric)
+returns void language sql as $$
+    insert into sales_daily as d (day, total_sale, cost, profit, sales_count)
+    values (p_day, p_sign * coalesce(p_total, 0), p_sign * coalesce(p_cost, 0), p_sign * coalesce(p_profit, 0), p_sign)
+    on conflict (day) do update set
+        total_sale  = d.total_sale + excluded.total_sale,
+        cost        = d.cost + excluded.cost,
+        profit      = d.profit + excluded.profit,
+        sales_count = d.sales_count + excluded.sales_count;
+$$;
+
+create or replace function sales_daily_trigger()
+returns trigger language plpgsql as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform bump_sales_daily(coalesce(old.date, now())::date, -1, old.total_sale, old.cost, old.profit);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform bump_sales_daily(coalesce(new.date, now())::date, 1, new.total_sale, new.cost, new.profit);
+    end if;
+    return null;
+end $$;
+
+drop trigger if exists trg_sales_daily on sales;
+create trigger trg_sales_daily
+    after insert or delete or update of date, total_sale, cost, profit on sales
+    for each row execute function sales_daily_trigger();
+
+create or replace function bump_installations_daily(p_day date, p_sign integer, p_quantity integer)
+returns void language sql as $$
+    insert into installations_daily as d (day, quantity, install_count)
+    values (p_day, p_sign * coalesce(p_quantity, 0), p_sign)
+    on conflict (day) do update set
+        quantity      = d.quantity + excluded.quantity,
+        install_count = d.install_count + excluded.install_count;
+$$;
+
+create or replace function installations_daily_trigger()
+returns trigger language plpgsql as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform bump_installations_daily(coalesce(old.date, now())::date, -1, old.quantity);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform bump_installations_daily(coalesce(new.date, now())::date, 1, new.quantity);
+    end if;
+    return null;
+end $$;
+
+drop trigger if exists trg_installations_daily on installations;
+create trigger trg_installations_daily
+    after insert or delete or update of date, quantity on installations
+    for each row execute function installations_daily_trigger();
+
+-- TRUNCATE skips row triggers; clear the matching rollup with it.
+create or replace function reset_daily_rollups()
+returns trigger language plpgsql as $$
+begin
+    if tg_table_name = 'sales' then
+        delete from sales_daily;
+    else
+        delete from installations_daily;
+    end if;
+    return null;
+end $$;
+
+drop trigger if exists trg_sales_daily_truncate on sales;
+create trigger trg_sales_daily_truncate after truncate on sales
+    for each statement execute function reset_daily_rollups();
+drop trigger if exists trg_installations_daily_truncate on installations;
+create trigger trg_installations_daily_truncate after truncate on installations
+    for each statement execute function reset_daily_rollups();
+
+-- Chart reads: re-bucket the daily rows to day/week/month/quarter/year.
+create or replace function sales_timeseries(p_bucket text default 'day', p_start date default null, p_end date default null)
+returns table (bucket date, total_sale numeric, cost numeric, profit numeric, sales_count bigint)
+language plpgsql stable as $$
+begin
+    if p_bucket not in ('day', 'week', 'month', 'quarter', 'year') then
+        raise exception 'Unsupported bucket: %', p_bucket;
+    end if;
+    return query
+    select date_trunc(p_bucket, d.day)::date, sum(d.total_sale), sum(d.cost), sum(d.profit), sum(d.sales_count)::bigint
+    from sales_daily d
+    where (p_start is null or d.day >= p_start) and (p_end is null or d.day <= p_end)
+    group by 1
+    having sum(d.sales_count) <> 0
+    order by 1;
+end $$;
+
+create or replace function installations_timeseries(p_bucket text default 'day', p_start date default null, p_end date default null)
+returns table (bucket date, quantity bigint, install_count bigint)
+language plpgsql stable as $$
+begin
+    if p_bucket not in ('day', 'week', 'month', 'quarter', 'year') then
+        raise exception 'Unsupported bucket: %', p_bucket;
+    end if;
+    return query
+    select date_trunc(p_bucket, d.day)::date, sum(d.quantity)::bigint, sum(d.install_count)::bigint
+    from installations_daily d
+    where (p_start is null or d.day >= p_start) and (p_end is null or d.day <= p_end)
+    group by 1
+    having sum(d.install_count) <> 0
+    order by 1;
+end $$;
+
+-- Seed from existing rows (first run only).
+insert into sales_daily (day, total_sale, cost, profit, sales_count)
+select coalesce(date, now())::date, coalesce(sum(total_sale), 0), coalesce(sum(cost), 0), coalesce(sum(profit), 0), count(*)
+from sales
+where not exists (select 1 from sales_daily)
+group by 1;
+
+insert into installations_daily (day, quantity, install_count)
+select coalesce(date, now())::date, coalesce(sum(quantity), 0), count(*)
+from installations
+where not exists (select 1 from installations_daily)
+group by 1;
+
+insert into schema_migrations (version) values ('0005') on conflict do nothing;
@@ -0,0 +1,62 @@
+-- 0006_merge_customers.sql
+-- Merge duplicate customers found by dedupe.py: sales and installations are repointed
+-- to the kept record, blank contact fields are filled from the duplicates, and the
+-- duplicates are deleted, all in one transaction. customer_merges keeps the trail.
+
+create table if not exists customer_merges (
+    id             bigserial primary key,
+    keep_id        bigint not null,
+    duplicate_id   bigint not null,
+    duplicate_name text,
+    phone          text,
+    email          text,
+    address        text,
+    merged_by      text,
+    merged_at      timestamptz not null default now()
+);
+create index if not exists idx_customer_merges_keep_id on customer_merges (keep_id);
+
+create or replace function merge_customers(p_keep bigint, p_duplicates bigint[], p_user text default null)
+returns table (sales_moved bigint, installations_moved bigint, customers_removed bigint)
+language plpgsql as $$
+declare
+    v_sales bigint;
+    v_installs bigint;
+    v_removed bigint;
+begin
+    if p_keep = any(p_duplicates) then
+        raise exception 'Cannot merge customer % into itself', p_keep;
+    end if;
+    -- Lock in id order so two overlapping merges cannot deadlock
+    perform 1 from customers where id = p_keep or id = any(p_duplicates) order by id for update;
+    if not exists (select 1 from customers where id = p_keep) then
+        raise exception 'Customer % not found', p_keep;
+    end if;
+
+    update sales set customer_id = p_keep where customer_id = any(p_duplicates);
+    get diagnostics v_sales = row_count;
+    update installations set customer_id = p_keep where customer_id = any(p_duplicates);
+    get diagnostics v_installs = row_count;
+
+    update customers k set
+        phone   = coalesce(nullif(k.phone, ''), d.phone),
+        email   = coalesce(nullif(k.email, ''), d.email),
+        address = coalesce(nullif(k.address, ''), d.address)
+    from (
+        select (array_agg(nullif(phone, '') order by id) filter (where nullif(phone, '') is not null))[1] as phone,
+               (array_agg(nullif(email, '') order by id) filter (where nullif(email, '') is not null))[1] as email,
+               (array_agg(nullif(address, '') order by id) filter (where nullif(address, '') is not null))[1] as address
+        from customers where id = any(p_duplicates)
+    ) d
+    where k.id = p_keep;
+
+    insert into customer_merges (keep_id, duplicate_id, duplicate_name, phone, email, address, merged_by)
+    select p_keep, id, name, phone, email, address, p_user from customers where id = any(p_duplicates);
+
+    delete from customers where id = any(p_duplicates);
+    get diagnostics v_removed = row_count;
+
+    return query select v_sales, v_installs, v_removed;
+end $$;
+
+insert into schema_migrations (version) values ('0006') on conflict do nothing;
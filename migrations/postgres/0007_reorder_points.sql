@@ -0,0 +1,92 @@
+-- 0007_reorder_points.sql
+-- Per-item reorder points and lead times, a partial index over the items below
+-- their reorder point, and alert transitions recorded by evaluate_stock_alerts() (alerts.py).
+
+alter table items add column if not exists reorder_point integer not null default 1;
+alter table items add column if not exists lead_time_days integer not null default 7;
+
+-- Only the rows that need reordering are indexed, so the low-stock query reads a
+-- handful of index entries however large the catalog is.
+create index if not exists idx_items_below_reorder on items (id) where quantity < reorder_point;
+
+-- Items currently alerting, and the history of low/cleared transitions
+create table if not exists stock_alert_state (
+    item_id  bigint primary key,
+    since    timestamptz not null default now()
+);
+
+create table if not exists stock_alerts (
+    id            bigserial primary key,
+    item_id       bigint not null,
+    item          text,
+    category      text,
+    kind          text not null,      -- low | cleared
+    quantity      integer,
+    reorder_point integer,
+    created_at    timestamptz not null default now()
+);
+create index if not exists idx_stock_alerts_created_at on stock_alerts (created_at desc);
+
+create or replace function low_stock_items(p_limit integer default 500)
+returns table (id bigint, item text, category text, quantity integer, reorder_point integer,
+               lead_time_days integer, shortfall integer, unit_cost numeric)
+language sql stable as $$
+    select i.id, i.item, i.category, i.quantity, i.reorder_point, i.lead_time_days,
+           i.reorder_point - i.quantity, i.unit_cost
+    from items i
+    where i.quantity < i.reorder_point
+    order by i.reorder_point - i.quantity desc, i.item
+    limit p_limit;
+$$;
+
+create or replace function low_stock_summary()
+returns table (items_below bigint, total_shortfall bigint, reorder_value numeric)
+language sql stable as $$
+    select count(*), coalesce(sum(reorder_point - quantity), 0),
+           coalesce(sum((reorder_point - quantity) * coalesce(unit_cost, 0)), 0)
+    from items
+    where quantity < reorder_point;
+$$;
+
+-- Diff the items below their reorder point against the open alerts and record
+-- only the changes. Meant to run periodically (alerts.py, or pg_cron:
+-- select cron.schedule('stock-alerts', '*/5 * * * *', 'select evaluate_stock_alerts()')).
+create or replace function evaluate_stock_alerts()
+returns table (item_id bigint, item text, kind text, quantity integer, reorder_point integer)
+language plpgsql as $$
+begin
+    -- One evaluator at a time; a concurrent call simply returns no transitions
+    if not pg_try_advisory_xact_lock(hashtext('evaluate_stock_alerts')) then
+        return;
+    end if;
+
+    return query
+    with low as (
+        select i.id, i.item, i.category, i.quantity, i.reorder_point
+        from items i where i.quantity < i.reorder_point
+    ),
+    opened as (
+        insert into stock_alert_state (item_id)
+        select l.id from low l
+        where not exists (select 1 from stock_alert_state s where s.item_id = l.id)
+        returning stock_alert_state.item_id
+    ),
+    closed as (
+        delete from stock_alert_state s
+        where not exists (select 1 from low l where l.id = s.item_id)
+        returning s.item_id
+    ),
+    logged as (
+        insert into stock_alerts (item_id, item, category, kind, quantity, reorder_point)
+        select l.id, l.item, l.category, 'low', l.quantity, l.reorder_point
+        from opened o join low l on l.id = o.item_id
+        union all
+        select c.item_id, i.item, i.category, 'cleared', i.quantity, i.reorder_point
+        from closed c left join items i on i.id = c.item_id
+        returning stock_alerts.item_id, stock_alerts.item, stock_alerts.kind,
+                  stock_alerts.quantity, stock_alerts.reorder_point
+    )
+    select * from logged;
+end $$;
+
+insert into schema_migrations (version) values ('0007') on conflict do nothing;
@@ -0,0 +1,176 @@
+-- 0008_stock_lots.sql
+-- FIFO cost lots. Every stock increase becomes a lot (quantity, unit_cost); every decrease
+-- consumes the oldest open lots, and the sale or installation written in the same
+-- transaction takes that cost, so sales.cost and profit reflect what the sold units actually
+-- cost instead of the latest restock price.
+--
+-- record_sale / record_installation are left as deployed (their bodies are not in this
+-- repo): costing happens in triggers, so whatever else the RPCs do, audit rows included,
+-- is unchanged.
+--
+-- Only lots with stock left are in idx_stock_lots_open, so consumption reads the head
+-- lots of one item and never the exhausted history behind them.
+
+create table if not exists stock_lots (
+    id            bigserial primary key,
+    item_id       bigint not null,
+    kind          text not null,        -- opening | receipt
+    quantity      integer not null,
+    qty_remaining integer not null,
+    unit_cost     numeric,
+    received_at   timestamptz not null default now(),
+    check (qty_remaining >= 0 and qty_remaining <= quantity)
+);
+create index if not exists idx_stock_lots_open on stock_lots (item_id, id) where qty_remaining > 0;
+
+alter table installations add column if not exists cost numeric;
+
+-- ---------------- Consumption ----------------
+-- Take p_quantity from the oldest open lots of an item and return their total cost.
+-- Units not covered by lots (stock that drifted outside tracking) cost p_fallback_cost.
+create or replace function consume_stock_lots(p_item_id bigint, p_quantity integer, p_fallback_cost numeric)
+returns numeric language plpgsql as $$
+declare
+    v_left integer := p_quantity;
+    v_cost numeric := 0;
+    v_take integer;
+    v_lot  record;
+begin
+    for v_lot in
+        select id, qty_remaining, unit_cost
+        from stock_lots
+        where item_id = p_item_id and qty_remaining > 0
+        order by id
+        for update
+    loop
+        exit when v_left <= 0;
+        v_take := least(v_left, v_lot.qty_remaining);
+        update stock_lots set qty_remaining = qty_remaining - v_take where id = v_lot.id;
+        v_cost := v_cost + v_take * coalesce(v_lot.unit_cost, 0);
+        v_left := v_left - v_take;
+    end loop;
+    return v_cost + greatest(v_left, 0) * coalesce(p_fallback_cost, 0);
+end $$;
+
+-- ---------------- Cost handoff ----------------
+-- The decrement and the sale/installation row are separate writes in one RPC transaction,
+-- in an order this migration does not control. Whichever comes first leaves a transaction-
+-- local hint (app.lots_cost = 'item_id:cost' or app.lots_pending = 'table:id:item_id') and
+-- the second one settles it, the same handshake as label_stock_movement in 0004.
+create or replace function settle_lot_cost(p_item_id bigint, p_cost numeric)
+returns void language plpgsql as $$
+declare
+    v_pending text := nullif(current_setting('app.lots_pending', true), '');
+    v_id      bigint;
+begin
+    if v_pending is not null and split_part(v_pending, ':', 3)::bigint = p_item_id then
+        v_id := split_part(v_pending, ':', 2)::bigint;
+        if split_part(v_pending, ':', 1) = 'sales' then
+            -- SET reads the old cost, so profit keeps the RPC's revenue and swaps only the cost
+            update sales set profit = profit + coalesce(cost, 0) - p_cost, cost = p_cost where id = v_id;
+        else
+            update installations set cost = p_cost where id = v_id;
+        end if;
+        perform set_config('app.lots_pending', '', true);
+    else
+        perform set_config('app.lots_cost', p_item_id::text || ':' || p_cost::text, true);
+    end if;
+end $$;
+
+-- Cost of a decrement already made in this transaction for the item, if any (and clear it).
+create or replace function take_lot_cost(p_item_id bigint)
+returns numeric language plpgsql as $$
+declare
+    v_hint text := nullif(current_setting('app.lots_cost', true), '');
+begin
+    if v_hint is null or split_part(v_hint, ':', 1)::bigint is distinct from p_item_id then
+        return null;
+    end if;
+    perform set_config('app.lots_cost', '', true);
+    return split_part(v_hint, ':', 2)::numeric;
+end $$;
+
+-- ---------------- Capture ----------------
+-- Increases open a lot at the row's unit_cost; every decrease (RPCs, scanner issues,
+-- manual edits) consumes FIFO and hands its cost to the matching sale/installation.
+create or replace function trg_items_stock_lots()
+returns trigger language plpgsql as $$
+declare
+    v_delta integer;
+begin
+    if tg_op = 'DELETE' then
+        update stock_lots set qty_remaining = 0 where item_id = old.id and qty_remaining > 0;
+        return old;
+    end if;
+
+    v_delta := coalesce(new.quantity, 0) - (case when tg_op = 'UPDATE' then coalesce(old.quantity, 0) else 0 end);
+    if v_delta > 0 then
+        insert into stock_lots (item_id, kind, quantity, qty_remaining, unit_cost)
+        values (new.id, 'receipt', v_delta, v_delta, new.unit_cost);
+    elsif v_delta < 0 then
+        perform settle_lot_cost(new.id, consume_stock_lots(new.id, -v_delta, new.unit_cost));
+    end if;
+    return new;
+end $$;
+
+drop trigger if exists items_stock_lots on items;
+create trigger items_stock_lots
+    after insert or update of quantity or delete on items
+    for each row execute function trg_items_stock_lots();
+
+create or replace function trg_sales_lot_cost()
+returns trigger language plpgsql as $$
+declare
+    v_item_id bigint := (select id from items where item = new.item order by id limit 1);
+    v_cost    numeric := take_lot_cost(v_item_id);
+begin
+    if v_cost is not null then
+        new.profit := new.profit + coalesce(new.cost, 0) - v_cost;
+        new.cost := v_cost;
+    elsif v_item_id is not null then
+        perform set_config('app.lots_pending', 'sales:' || new.id::text || ':' || v_item_id::text, true);
+    end if;
+    return new;
+end $$;
+
+drop trigger if exists sales_lot_cost on sales;
+create trigger sales_lot_cost before insert on sales
+    for each row execute function trg_sales_lot_cost();
+
+create or replace function trg_installations_lot_cost()
+returns trigger language plpgsql as $$
+declare
+    v_cost numeric := take_lot_cost(new.item_id);
+begin
+    if v_cost is not null then
+        new.cost := v_cost;
+    elsif new.item_id is not null then
+        perform set_config('app.lots_pending', 'installations:' || new.id::text || ':' || new.item_id::text, true);
+    end if;
+    return new;
+end $$;
+
+drop trigger if exists installations_lot_cost on installations;
+create trigger installations_lot_cost before insert on installations
+    for each row execute function trg_installations_lot_cost();
+
+-- ---------------- Valuation ----------------
+-- Stock value per item at lot cost (what the remaining units were bought for).
+create or replace function stock_lot_value()
+returns table (item_id bigint, quantity bigint, value numeric, oldest_lot_at timestamptz)
+language sql stable as $$
+    select item_id, sum(qty_remaining), sum(qty_remaining * coalesce(unit_cost, 0)), min(received_at)
+    from stock_lots
+    where qty_remaining > 0
+    group by item_id;
+$$;
+
+-- ---------------- Seed ----------------
+-- Current stock becomes one opening lot per item at today's unit_cost.
+insert into stock_lots (item_id, kind, quantity, qty_remaining, unit_cost)
+select i.id, 'opening', i.quantity, i.quantity, i.unit_cost
+from items i
+where coalesce(i.quantity, 0) > 0
+  and not exists (select 1 from stock_lots l where l.item_id = i.id);
+
+insert into schema_migrations (version) values ('0008') on conflict do nothing;
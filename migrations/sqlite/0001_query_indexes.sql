@@ -0,0 +1,15 @@
+-- 0001_query_indexes.sql
+-- SQLite counterpart of migrations/postgres/0001_query_indexes.sql for inventory.db.
+
+CREATE UNIQUE INDEX IF NOT EXISTS items_item_category_key ON items (item, category);
+
+CREATE INDEX IF NOT EXISTS idx_sales_customer_date ON sales (customer_id, date DESC);
+CREATE INDEX IF NOT EXISTS idx_sales_date ON sales (date DESC);
+
+CREATE INDEX IF NOT EXISTS idx_installations_date ON installations (date DESC);
+CREATE INDEX IF NOT EXISTS idx_installations_customer_date ON installations (customer_id, date DESC);
+CREATE INDEX IF NOT EXISTS idx_installations_item_id ON installations (item_id);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp ON audit_log (timestamp DESC);
+
+CREATE INDEX IF NOT EXISTS idx_customers_name ON customers (name);
@@ -0,0 +1,5 @@
+-- 0002_item_barcodes.sql
+-- SQLite counterpart of migrations/postgres/0002_item_barcodes.sql.
+
+ALTER TABLE items ADD COLUMN barcode TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_items_barcode ON items (barcode) WHERE barcode IS NOT NULL;
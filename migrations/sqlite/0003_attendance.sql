@@ -0,0 +1,4 @@
+-- 0003_attendance.sql
+-- Attendance log is read by date range (attendance.view_attendance); check-ins use UNIQUE(employee_id, date).
+
+CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date);
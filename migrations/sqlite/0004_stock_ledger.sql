@@ -0,0 +1,56 @@
+-- 0004_stock_ledger.sql
+-- SQLite counterpart of migrations/postgres/0004_stock_ledger.sql. SQLite has no
+-- transaction-local settings, so decrements are recorded as 'issue' without a sale/installation label.
+
+CREATE TABLE IF NOT EXISTS stock_movements (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id INTEGER NOT NULL,
+    item TEXT,
+    category TEXT,
+    kind TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_cost REAL,
+    ref_id INTEGER,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_stock_movements_item_time ON stock_movements (item_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_stock_movements_time ON stock_movements (created_at);
+
+CREATE TABLE IF NOT EXISTS stock_snapshots (
+    item_id INTEGER NOT NULL,
+    taken_at TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_cost REAL,
+    PRIMARY KEY (item_id, taken_at)
+);
+CREATE INDEX IF NOT EXISTS idx_stock_snapshots_taken_at ON stock_snapshots (taken_at);
+
+CREATE TRIGGER IF NOT EXISTS items_stock_movement_ins AFTER INSERT ON items
+WHEN COALESCE(NEW.quantity, 0) <> 0
+BEGIN
+    INSERT INTO stock_movements (item_id, item, category, kind, quantity, unit_cost)
+    VALUES (NEW.id, NEW.item, NEW.category, 'receipt', NEW.quantity, NEW.unit_cost);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_stock_movement_upd AFTER UPDATE OF quantity ON items
+WHEN COALESCE(NEW.quantity, 0) <> COALESCE(OLD.quantity, 0)
+BEGIN
+    INSERT INTO stock_movements (item_id, item, category, kind, quantity, unit_cost)
+    VALUES (NEW.id, NEW.item, NEW.category,
+            CASE WHEN NEW.quantity > OLD.quantity THEN 'receipt' ELSE 'issue' END,
+            COALESCE(NEW.quantity, 0) - COALESCE(OLD.quantity, 0), NEW.unit_cost);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_stock_movement_del AFTER DELETE ON items
+WHEN COALESCE(OLD.quantity, 0) <> 0
+BEGIN
+    INSERT INTO stock_movements (item_id, item, category, kind, quantity, unit_cost)
+    VALUES (OLD.id, OLD.item, OLD.category, 'delete', -OLD.quantity, OLD.unit_cost);
+END;
+
+INSERT INTO stock_movements (item_id, item, category, kind, quantity, unit_cost)
+SELECT id, item, category, 'opening', quantity, unit_cost FROM items
+WHERE COALESCE(quantity, 0) <> 0 AND NOT EXISTS (SELECT 1 FROM stock_movements);
+
+INSERT OR IGNORE INTO stock_snapshots (item_id, taken_at, quantity, unit_cost)
+SELECT id, strftime('%Y-%m-%dT%H:%M:%f', 'now'), COALESCE(quantity, 0), unit_cost FROM items;
@@ -0,0 +1,100 @@
+-- 0005_daily_rollups.sql
+-- SQLite counterpart of migrations/postgres/0005_daily_rollups.sql; re-bucketing to
+-- week/month happens in timeseries.py.
+
+CREATE TABLE IF NOT EXISTS sales_daily (
+    day TEXT PRIMARY KEY,
+    total_sale REAL NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,
+    profit REAL NOT NULL DEFAULT 0,
+    sales_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS installations_daily (
+    day TEXT PRIMARY KEY,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    install_count INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO sales_daily (day, total_sale, cost, profit, sales_count)
+SELECT date(COALESCE(date, CURRENT_TIMESTAMP)), COALESCE(SUM(total_sale), 0), COALESCE(SUM(cost), 0),
+       COALESCE(SUM(profit), 0), COUNT(*)
+FROM sales
+WHERE NOT EXISTS (SELECT 1 FROM sales_daily)
+GROUP BY 1;
+
+INSERT INTO installations_daily (day, quantity, install_count)
+SELECT date(COALESCE(date, CURRENT_TIMESTAMP)), COALESCE(SUM(quantity), 0), COUNT(*)
+FROM installations
+WHERE NOT EXISTS (SELECT 1 FROM installations_daily)
+GROUP BY 1;
+
+CREATE TRIGGER IF NOT EXISTS trg_sales_daily_insert AFTER INSERT ON sales
+BEGIN
+    INSERT INTO sales_daily (day, total_sale, cost, profit, sales_count)
+    VALUES (date(COALESCE(NEW.date, CURRENT_TIMESTAMP)), COALESCE(NEW.total_sale, 0), COALESCE(NEW.cost, 0),
+            COALESCE(NEW.profit, 0), 1)
+    ON CONFLICT(day) DO UPDATE SET
+        total_sale = total_sale + excluded.total_sale,
+        cost = cost + excluded.cost,
+        profit = profit + excluded.profit,
+        sales_count = sales_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sales_daily_delete AFTER DELETE ON sales
+BEGIN
+    UPDATE sales_daily SET
+        total_sale = total_sale - COALESCE(OLD.total_sale, 0),
+        cost = cost - COALESCE(OLD.cost, 0),
+        profit = profit - COALESCE(OLD.profit, 0),
+        sales_count = sales_count - 1
+    WHERE day = date(COALESCE(OLD.date, CURRENT_TIMESTAMP));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sales_daily_update AFTER UPDATE OF date, total_sale, cost, profit ON sales
+BEGIN
+    UPDATE sales_daily SET
+        total_sale = total_sale - COALESCE(OLD.total_sale, 0),
+        cost = cost - COALESCE(OLD.cost, 0),
+        profit = profit - COALESCE(OLD.profit, 0),
+        sales_count = sales_count - 1
+    WHERE day = date(COALESCE(OLD.date, CURRENT_TIMESTAMP));
+    INSERT INTO sales_daily (day, total_sale, cost, profit, sales_count)
+    VALUES (date(COALESCE(NEW.date, CURRENT_TIMESTAMP)), COALESCE(NEW.total_sale, 0), COALESCE(NEW.cost, 0),
+            COALESCE(NEW.profit, 0), 1)
+    ON CONFLICT(day) DO UPDATE SET
+        total_sale = total_sale + excluded.total_sale,
+        cost = cost + excluded.cost,
+        profit = profit + excluded.profit,
+        sales_count = sales_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_installations_daily_insert AFTER INSERT ON installations
+BEGIN
+    INSERT INTO installations_daily (day, quantity, install_count)
+    VALUES (date(COALESCE(NEW.date, CURRENT_TIMESTAMP)), COALESCE(NEW.quantity, 0), 1)
+    ON CONFLICT(day) DO UPDATE SET
+        quantity = quantity + excluded.quantity,
+        install_count = install_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_installations_daily_delete AFTER DELETE ON installations
+BEGIN
+    UPDATE installations_daily SET
+        quantity = quantity - COALESCE(OLD.quantity, 0),
+        install_count = install_count - 1
+    WHERE day = date(COALESCE(OLD.date, CURRENT_TIMESTAMP));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_installations_daily_update AFTER UPDATE OF date, quantity ON installations
+BEGIN
+    UPDATE installations_daily SET
+        quantity = quantity - COALESCE(OLD.quantity, 0),
+        install_count = install_count - 1
+    WHERE day = date(COALESCE(OLD.date, CURRENT_TIMESTAMP));
+    INSERT INTO installations_daily (day, quantity, install_count)
+    VALUES (date(COALESCE(NEW.date, CURRENT_TIMESTAMP)), COALESCE(NEW.quantity, 0), 1)
+    ON CONFLICT(day) DO UPDATE SET
+        quantity = quantity + excluded.quantity,
+        install_count = install_count + 1;
+END;
@@ -0,0 +1,15 @@
+-- 0006_merge_customers.sql
+-- Merge trail matching migrations/postgres/0006_merge_customers.sql.
+
+CREATE TABLE IF NOT EXISTS customer_merges (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    keep_id INTEGER NOT NULL,
+    duplicate_id INTEGER NOT NULL,
+    duplicate_name TEXT,
+    phone TEXT,
+    email TEXT,
+    address TEXT,
+    merged_by TEXT,
+    merged_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_customer_merges_keep_id ON customer_merges (keep_id);
@@ -0,0 +1,24 @@
+-- 0007_reorder_points.sql
+-- SQLite counterpart of migrations/postgres/0007_reorder_points.sql.
+
+ALTER TABLE items ADD COLUMN reorder_point INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE items ADD COLUMN lead_time_days INTEGER NOT NULL DEFAULT 7;
+
+CREATE INDEX IF NOT EXISTS idx_items_below_reorder ON items (id) WHERE quantity < reorder_point;
+
+CREATE TABLE IF NOT EXISTS stock_alert_state (
+    item_id INTEGER PRIMARY KEY,
+    since TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS stock_alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id INTEGER NOT NULL,
+    item TEXT,
+    category TEXT,
+    kind TEXT NOT NULL,
+    quantity INTEGER,
+    reorder_point INTEGER,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_stock_alerts_created_at ON stock_alerts (created_at DESC);
@@ -0,0 +1,53 @@
+-- 0008_stock_lots.sql
+-- SQLite counterpart of migrations/postgres/0008_stock_lots.sql. There are no RPCs here,
+-- so every decrease consumes lots from the trigger: FIFO leaves the newest units, so each
+-- open lot keeps whatever part of the new quantity its newer lots do not already cover.
+
+CREATE TABLE IF NOT EXISTS stock_lots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    qty_remaining INTEGER NOT NULL CHECK (qty_remaining >= 0 AND qty_remaining <= quantity),
+    unit_cost REAL,
+    received_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_stock_lots_open ON stock_lots (item_id, id) WHERE qty_remaining > 0;
+
+ALTER TABLE installations ADD COLUMN cost REAL;
+
+CREATE TRIGGER IF NOT EXISTS items_stock_lots_ins AFTER INSERT ON items
+WHEN COALESCE(NEW.quantity, 0) > 0
+BEGIN
+    INSERT INTO stock_lots (item_id, kind, quantity, qty_remaining, unit_cost)
+    VALUES (NEW.id, 'receipt', NEW.quantity, NEW.quantity, NEW.unit_cost);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_stock_lots_receipt AFTER UPDATE OF quantity ON items
+WHEN COALESCE(NEW.quantity, 0) > COALESCE(OLD.quantity, 0)
+BEGIN
+    INSERT INTO stock_lots (item_id, kind, quantity, qty_remaining, unit_cost)
+    VALUES (NEW.id, 'receipt', COALESCE(NEW.quantity, 0) - COALESCE(OLD.quantity, 0),
+            COALESCE(NEW.quantity, 0) - COALESCE(OLD.quantity, 0), NEW.unit_cost);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_stock_lots_consume AFTER UPDATE OF quantity ON items
+WHEN COALESCE(NEW.quantity, 0) < COALESCE(OLD.quantity, 0)
+BEGIN
+    UPDATE stock_lots
+       SET qty_remaining = MAX(0, MIN(qty_remaining, MAX(COALESCE(NEW.quantity, 0), 0) -
+           (SELECT COALESCE(SUM(l.qty_remaining), 0) FROM stock_lots l
+             WHERE l.item_id = NEW.id AND l.qty_remaining > 0 AND l.id > stock_lots.id)))
+     WHERE item_id = NEW.id AND qty_remaining > 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_stock_lots_del AFTER DELETE ON items
+BEGIN
+    UPDATE stock_lots SET qty_remaining = 0 WHERE item_id = OLD.id AND qty_remaining > 0;
+END;
+
+INSERT INTO stock_lots (item_id, kind, quantity, qty_remaining, unit_cost)
+SELECT i.id, 'opening', i.quantity, i.quantity, i.unit_cost
+FROM items i
+WHERE COALESCE(i.quantity, 0) > 0
+  AND NOT EXISTS (SELECT 1 FROM stock_lots l WHERE l.item_id = i.id);
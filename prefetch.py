@@ -0,0 +1,204 @@
+# prefetch.py
+"""
+Background cache warming for the page a user is likely to open next.
+
+Navigation in the sidebar is predictable: after login users land on Home,
+Inventory users go from View Inventory to Add/Update Stock, Customer users
+from View Customers to Record Installations to the SOA page. PAGE_LOADS
+lists what each page reads; the transition map (DEFAULT_TRANSITIONS,
+replaceable with a JSON file at ALPHACJ_PREFETCH_MAP) names the pages that
+usually follow a login, a main menu section or a page, and transitions seen
+at least LEARN_MIN_COUNT times are added to it. On login and on every
+navigation the loads of the predicted pages run on a small worker pool, so
+their first render is served from FrameCache / st.cache_data instead of
+the backend. A page that asks for a frame while it is being warmed waits
+for that load instead of issuing its own (FrameCache single-flight).
+"""
+import json
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+import streamlit as st
+
+from alerts import low_stock_items, low_stock_summary
+from catalog import catalog
+from db_supabase import get_frame_cache, view_customers, view_installations, view_items, view_sales
+from forecast import forecaster
+from search import search_index
+from timeseries import data_bounds, installations_series, sales_series, sales_totals
+
+PREFETCH_ENABLED = os.environ.get("ALPHACJ_PREFETCH", "1") != "0"
+PREFETCH_MAP_PATH = os.environ.get("ALPHACJ_PREFETCH_MAP", "")
+PREFETCH_WORKERS = int(os.environ.get("ALPHACJ_PREFETCH_WORKERS", "2"))
+# Warms waiting beyond this are dropped; a burst of clicks must not queue a backlog
+PREFETCH_MAX_PENDING = 8
+# Predicted pages warmed per navigation
+PREFETCH_FANOUT = 3
+LEARN_MIN_COUNT = 3
+
+log = logging.getLogger(__name__)
+
+# ---------------- Loads ----------------
+def _home_charts():
+    """Same calls as the Home page with its default range (All time, Auto resolution)."""
+    bounds = data_bounds()
+    if bounds:
+        sales_totals()
+        start, end = bounds[0], max(date.today(), bounds[1])
+        res = sales_series(start, end).attrs["resolution"]
+        installations_series(start, end, res)
+
+# name -> loader; loaders go through the same cached functions as the pages
+LOADERS: Dict[str, Callable[[], object]] = {
+    "items": view_items,
+    "catalog": catalog,
+    "customers": view_customers,
+    "installations": view_installations,
+    "sales": view_sales,
+    "item_search": lambda: search_index("items"),
+    "customer_search": lambda: search_index("customers"),
+    "low_stock_summary": lambda: (low_stock_summary(), low_stock_items(limit=10)),
+    "low_stock_items": low_stock_items,
+    "home_charts": _home_charts,
+    "forecast": forecaster,
+}
+# Loaders backed by a FrameCache key are skipped while that frame is fresh
+FRAME_KEYS = {"items": "items", "customers": "customers", "installations": "installations", "sales": "sales"}
+
+PAGE_LOADS: Dict[str, List[str]] = {
+    "Home": ["items", "low_stock_summary", "home_charts"],
+    "View Inventory": ["items"],
+    "Add/Update Stock": ["catalog"],
+    "Scan Stock": ["items", "catalog"],
+    "Delete Item": ["catalog"],
+    "View Customers": ["customers", "customer_search"],
+    "View Installations for a Customer": ["customers", "installations"],
+    "Record Installations": ["catalog", "customers", "customer_search", "item_search", "installations"],
+    "Customer Statement of Account": ["customers", "customer_search"],
+    "Duplicate Customers": ["customers"],
+    "Profit/Loss Report": ["sales"],
+    "Stock Level Over Time": ["items"],
+    "Stock Alerts": ["low_stock_items"],
+    "Demand Forecast": ["items", "forecast"],
+}
+
+# ---------------- Transition map ----------------
+DEFAULT_TRANSITIONS = {
+    "login": ["Home"],
+    "sections": {
+        "Inventory": ["View Inventory", "Add/Update Stock"],
+        "Customer": ["View Customers", "Record Installations", "Customer Statement of Account"],
+        "Reports": ["Profit/Loss Report", "Stock Alerts"],
+    },
+    "pages": {
+        "View Inventory": ["Add/Update Stock"],
+        "View Customers": ["Record Installations"],
+        "Record Installations": ["Customer Statement of Account"],
+        "Stock Alerts": ["Demand Forecast"],
+    },
+}
+
+def load_transitions(path: str = PREFETCH_MAP_PATH) -> dict:
+    """DEFAULT_TRANSITIONS with the "login" / "sections" / "pages" entries of the JSON file replaced."""
+    transitions = dict(DEFAULT_TRANSITIONS)
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            transitions.update(json.load(f))
+    return transitions
+
+class Prefetcher:
+    """
+    Predicts the next pages from the transition map plus observed navigation
+    and warms their loads on a bounded pool. Shared by every session.
+    """
+
+    def __init__(self, transitions: Optional[dict] = None, workers: int = PREFETCH_WORKERS):
+        self.transitions = transitions if transitions is not None else load_transitions()
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._learned: Dict[str, Counter] = defaultdict(Counter)
+        self.stats = {"submitted": 0, "fresh": 0, "dropped": 0, "failed": 0}
+
+    # ---------------- Prediction ----------------
+    def learn(self, from_page: str, to_page: str):
+        with self._lock:
+            self._learned[from_page][to_page] += 1
+
+    def predict(self, page: str) -> List[str]:
+        """Configured successors of a page first, then learned ones by frequency."""
+        pages = list(self.transitions.get("pages", {}).get(page, []))
+        with self._lock:
+            learned = self._learned[page].most_common() if page in self._learned else []
+        pages += [p for p, n in learned if n >= LEARN_MIN_COUNT and p not in pages and p != page]
+        return pages[:PREFETCH_FANOUT]
+
+    # ---------------- Hooks ----------------
+    def after_login(self):
+        pages = list(self.transitions.get("login", []))
+        for page in list(pages):
+            pages += self.predict(page)
+        self.warm(pages)
+
+    def navigate(self, prev_section: Optional[str], section: str, prev_page: Optional[str], page: str):
+        """Called on every rerun with the previous and current menu selection; acts only on changes."""
+        if page == prev_page and section == prev_section:
+            return
+        pages = []
+        if section != prev_section:
+            pages += self.transitions.get("sections", {}).get(section, [])
+        if page != prev_page:
+            if prev_page in PAGE_LOADS and page in PAGE_LOADS:
+                self.learn(prev_page, page)
+            pages += self.predict(page)
+        self.warm([p for p in pages if p != page])
+
+    # ---------------- Warming ----------------
+    def warm(self, pages: List[str]):
+        names = []
+        for page in dict.fromkeys(pages):
+            names += [n for n in PAGE_LOADS.get(page, []) if n not in names]
+        for name in names:
+            self._submit(name)
+
+    def _submit(self, name: str):
+        frame = FRAME_KEYS.get(name)
+        if frame and get_frame_cache().fresh(frame):
+            self.stats["fresh"] += 1
+            return
+        with self._lock:
+            if name in self._pending:
+                return
+            if len(self._pending) >= PREFETCH_MAX_PENDING:
+                self.stats["dropped"] += 1
+                return
+            self._pending.add(name)
+            self.stats["submitted"] += 1
+        self.pool.submit(self._run, name)
+
+    def _run(self, name: str):
+        try:
+            LOADERS[name]()
+        except Exception as e:
+            self.stats["failed"] += 1
+            log.warning("Prefetch of %s failed: %s", name, e)
+        finally:
+            with self._lock:
+                self._pending.discard(name)
+
+@st.cache_resource
+def get_prefetcher() -> Prefetcher:
+    return Prefetcher()
+
+def prefetch_after_login():
+    if PREFETCH_ENABLED:
+        get_prefetcher().after_login()
+
+def prefetch_navigation(prev_section: Optional[str], section: str, prev_page: Optional[str], page: str):
+    if PREFETCH_ENABLED:
+        get_prefetcher().navigate(prev_section, section, prev_page, page)
@@ -0,0 +1,187 @@
+# scanner.py
+"""
+Barcode/QR scanning for receiving and issuing stock.
+
+Each photo is decoded in three passes whose results are merged: a
+downscaled pass, full-resolution crops of the barcode-like regions found
+in the small image, and the full frame. A pallet photo can mix large labels
+with ones only readable at full resolution, so no pass is skipped; labels
+seen by several passes are counted once by position. Batches of photos are
+decoded on a thread pool (OpenCV and zbar release the GIL).
+"""
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pandas as pd
+from pyzbar.pyzbar import decode
+
+FIRST_PASS_MAX_SIDE = 800
+MAX_REGIONS = 6
+REGION_PAD = 0.15
+SCAN_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+# ---------------- Decoding ----------------
+def to_gray(image) -> np.ndarray:
+    """Accept encoded bytes (upload/camera), a BGR array or a gray array."""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        buf = np.frombuffer(image, dtype=np.uint8)
+        gray = cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise ValueError("Not a readable image")
+        return gray
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+def _zbar(gray: np.ndarray, x0: int = 0, y0: int = 0) -> List[Tuple[str, float, float]]:
+    """(payload, center x, center y) per symbol; x0/y0 offset a crop back to frame coordinates."""
+    out = []
+    for r in decode(gray):
+        cx = x0 + r.rect.left + r.rect.width / 2
+        cy = y0 + r.rect.top + r.rect.height / 2
+        out.append((r.data.decode("utf-8", errors="replace"), cx, cy))
+    return out
+
+def _distinct(symbols: List[Tuple[str, float, float]], radius: float) -> List[str]:
+    """
+    One payload per physical label: overlapping regions can decode the same
+    symbol twice, but two boxes with the same label must still count twice.
+    """
+    kept: List[Tuple[str, float, float]] = []
+    for data, cx, cy in symbols:
+        if not any(d == data and abs(cx - kx) < radius and abs(cy - ky) < radius for d, kx, ky in kept):
+            kept.append((data, cx, cy))
+    return [d for d, _, _ in kept]
+
+def _candidate_regions(small: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """Bounding boxes (x, y, w, h) of high-gradient, barcode-like blobs, largest first."""
+    gx = cv2.Sobel(small, cv2.CV_32F, 1, 0, ksize=-1)
+    gy = cv2.Sobel(small, cv2.CV_32F, 0, 1, ksize=-1)
+    grad = cv2.convertScaleAbs(cv2.magnitude(gx, gy))
+    grad = cv2.blur(grad, (9, 9))
+    _, mask = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (21, 7)))
+    mask = cv2.dilate(cv2.erode(mask, None, iterations=4), None, iterations=4)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = sorted((cv2.boundingRect(c) for c in contours), key=lambda b: b[2] * b[3], reverse=True)
+    min_area = small.shape[0] * small.shape[1] * 0.002
+    return [b for b in boxes if b[2] * b[3] >= min_area][:MAX_REGIONS]
+
+def decode_image(image) -> List[str]:
+    """Payload of every barcode/QR label in one image, one entry per label (possibly empty)."""
+    gray = to_gray(image)
+    h, w = gray.shape[:2]
+    scale = FIRST_PASS_MAX_SIDE / max(h, w)
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+
+    if small is gray:
+        return [d for d, _, _ in _zbar(gray)]
+
+    inv = 1.0 / scale
+    found = [(d, cx * inv, cy * inv) for d, cx, cy in _zbar(small)]   # in full-frame coordinates
+    for x, y, bw, bh in _candidate_regions(small):
+        px, py = int(bw * REGION_PAD), int(bh * REGION_PAD)
+        x0, y0 = max(0, int((x - px) * inv)), max(0, int((y - py) * inv))
+        x1, y1 = min(w, int((x + bw + px) * inv)), min(h, int((y + bh + py) * inv))
+        found.extend(_zbar(gray[y0:y1, x0:x1], x0, y0))
+    found.extend(_zbar(gray))
+    return _distinct(found, radius=0.02 * max(h, w))
+
+def decode_batch(images: Iterable, workers: int = SCAN_WORKERS) -> List[Tuple[List[str], Optional[str]]]:
+    """[(codes, error)] in input order; an unreadable image yields ([], message)."""
+    def one(img):
+        try:
+            return decode_image(img), None
+        except Exception as e:
+            return [], str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(one, images))
+
+# ---------------- Code -> item ----------------
+_ID_LABEL = re.compile(r"^(?:ITEM[-:\s]?)?(\d+)$", re.IGNORECASE)
+
+def build_code_index(items_df: pd.DataFrame) -> Dict[str, int]:
+    """
+    In-memory lookup from label payload to item id. Labels carry the item's
+    barcode column or its id ("123" / "ITEM-123", see resolve_code). Names
+    are not indexed: the same name exists in several categories.
+    """
+    index: Dict[str, int] = {}
+    if items_df.empty:
+        return index
+    ids = items_df["id"].astype(int).tolist()
+    if "barcode" in items_df.columns:
+        for code, item_id in zip(items_df["barcode"], ids):
+            if isinstance(code, str) and code.strip():
+                index[code.strip().upper()] = item_id
+    return index
+
+def resolve_code(code: str, index: Dict[str, int], known_ids: set) -> Optional[int]:
+    key = code.strip().upper()
+    if key in index:
+        return index[key]
+    m = _ID_LABEL.match(key)
+    if m and int(m.group(1)) in known_ids:
+        return int(m.group(1))
+    return None
+
+def tally(decoded: Iterable[List[str]], items_df: pd.DataFrame) -> Tuple[Counter, Counter]:
+    """
+    Count labels per item id across all decoded images.
+    Returns (counts by item id, unknown codes).
+    """
+    index = build_code_index(items_df)
+    known_ids = set(items_df["id"].astype(int)) if not items_df.empty else set()
+    counts, unknown = Counter(), Counter()
+    for codes in decoded:
+        for code in codes:
+            item_id = resolve_code(code, index, known_ids)
+            if item_id is None:
+                unknown[code] += 1
+            else:
+                counts[item_id] += 1
+    return counts, unknown
+
+# ---------------- Applying ----------------
+def _num(value) -> float:
+    return 0.0 if pd.isna(value) else float(value)
+
+def receive_counts(counts: Dict[int, int], items_df: pd.DataFrame, user: str,
+                   workers: int = 4) -> List[Tuple[int, int, str]]:
+    """
+    Add scanned quantities to stock: one add_or_update_item call per distinct
+    item (not per box), issued concurrently. Returns [(item_id, qty, result)].
+    """
+    from db_supabase import add_or_update_item
+
+    rows = items_df.set_index("id")
+
+    def one(item_id, qty):
+        r = rows.loc[item_id]
+        unit = r.get("unit")
+        try:
+            add_or_update_item(r["item"], r["category"], int(qty), _num(r["unit_cost"]),
+                               _num(r["selling_price"]), "" if pd.isna(unit) else unit, user)
+            return item_id, qty, f"Received {qty}"
+        except Exception as e:
+            return item_id, qty, f"Error: {e}"
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda kv: one(*kv), counts.items()))
+
+def issue_counts(counts: Dict[int, int], customer_id: int, installed_by: str, installed_date,
+                 workers: int = 4) -> List[Tuple[int, int, str]]:
+    """Record one installation per distinct scanned item for the customer."""
+    from db_supabase import record_installation
+
+    def one(item_id, qty):
+        return item_id, qty, record_installation(item_id, int(qty), installed_by, customer_id, installed_date)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda kv: one(*kv), counts.items()))
@@ -0,0 +1,179 @@
+# search.py
+"""
+Typeahead search over customers and items.
+
+Each row gets a normalized search text (name, phone, email / item,
+category, barcode). A trigram index maps every 3-character slice to the
+rows containing it; a query intersects the posting lists of its trigrams,
+smallest first, then verifies and ranks the survivors. One- and
+two-character queries go through a word-prefix table instead. Pages show
+only the top matches, so the browser never receives the full list.
+"""
+import heapq
+import threading
+import unicodedata
+from collections import defaultdict
+from functools import reduce
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from db_supabase import get_frame_cache, view_customers, view_items
+
+MAX_RESULTS = 20
+# Rows changed since the last full build are scanned linearly up to this many
+DELTA_LIMIT = 500
+
+def normalize(s: str) -> str:
+    """Casefolded, accent-stripped, single-spaced (same as the indexed texts)."""
+    s = unicodedata.normalize("NFKD", str(s)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(s.casefold().split())
+
+def _texts(df: pd.DataFrame, columns: List[str], digits: List[str] = ()) -> pd.Series:
+    """Vectorized normalize() over several columns; `digits` columns also index their digits only."""
+    parts = [df[c].fillna("").astype(str) for c in columns if c in df.columns]
+    parts += [df[c].fillna("").astype(str).str.replace(r"\D", "", regex=True) for c in digits if c in df.columns]
+    if not parts:
+        return pd.Series("", index=df.index)
+    text = reduce(lambda a, b: a + " " + b, parts)
+    return text.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii") \
+        .str.casefold().str.replace(r"\s+", " ", regex=True).str.strip()
+
+class SearchIndex:
+    """
+    Trigram + word-prefix index over (id, text, title, label) rows.
+
+    sync() diffs a fresh frame against the indexed texts: small changes go to
+    a delta that is scanned linearly (tombstones hide the stale base rows),
+    and the base is rebuilt only once the delta outgrows DELTA_LIMIT.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = -1
+        self._build([], [], [], [])
+
+    # ---------------- Build ----------------
+    def _build(self, ids, texts, titles, labels):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.texts, self.titles, self.labels = list(texts), list(titles), list(labels)
+        self.row_of = {int(i): n for n, i in enumerate(self.ids)}
+        grams, prefixes = defaultdict(list), defaultdict(list)
+        for n, text in enumerate(self.texts):
+            for g in {text[j:j + 3] for j in range(len(text) - 2)}:
+                grams[g].append(n)
+            for p in {w[:k] for w in text.split() for k in (1, 2)}:
+                prefixes[p].append(n)
+        self.grams = {g: np.array(v, dtype=np.int32) for g, v in grams.items()}
+        self.prefixes = {p: np.array(v, dtype=np.int32) for p, v in prefixes.items()}
+        self.delta: Dict[int, Tuple[str, str, str]] = {}
+        self.tombstones = set()
+
+    def sync(self, version: int, ids, texts, titles, labels):
+        with self._lock:
+            if version == self.version:
+                return
+            current = dict(zip(map(int, ids), zip(texts, titles, labels)))
+            base = {int(i): (self.texts[n], self.titles[n], self.labels[n]) for i, n in self.row_of.items()}
+            changed = {i: row for i, row in current.items() if base.get(i) != row}
+            removed = base.keys() - current.keys()
+            if len(changed) + len(removed) > DELTA_LIMIT:
+                self._build(ids, texts, titles, labels)
+            else:
+                self.delta = changed
+                self.tombstones = {i for i in changed if i in base} | set(removed)
+            self.version = version
+
+    # ---------------- Query ----------------
+    def _base_candidates(self, q: str) -> np.ndarray:
+        if len(q) < 3:
+            return self.prefixes.get(q, np.empty(0, dtype=np.int32))
+        lists = [self.grams.get(q[j:j + 3]) for j in range(len(q) - 2)]
+        if any(v is None for v in lists):
+            return np.empty(0, dtype=np.int32)
+        lists.sort(key=len)
+        return reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), lists)
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> List[Tuple[int, str]]:
+        """Top matches as [(id, label)]: name prefix first, then word prefix, then substring."""
+        q = normalize(query)
+        with self._lock:
+            if not q:
+                rows = [(int(i), self.labels[n]) for n, i in enumerate(self.ids[:limit + len(self.tombstones)])
+                        if int(i) not in self.tombstones]
+                rows += [(i, row[2]) for i, row in self.delta.items()]
+                return rows[:limit]
+
+            hits = []  # (text, title, id, label)
+            for n in self._base_candidates(q):
+                item_id = int(self.ids[n])
+                if item_id not in self.tombstones:
+                    hits.append((self.texts[n], self.titles[n], item_id, self.labels[n]))
+            hits += [(text, title, i, label) for i, (text, title, label) in self.delta.items()]
+
+        wq = " " + q
+
+        def word_start(text: str) -> bool:
+            return (" " + text).find(wq) >= 0
+
+        def rank(hit):
+            text, title = hit[0], hit[1]
+            return (0 if text.startswith(q) else 1 if word_start(text) else 2), len(title), title.casefold()
+
+        # Trigram candidates still need the substring check; short queries match word starts only
+        matches = (h for h in hits if (q in h[0] if len(q) >= 3 else word_start(h[0])))
+        return [(h[2], h[3]) for h in heapq.nsmallest(limit, matches, key=rank)]
+
+    def title(self, item_id: int) -> Optional[str]:
+        with self._lock:
+            if item_id in self.delta:
+                return self.delta[item_id][1]
+            n = self.row_of.get(int(item_id))
+            return self.titles[n] if n is not None and item_id not in self.tombstones else None
+
+# ---------------- Customers & items ----------------
+def _customer_rows(df: pd.DataFrame):
+    if df.empty:
+        return [], [], [], []
+    names = df["name"].fillna("").astype(str)
+    phone = df["phone"].fillna("").astype(str) if "phone" in df.columns else pd.Series("", index=df.index)
+    labels = names + phone.where(phone == "", " · " + phone)
+    return (df["id"].astype(int).tolist(), _texts(df, ["name", "phone", "email"], digits=["phone"]).tolist(),
+            names.tolist(), labels.tolist())
+
+def _item_rows(df: pd.DataFrame):
+    if df.empty:
+        return [], [], [], []
+    names = df["item"].fillna("").astype(str)
+    labels = names + " (" + df["category"].fillna("").astype(str) + ") · " + \
+        df["quantity"].fillna(0).astype(int).astype(str) + " on hand"
+    return (df["id"].astype(int).tolist(), _texts(df, ["item", "category", "barcode"]).tolist(),
+            names.tolist(), labels.tolist())
+
+_SOURCES = {
+    "customers": (view_customers, _customer_rows),
+    "items": (view_items, _item_rows),
+}
+
+@st.cache_resource
+def get_search_index(kind: str) -> SearchIndex:
+    return SearchIndex()
+
+def search_index(kind: str) -> SearchIndex:
+    """The process-wide index for "customers" or "items", synced to the cached frame."""
+    index = get_search_index(kind)
+    cache = get_frame_cache()
+    # Most keystrokes find the index current; skip view() and its frame copy then
+    if cache.version(kind) == index.version and cache.fresh(kind):
+        return index
+    view, rows = _SOURCES[kind]
+    df = view()
+    version = cache.version(kind)
+    if version != index.version:
+        index.sync(version, *rows(df))
+    return index
+
+def search(kind: str, query: str, limit: int = MAX_RESULTS) -> List[Tuple[int, str]]:
+    return search_index(kind).search(query, limit)
@@ -0,0 +1,454 @@
+# service.py
+"""
+Headless HTTP API over the inventory backend, for callers that should not
+go through the Streamlit script (barcode scanners, accounting sync, batch jobs).
+
+Run locally:
+    uvicorn service:app --host 0.0.0.0 --port 8000
+    python service.py --port 8000 --workers 2
+
+Configuration (environment):
+    SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY  backend credentials (falls back to .streamlit/secrets.toml)
+    SERVICE_API_TOKEN                        required as "Authorization: Bearer <token>"; the service
+                                             refuses to start without it
+    SERVICE_ALLOW_NO_AUTH                    set to 1 to run without a token (local development only)
+    SERVICE_MAX_CONNECTIONS                  pooled connections to the backend (default 100)
+    SERVICE_BACKEND_CONCURRENCY              max in-flight backend calls per worker (default 64)
+"""
+import argparse
+import asyncio
+import contextlib
+import hmac
+import math
+import os
+from datetime import date, datetime, timezone
+from typing import Optional
+
+import httpx
+from postgrest.exceptions import APIError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from supabase import AsyncClient, AsyncClientOptions, acreate_client
+
+from db_supabase import get_supabase_credentials
+from soa import build_soa_pdf, soa_filename
+
+API_TOKEN = os.environ.get("SERVICE_API_TOKEN") or None
+ALLOW_NO_AUTH = os.environ.get("SERVICE_ALLOW_NO_AUTH") == "1"
+MAX_CONNECTIONS = int(os.environ.get("SERVICE_MAX_CONNECTIONS", 100))
+BACKEND_CONCURRENCY = int(os.environ.get("SERVICE_BACKEND_CONCURRENCY", 64))
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+UPSERT_BATCH = 500
+# Row counts for the list pages: exact on small tables, the planner's estimate on large
+# ones, so paging through a big table does not run a full COUNT(*) per request
+LIST_COUNT = "estimated"
+
+# ---------------- Backend pool ----------------
+class Backend:
+    """One pooled async Supabase client per worker, with bounded in-flight calls."""
+
+    def __init__(self):
+        self.client: Optional[AsyncClient] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._sem = asyncio.Semaphore(BACKEND_CONCURRENCY)
+
+    async def start(self):
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        self._http = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                max_keepalive_connections=MAX_CONNECTIONS),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+        url, key = get_supabase_credentials()
+        self.client = await acreate_client(url, key, options=AsyncClientOptions(httpx_client=self._http))
+
+    async def stop(self):
+        if self._http is not None:
+            await self._http.aclose()
+
+    async def run(self, query):
+        async with self._sem:
+            return await query.execute()
+
+
+backend = Backend()
+
+# ---------------- Helpers ----------------
+def _page(request: Request):
+    try:
+        page = max(int(request.query_params.get("page", 1)), 1)
+        size = int(request.query_params.get("page_size", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise _BadRequest("page and page_size must be integers")
+    size = min(max(size, 1), MAX_PAGE_SIZE)
+    start = (page - 1) * size
+    return page, size, start, start + size - 1
+
+def _paged(res, page, size) -> JSONResponse:
+    total = res.count if res.count is not None else len(res.data or [])
+    return JSONResponse({
+        "data": res.data or [],
+        "page": page,
+        "page_size": size,
+        "total": total,
+        "total_pages": (total + size - 1) // size if total else 1,
+    })
+
+def _path_int(request: Request, name: str) -> int:
+    """Id from the route ({name:int}); never taken from the query string."""
+    return int(request.path_params[name])
+
+def _int_param(request: Request, name: str, required: bool = False) -> Optional[int]:
+    """Integer query-string filter."""
+    raw = request.query_params.get(name)
+    if raw in (None, ""):
+        if required:
+            raise _BadRequest(f"{name} is required")
+        return None
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        raise _BadRequest(f"{name} must be an integer")
+
+def _body_int(body: dict, name: str, required: bool = True) -> Optional[int]:
+    raw = body.get(name)
+    if raw in (None, ""):
+        if required:
+            raise _BadRequest(f"{name} is required")
+        return None
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        raise _BadRequest(f"{name} must be an integer")
+
+def _body_float(body: dict, name: str) -> float:
+    raw = body.get(name)
+    if raw in (None, ""):
+        return 0.0
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        raise _BadRequest(f"{name} must be a number")
+    if not math.isfinite(value):
+        raise _BadRequest(f"{name} must be a number")
+    return value
+
+def _body_date(body: dict, name: str) -> Optional[str]:
+    raw = body.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(str(raw)[:10]).isoformat()
+    except ValueError:
+        raise _BadRequest(f"{name} must be a date (YYYY-MM-DD)")
+
+async def _json(request: Request) -> dict:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise _BadRequest("Body must be JSON")
+    if not isinstance(body, dict):
+        raise _BadRequest("Body must be a JSON object")
+    return body
+
+class _BadRequest(Exception):
+    pass
+
+def _error_response(exc: Exception) -> JSONResponse:
+    msg = exc.message if isinstance(exc, APIError) else str(exc)
+    if isinstance(exc, _BadRequest):
+        return JSONResponse({"error": msg}, status_code=400)
+    if "Not enough stock" in (msg or ""):
+        return JSONResponse({"error": "Not enough stock."}, status_code=409)
+    if "not found" in (msg or ""):
+        return JSONResponse({"error": msg}, status_code=404)
+    if isinstance(exc, APIError):
+        return JSONResponse({"error": msg, "code": exc.code}, status_code=400)
+    return JSONResponse({"error": msg}, status_code=502)
+
+def endpoint(fn):
+    async def wrapper(request: Request):
+        try:
+            return await fn(request)
+        except (APIError, _BadRequest, httpx.HTTPError) as e:
+            return _error_response(e)
+        except (ValueError, TypeError, KeyError) as e:
+            # A body shape the validation above does not cover; still the caller's fault
+            return _error_response(_BadRequest(f"Invalid request: {e}"))
+    return wrapper
+
+# ---------------- Views ----------------
+@endpoint
+async def health(request: Request):
+    return JSONResponse({"status": "ok", "time": datetime.now(timezone.utc).isoformat()})
+
+@endpoint
+async def list_items(request: Request):
+    page, size, start, end = _page(request)
+    q = backend.client.table("items").select("*", count=LIST_COUNT)
+    if request.query_params.get("category"):
+        q = q.eq("category", request.query_params["category"])
+    res = await backend.run(q.order("item").range(start, end))
+    return _paged(res, page, size)
+
+@endpoint
+async def list_customers(request: Request):
+    page, size, start, end = _page(request)
+    q = backend.client.table("customers").select("*", count=LIST_COUNT)
+    if request.query_params.get("name"):
+        q = q.ilike("name", f"%{request.query_params['name']}%")
+    res = await backend.run(q.order("name").range(start, end))
+    return _paged(res, page, size)
+
+@endpoint
+async def list_sales(request: Request):
+    page, size, start, end = _page(request)
+    q = backend.client.table("sales").select("*", count=LIST_COUNT)
+    customer_id = _int_param(request, "customer_id")
+    if customer_id:
+        q = q.eq("customer_id", customer_id)
+    if request.query_params.get("start_date"):
+        q = q.gte("date", request.query_params["start_date"])
+    if request.query_params.get("end_date"):
+        q = q.lte("date", request.query_params["end_date"])
+    res = await backend.run(q.order("date", desc=True).range(start, end))
+    return _paged(res, page, size)
+
+@endpoint
+async def list_installations(request: Request):
+    page, size, start, end = _page(request)
+    q = backend.client.table("installations").select(
+        "id, customer_id, customers(name), item_id, items(item), quantity, installed_by, date",
+        count=LIST_COUNT,
+    )
+    customer_id = _int_param(request, "customer_id")
+    if customer_id:
+        q = q.eq("customer_id", customer_id)
+    res = await backend.run(q.order("date", desc=True).range(start, end))
+    res.data = [{
+        "id": r.get("id"),
+        "customer_id": r.get("customer_id"),
+        "customer_name": (r.get("customers") or {}).get("name"),
+        "item_id": r.get("item_id"),
+        "item_name": (r.get("items") or {}).get("item"),
+        "quantity": r.get("quantity"),
+        "installed_by": r.get("installed_by"),
+        "date": r.get("date"),
+    } for r in res.data or []]
+    return _paged(res, page, size)
+
+@endpoint
+async def list_audit_log(request: Request):
+    page, size, start, end = _page(request)
+    q = backend.client.table("audit_log").select("*", count=LIST_COUNT)
+    s, e = request.query_params.get("start_date"), request.query_params.get("end_date")
+    if s and e:
+        q = q.gte("timestamp", s + "T00:00:00Z").lte("timestamp", e + "T23:59:59Z")
+    res = await backend.run(q.order("timestamp", desc=True).range(start, end))
+    return _paged(res, page, size)
+
+# ---------------- Writes ----------------
+@endpoint
+async def add_or_update_item(request: Request):
+    b = await _json(request)
+    if not b.get("item"):
+        raise _BadRequest("item is required")
+    res = await backend.run(backend.client.rpc("add_or_update_item", {
+        "p_item": b["item"],
+        "p_category": b.get("category") or "",
+        "p_quantity": _body_int(b, "quantity"),
+        "p_unit_cost": _body_float(b, "unit_cost"),
+        "p_selling_price": _body_float(b, "selling_price"),
+        "p_unit": b.get("unit"),
+        "p_user": b.get("user") or "api",
+    }))
+    return JSONResponse({"data": res.data})
+
+@endpoint
+async def bulk_upsert_items(request: Request):
+    b = await _json(request)
+    records = b.get("records") or []
+    if not isinstance(records, list):
+        raise _BadRequest("records must be a list")
+    rows = []
+    for i, r in enumerate(records):
+        if not isinstance(r, dict):
+            raise _BadRequest(f"records[{i}] must be an object")
+        if not r.get("item"):
+            continue
+        try:
+            rows.append({
+                "item": str(r["item"]).strip(),
+                "category": str(r.get("category") or "").strip(),
+                "quantity": _body_int(r, "quantity", required=False) or 0,
+                "unit_cost": _body_float(r, "unit_cost"),
+                "selling_price": _body_float(r, "selling_price"),
+                "unit": r.get("unit") or None,
+            })
+        except _BadRequest as e:
+            raise _BadRequest(f"records[{i}]: {e}")
+    chunks = [rows[i:i + UPSERT_BATCH] for i in range(0, len(rows), UPSERT_BATCH)]
+    # Batches go out concurrently; Backend.run bounds the in-flight count
+    await asyncio.gather(*[
+        backend.run(backend.client.table("items").upsert(c, on_conflict="item,category"))
+        for c in chunks
+    ])
+    return JSONResponse({"upserted": len(rows), "skipped": len(records) - len(rows), "batches": len(chunks)})
+
+@endpoint
+async def delete_item(request: Request):
+    item_id = _path_int(request, "item_id")
+    user = request.query_params.get("user") or "api"
+    res = await backend.run(backend.client.rpc("delete_item_with_audit", {"p_item_id": item_id, "p_user": user}))
+    return JSONResponse({"deleted": bool(res.data)})
+
+@endpoint
+async def add_customer(request: Request):
+    b = await _json(request)
+    name = str(b.get("name") or "").strip().upper()
+    if not name:
+        raise _BadRequest("name is required")
+    existing = await backend.run(backend.client.table("customers").select("id").eq("name", name).limit(1))
+    if existing.data:
+        return JSONResponse({"error": f"Customer '{name}' already exists.", "id": existing.data[0]["id"]}, status_code=409)
+    res = await backend.run(backend.client.table("customers").insert({
+        "name": name,
+        "phone": str(b.get("phone") or "").strip(),
+        "email": str(b.get("email") or "").strip().upper(),
+        "address": str(b.get("address") or "").strip().upper(),
+    }))
+    return JSONResponse({"data": res.data}, status_code=201)
+
+@endpoint
+async def record_sale(request: Request):
+    b = await _json(request)
+    if not b.get("item"):
+        raise _BadRequest("item is required")
+    res = await backend.run(backend.client.rpc("record_sale", {
+        "p_item": b["item"],
+        "p_quantity": _body_int(b, "quantity"),
+        "p_user": b.get("user") or "api",
+        "p_customer_id": _body_int(b, "customer_id", required=False),
+    }))
+    return JSONResponse({"data": res.data}, status_code=201)
+
+@endpoint
+async def record_installation(request: Request):
+    b = await _json(request)
+    installed_date = _body_date(b, "date")
+    res = await backend.run(backend.client.rpc("record_installation", {
+        "p_item_id": _body_int(b, "item_id"),
+        "p_quantity": _body_int(b, "quantity"),
+        "p_installed_by": b.get("installed_by") or "",
+        "p_customer_id": _body_int(b, "customer_id"),
+        "p_installed_date": (installed_date + "T00:00:00Z") if installed_date else None,
+    }))
+    return JSONResponse({"data": res.data}, status_code=201)
+
+@endpoint
+async def delete_installation(request: Request):
+    installation_id = _path_int(request, "installation_id")
+    await backend.run(backend.client.table("installations").delete().eq("id", installation_id))
+    return JSONResponse({"deleted": installation_id})
+
+# ---------------- SOA ----------------
+@endpoint
+async def customer_soa(request: Request):
+    import pandas as pd
+
+    customer_id = _path_int(request, "customer_id")
+    start_date = request.query_params.get("start_date")
+    end_date = request.query_params.get("end_date")
+    if not (start_date and end_date):
+        raise _BadRequest("start_date and end_date are required")
+    customer_q = backend.client.table("customers").select("name").eq("id", customer_id).limit(1)
+    sales_q = (backend.client.table("sales").select("*").eq("customer_id", customer_id)
+               .gte("date", start_date).lte("date", end_date).order("date", desc=True))
+    customer_res, sales_res = await asyncio.gather(backend.run(customer_q), backend.run(sales_q))
+    if not customer_res.data:
+        return JSONResponse({"error": f"Customer {customer_id} not found."}, status_code=404)
+    if not sales_res.data:
+        return JSONResponse({"error": "No sales records found for this customer in the selected period."}, status_code=404)
+    name = customer_res.data[0]["name"]
+    # PDF rendering is CPU-bound; keep it off the event loop
+    pdf = await asyncio.to_thread(
+        build_soa_pdf, name, customer_id, start_date, end_date, pd.DataFrame(sales_res.data)
+    )
+    return Response(pdf, media_type="application/pdf", headers={
+        "Content-Disposition": f'attachment; filename="{soa_filename(name, customer_id)}"'
+    })
+
+# ---------------- App ----------------
+def require_token(token: Optional[str] = None, allow_no_auth: Optional[bool] = None):
+    """Refuse to serve the service-role key without a token unless explicitly opted out."""
+    token = API_TOKEN if token is None else token
+    allow_no_auth = ALLOW_NO_AUTH if allow_no_auth is None else allow_no_auth
+    if not token and not allow_no_auth:
+        raise RuntimeError("SERVICE_API_TOKEN is not set. Set it, or set SERVICE_ALLOW_NO_AUTH=1 "
+                           "to run without authentication (local development only).")
+
+class TokenAuthMiddleware:
+    def __init__(self, app, token: Optional[str]):
+        self.app = app
+        self.expected = f"Bearer {token}".encode() if token else None
+
+    async def __call__(self, scope, receive, send):
+        if self.expected and scope["type"] == "http" and scope["path"] != "/health":
+            headers = dict(scope.get("headers") or [])
+            if not hmac.compare_digest(headers.get(b"authorization", b""), self.expected):
+                await JSONResponse({"error": "Unauthorized"}, status_code=401)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    require_token()
+    await backend.start()
+    try:
+        yield
+    finally:
+        await backend.stop()
+
+routes = [
+    Route("/health", health),
+    Route("/items", list_items, methods=["GET"]),
+    Route("/items", add_or_update_item, methods=["POST"]),
+    Route("/items/bulk", bulk_upsert_items, methods=["POST"]),
+    Route("/items/{item_id:int}", delete_item, methods=["DELETE"]),
+    Route("/customers", list_customers, methods=["GET"]),
+    Route("/customers", add_customer, methods=["POST"]),
+    Route("/customers/{customer_id:int}/soa", customer_soa, methods=["GET"]),
+    Route("/sales", list_sales, methods=["GET"]),
+    Route("/sales", record_sale, methods=["POST"]),
+    Route("/installations", list_installations, methods=["GET"]),
+    Route("/installations", record_installation, methods=["POST"]),
+    Route("/installations/{installation_id:int}", delete_installation, methods=["DELETE"]),
+    Route("/audit-log", list_audit_log, methods=["GET"]),
+]
+
+app = TokenAuthMiddleware(Starlette(routes=routes, lifespan=lifespan), API_TOKEN)
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Alpha CJ inventory HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    try:
+        require_token()
+    except RuntimeError as e:
+        parser.exit(2, f"error: {e}\n")
+    uvicorn.run("service:app", host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# soa.py
+# -*- coding: utf-8 -*-
+import os
+
+import fitz  # PyMuPDF for PDF generation
+
+# ---------------- PDF Generation for SOA ----------------
+def build_soa_pdf(customer_name, customer_id, start_date, end_date, soa_df, logo_path="icon.jpeg") -> bytes:
+    """
+    Render the Statement of Account and return the PDF bytes.
+    Used by the Streamlit page and the headless service (no temp files).
+    """
+    doc = fitz.open()
+
+    # Path to Unicode font (download DejaVuSans.ttf and place in same folder)
+    font_path = "DejaVuSans.ttf"  # Ensure this file exists in your working directory
+
+    # Page settings
+    page_width, page_height = 595, 842  # A4 size
+    margin_left = 50
+    row_height = 20
+    col_positions = [50, 150, 250, 350, 450]  # Date, Item, Qty, Price, Total
+    headers = ["Date", "Item", "Qty", "Price", "Total"]
+    char_width = 6  # Approx width for alignment calculation
+
+    def draw_header(page):
+        # Logo
+        if logo_path and os.path.exists(logo_path):
+            rect = fitz.Rect(50, 20, 150, 80)
+            page.insert_image(rect, filename=logo_path)
+
+        # Company details
+        page.insert_text((200, 40), "Alpha CJ Solar", fontsize=14, fontfile=font_path)
+        page.insert_text((200, 60), "63-C Data St. Don Manuel QC | +63-917-891-3547", fontsize=10, fontfile=font_path)
+
+        # SOA Title
+        page.insert_text((margin_left, 100), "Statement of Account", fontsize=16, fontfile=font_path)
+        page.insert_text((margin_left, 120), f"Customer: {customer_name} (ID: {customer_id})", fontsize=12, fontfile=font_path)
+        page.insert_text((margin_left, 135), f"Period: {start_date} to {end_date}", fontsize=12, fontfile=font_path)
+
+    def draw_table_header(page, y):
+        # Left-aligned headers
+        page.insert_text((col_positions[0], y), headers[0], fontsize=12, fontfile=font_path)
+        page.insert_text((col_positions[1], y), headers[1], fontsize=12, fontfile=font_path)
+        page.insert_text((col_positions[2], y), headers[2], fontsize=12, fontfile=font_path)
+
+        # Right-align Price & Total headers
+        price_header = headers[3]
+        total_header = headers[4]
+        price_x = col_positions[3] + 80 - (len(price_header) * char_width)
+        total_x = col_positions[4] + 80 - (len(total_header) * char_width)
+        page.insert_text((price_x, y), price_header, fontsize=12, fontfile=font_path)
+        page.insert_text((total_x, y), total_header, fontsize=12, fontfile=font_path)
+
+        # Horizontal line under header
+        page.draw_line((col_positions[0], y + 15), (col_positions[-1] + 80, y + 15))
+        return y + row_height + 5
+
+    # Create first page
+    page = doc.new_page(width=page_width, height=page_height)
+    draw_header(page)
+    y = draw_table_header(page, 160)
+
+    # Table rows
+    for idx, row in soa_df.iterrows():
+        # New page if needed
+        if y + row_height > page_height - 100:
+            page = doc.new_page(width=page_width, height=page_height)
+            draw_header(page)
+            y = draw_table_header(page, 160)
+
+        # Insert row text
+        page.insert_text((col_positions[0], y), str(row['date']), fontsize=10, fontfile=font_path)
+        page.insert_text((col_positions[1], y), str(row['item']), fontsize=10, fontfile=font_path)
+        page.insert_text((col_positions[2], y), str(row['quantity']), fontsize=10, fontfile=font_path)
+
+        # Right-align Price and Total with Peso symbol
+        price_text = f"PHP{float(row['selling_price']):,.2f}"
+        total_text = f"PHP{float(row['total_sale']):,.2f}"
+        price_x = col_positions[3] + 80 - (len(price_text) * char_width)
+        total_x = col_positions[4] + 80 - (len(total_text) * char_width)
+
+        page.insert_text((price_x, y), price_text, fontsize=10, fontfile=font_path)
+        page.insert_text((total_x, y), total_text, fontsize=10, fontfile=font_path)
+
+        y += row_height
+
+    # Summary row
+    y += 20
+    total_amount = float(soa_df['total_sale'].sum())
+    total_qty = int(soa_df['quantity'].sum())
+    transaction_count = len(soa_df)
+
+    summary_text = f"Transactions: {transaction_count} | Total Qty: {total_qty}"
+    page.insert_text((col_positions[0], y), summary_text, fontsize=11, fontfile=font_path)
+
+    # Total Amount (right-aligned)
+    y += 20
+    total_text = f"Total: PHP{total_amount:,.2f}"
+    total_x = col_positions[4] + 80 - (len(total_text) * char_width)
+    page.insert_text((total_x, y), total_text, fontsize=12, fontfile=font_path)
+
+    # Footer
+    page.insert_text((margin_left, page_height - 50), "Thank you for choosing Steak Haven - Premium Quality Meat",
+                     fontsize=10, color=(0.5, 0.5, 0.5), fontfile=font_path)
+
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def soa_filename(customer_name, customer_id) -> str:
+    return f"statement_customer_{customer_id}_{customer_name}.pdf"
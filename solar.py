@@ -3,24 +3,39 @@ import streamlit as st
 from streamlit_option_menu import option_menu
 import pandas as pd
 import plotly.express as px
-import fitz  # PyMuPDF for PDF generation
 import os
 import io
 import base64
-import cv2
-from pyzbar.pyzbar import decode
 import datetime
 from datetime import datetime
 from datetime import date
+from datetime import timedelta
 
 # Import Supabase-backed functions
 from db_supabase import (
     view_items, view_sales, view_customers, view_sales_by_customers, view_audit_log,
-    delete_customer, record_installation, delete_all_inventory, delete_all_customers,
+    delete_customer, record_installation, delete_all_inventory,
     view_installations, paginate_dataframe, add_or_update_item, delete_item,
-    record_sale, import_items_and_add_or_insert, delete_customer_installation,
-    add_customer, view_sales_by_customer_and_date
+    record_sale, delete_customer_installation,
+    add_customer, view_sales_by_customer_and_date, get_supabase, merge_customers, set_reorder_point,
+    _flatten_installation, _to_date_str
 )
+from migrate import check_postgres_indexes, pending_sqlite
+from scanner import decode_batch, issue_counts, receive_counts, tally
+from attendance import check_in, check_in_badges, parse_badge, qr_png, view_attendance, view_employees
+from importer import missing_columns
+from ledger import (ensure_recent_snapshot, stock_level_series, stock_lot_value, stock_value_at, stock_value_history,
+                    view_movements, view_open_lots)
+from timeseries import data_bounds, installations_series, line_chart, sales_series, sales_totals
+from search import search, search_index
+from catalog import catalog
+from dedupe import find_duplicates, plan_merges
+from alerts import get_alert_evaluator, low_stock_items, low_stock_styles, low_stock_summary, recent_alerts, evaluate
+from forecast import forecaster, suggestions, suggested_order_total
+from export import FORMATS, ExportQuery, export_bytes, parquet_available
+from transport import backend_state
+from prefetch import prefetch_after_login, prefetch_navigation
+from jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, get_job_runner, save_upload
 
 # ---------------- SESSION STATE INIT ----------------
 if 'logged_in' not in st.session_state:
@@ -36,111 +51,96 @@ def logout():
     st.session_state.menu = "Landing"
     st.session_state.username = ""
 
-# ---------------- PDF Generation for SOA ----------------
-# -*- coding: utf-8 -*-
-import fitz as _fitz_inner
-import os as _os_inner
-
-def generate_soa_pdf(customer_name, customer_id, start_date, end_date, soa_df, logo_path="icon.jpeg"):
-    pdf_filename = f"statement_customer_{customer_id}_{customer_name}.pdf"
-    doc = fitz.open()
-
-    # Path to Unicode font (download DejaVuSans.ttf and place in same folder)
-    font_path = "DejaVuSans.ttf"  # Ensure this file exists in your working directory
-
-    # Page settings
-    page_width, page_height = 595, 842  # A4 size
-    margin_left = 50
-    row_height = 20
-    col_positions = [50, 150, 250, 350, 450]  # Date, Item, Qty, Price, Total
-    headers = ["Date", "Item", "Qty", "Price", "Total"]
-    char_width = 6  # Approx width for alignment calculation
-
-    def draw_header(page):
-        # Logo
-        if logo_path and os.path.exists(logo_path):
-            rect = fitz.Rect(50, 20, 150, 80)
-            page.insert_image(rect, filename=logo_path)
-
-        # Company details
-        page.insert_text((200, 40), "Alpha CJ Solar", fontsize=14, fontfile=font_path)
-        page.insert_text((200, 60), "63-C Data St. Don Manuel QC | +63-917-891-3547", fontsize=10, fontfile=font_path)
-
-        # SOA Title
-        page.insert_text((margin_left, 100), "Statement of Account", fontsize=16, fontfile=font_path)
-        page.insert_text((margin_left, 120), f"Customer: {customer_name} (ID: {customer_id})", fontsize=12, fontfile=font_path)
-        page.insert_text((margin_left, 135), f"Period: {start_date} to {end_date}", fontsize=12, fontfile=font_path)
-
-    def draw_table_header(page, y):
-        # Left-aligned headers
-        page.insert_text((col_positions[0], y), headers[0], fontsize=12, fontfile=font_path)
-        page.insert_text((col_positions[1], y), headers[1], fontsize=12, fontfile=font_path)
-        page.insert_text((col_positions[2], y), headers[2], fontsize=12, fontfile=font_path)
-
-        # Right-align Price & Total headers
-        price_header = headers[3]
-        total_header = headers[4]
-        price_x = col_positions[3] + 80 - (len(price_header) * char_width)
-        total_x = col_positions[4] + 80 - (len(total_header) * char_width)
-        page.insert_text((price_x, y), price_header, fontsize=12, fontfile=font_path)
-        page.insert_text((total_x, y), total_header, fontsize=12, fontfile=font_path)
-
-        # Horizontal line under header
-        page.draw_line((col_positions[0], y + 15), (col_positions[-1] + 80, y + 15))
-        return y + row_height + 5
-
-    # Create first page
-    page = doc.new_page(width=page_width, height=page_height)
-    draw_header(page)
-    y = draw_table_header(page, 160)
-
-    # Table rows
-    for idx, row in soa_df.iterrows():
-        # New page if needed
-        if y + row_height > page_height - 100:
-            page = doc.new_page(width=page_width, height=page_height)
-            draw_header(page)
-            y = draw_table_header(page, 160)
-
-        # Insert row text
-        page.insert_text((col_positions[0], y), str(row['date']), fontsize=10, fontfile=font_path)
-        page.insert_text((col_positions[1], y), str(row['item']), fontsize=10, fontfile=font_path)
-        page.insert_text((col_positions[2], y), str(row['quantity']), fontsize=10, fontfile=font_path)
-
-        # Right-align Price and Total with Peso symbol
-        price_text = f"PHP{float(row['selling_price']):,.2f}"
-        total_text = f"PHP{float(row['total_sale']):,.2f}"
-        price_x = col_positions[3] + 80 - (len(price_text) * char_width)
-        total_x = col_positions[4] + 80 - (len(total_text) * char_width)
-
-        page.insert_text((price_x, y), price_text, fontsize=10, fontfile=font_path)
-        page.insert_text((total_x, y), total_text, fontsize=10, fontfile=font_path)
-
-        y += row_height
-
-    # Summary row
-    y += 20
-    total_amount = float(soa_df['total_sale'].sum())
-    total_qty = int(soa_df['quantity'].sum())
-    transaction_count = len(soa_df)
-
-    summary_text = f"Transactions: {transaction_count} | Total Qty: {total_qty}"
-    page.insert_text((col_positions[0], y), summary_text, fontsize=11, fontfile=font_path)
-
-    # Total Amount (right-aligned)
-    y += 20
-    total_text = f"Total: PHP{total_amount:,.2f}"
-    total_x = col_positions[4] + 80 - (len(total_text) * char_width)
-    page.insert_text((total_x, y), total_text, fontsize=12, fontfile=font_path)
-
-    # Footer
-    page.insert_text((margin_left, page_height - 50), "Thank you for choosing Steak Haven - Premium Quality Meat",
-                     fontsize=10, color=(0.5, 0.5, 0.5), fontfile=font_path)
-
-    doc.save(pdf_filename)
-    doc.close()
-    return pdf_filename
-
+# ---------------- STARTUP SCHEMA CHECK ----------------
+@st.cache_resource(show_spinner=False)
+def schema_check():
+    """Indexes from migrations/postgres missing in Supabase; checked once per server process."""
+    try:
+        return sorted(check_postgres_indexes(get_supabase()))
+    except Exception as e:
+        return [f"(check failed: {e})"]
+
+# ---------------- BACKGROUND JOB STATUS ----------------
+def show_job_result(job):
+    result = job["result"] or {}
+    st.success(result.get("summary", "Done."))
+    if result.get("errors"):
+        st.warning("Some rows were not imported:")
+        st.dataframe(pd.DataFrame(result["errors"], columns=["Row # (1-based)", "Reason"]), width='stretch')
+    if result.get("failures"):
+        st.error("Some batches failed:")
+        st.dataframe(pd.DataFrame(result["failures"], columns=["Batch #", "Rows", "Error"]), width='stretch')
+    if result.get("file") and os.path.exists(result["file"]):
+        with open(result["file"], "rb") as f:
+            st.download_button("Download " + result.get("file_name", "file"), data=f,
+                               file_name=result.get("file_name"), mime=result.get("mime"),
+                               key=f"job_file_{job['id']}")
+
+@st.fragment(run_every="2s")
+def render_job(job_id):
+    """Poll one background job; as a fragment only this block reruns while the job is in flight."""
+    runner = get_job_runner()
+    job = runner.store.get(job_id)
+    if job is None:
+        st.info("Job not found.")
+        return
+    st.caption(f"Job {job['id']} · {job['kind']} · {job['status']}")
+    if job["status"] in (QUEUED, RUNNING):
+        st.progress(job["progress"] or 0.0, text=job["message"] or job["status"])
+        if st.button("Cancel Job", key=f"cancel_{job_id}"):
+            runner.cancel(job_id)
+    elif job["status"] == SUCCEEDED:
+        show_job_result(job)
+    elif job["status"] == FAILED:
+        st.error(f"Job failed: {(job['error'] or '').splitlines()[0] if job['error'] else 'unknown error'}")
+    else:
+        st.warning("Job cancelled.")
+
+def validate_upload(uploaded_file, kind):
+    """Read only the header rows; the full file is parsed by the background job."""
+    ext = os.path.splitext(uploaded_file.name)[1].lower()
+    try:
+        if ext == ".csv":
+            head = pd.read_csv(uploaded_file, nrows=20)
+        else:
+            head = pd.read_excel(uploaded_file, nrows=20)
+    except Exception as e:
+        st.error(f"Failed to read file: {e}")
+        return False
+    finally:
+        uploaded_file.seek(0)
+    head.columns = [str(c).strip() for c in head.columns]
+    missing = missing_columns(kind, head.rename(columns={"item_id": "item", "stock_quantity": "quantity"}))
+    if missing:
+        st.error(f"Missing required columns: {missing}. Found: {list(head.columns)}")
+        return False
+    st.dataframe(head, width='stretch')
+    return True
+
+# ---------------- EXPORTS ----------------
+INSTALLATION_EXPORT_COLUMNS = "id, customer_id, customers(name), item_id, items(item), quantity, installed_by, date"
+
+def export_buttons(label, query, base_name, key):
+    """Download buttons whose files are only built when clicked, streamed from the database (export.py)."""
+    formats = ["csv", "xlsx"] + (["parquet"] if parquet_available() else [])
+    for col, fmt in zip(st.columns(len(formats)), formats):
+        mime, ext = FORMATS[fmt]
+        col.download_button(f"{label} ({fmt.upper()})", data=lambda fmt=fmt: export_bytes(query, fmt),
+                            file_name=base_name + ext, mime=mime, key=f"{key}_{fmt}", on_click="ignore")
+
+def installations_export(customer_id):
+    return ExportQuery("installations", INSTALLATION_EXPORT_COLUMNS, order="date", desc=True,
+                       filters=(("eq", "customer_id", int(customer_id)),), transform=_flatten_installation)
+
+# ---------------- TYPEAHEAD SEARCH ----------------
+def search_select(label, kind, key, placeholder="Type a name"):
+    """Query box plus the top matches from the search index; returns the selected id or None."""
+    query = st.text_input(f"Search {label}", key=f"{key}_query", placeholder=placeholder)
+    matches = dict(search(kind, query))
+    if not matches:
+        st.info("No matches.")
+        return None
+    return st.selectbox(label, list(matches), format_func=matches.get, key=key)
 
 # ---------------- LOGIN PAGE ----------------
 if not st.session_state.logged_in:
@@ -154,6 +154,7 @@ if not st.session_state.logged_in:
             st.session_state.logged_in = True
             st.session_state.menu = "Home"
             st.session_state.username = username
+            prefetch_after_login()
             try:
                 st.rerun()
             except AttributeError:
@@ -169,15 +170,22 @@ elif st.session_state.logged_in:
         st.sidebar.image("icon.jpeg", width=150)
     st.sidebar.title("Menu")
     st.sidebar.button("Logout", on_click=logout)
-    st.sidebar.header("Settings")
-    stock_threshold = st.sidebar.number_input("Set Stock Alert Threshold", min_value=0, value=1)
+    get_alert_evaluator()
+    missing_indexes = schema_check()
+    if missing_indexes:
+        st.sidebar.warning(
+            "Database migrations pending, queries may fall back to sequential scans. "
+            f"Missing: {', '.join(missing_indexes)}. Run `python migrate.py postgres`."
+        )
+    if backend_state() != "closed":
+        st.sidebar.warning("Database connection degraded: showing the last loaded data, saves may fail.")
 
     with st.sidebar:
         # Main menu
         main_menu = option_menu(
             "Main Menu",
-            ["Home", "Inventory", "Customer", "Reports"],
-            icons=["house", "box", "people", "bar-chart"],
+            ["Home", "Inventory", "Customer", "Reports", "Attendance"],
+            icons=["house", "box", "people", "bar-chart", "person-badge"],
             menu_icon="cast",
             default_index=0
         )
@@ -190,9 +198,10 @@ elif st.session_state.logged_in:
                 "View Inventory",
                 "Add/Update Stock",
                 "File Upload (Stocks)",
+                "Scan Stock",
                 "Delete Item",
                 "Delete All Inventory"
-            ], icons=["plus-circle", "upload", "list", "trash", "trash"])
+            ], icons=["plus-circle", "upload", "list", "upc-scan", "trash", "trash"])
         elif main_menu == "Customer":
             menu = option_menu("Customer", [
                 "View Customers",
@@ -201,43 +210,84 @@ elif st.session_state.logged_in:
                 "File Upload (Customers)",
                 "Record Installations",
                 "Customer Statement of Account",
+                "Duplicate Customers",
                 "Delete All Customers"
-            ], icons=["person-plus", "people", "gear", "upload", "clipboard", "file-text", "trash"])
+            ], icons=["person-plus", "people", "gear", "upload", "clipboard", "file-text", "people-fill", "trash"])
         elif main_menu == "Reports":
             menu = option_menu("Reports", [
                 "Profit/Loss Report",
-                "View Audit Log"
-            ], icons=["graph-up", "book"])
-
+                "Stock Level Over Time",
+                "Stock Alerts",
+                "Demand Forecast",
+                "View Audit Log",
+                "Jobs"
+            ], icons=["graph-up", "clock-history", "exclamation-triangle", "lightbulb", "book", "hourglass-split"])
+        elif main_menu == "Attendance":
+            menu = option_menu("Attendance", [
+                "Kiosk Check-in",
+                "Attendance Log",
+                "Employee QR Codes"
+            ], icons=["qr-code-scan", "calendar-check", "qr-code"])
+
+    prefetch_navigation(st.session_state.get("main_menu"), main_menu, st.session_state.menu, menu)
+    st.session_state.main_menu = main_menu
     st.session_state.menu = menu
     st.write(f"Selected: {main_menu} → {menu}")
+    if main_menu == "Attendance" and pending_sqlite():
+        st.error("The attendance database has pending migrations. Run `python migrate.py sqlite`.")
+        st.stop()
 
     # ---------------- HOME ----------------
     if menu == "Home":
         st.title("Dashboard")
         items_df = view_items()
-        sales_df = view_sales()
         if not items_df.empty:
             st.subheader("Inventory Summary")
             st.metric("Total Items", len(items_df))
             st.metric("Total Stock Value", f"${(items_df['quantity'] * items_df['unit_cost']).sum():,.2f}")
             fig = px.bar(items_df, x='category', y='quantity', color='category', title="Stock by Category")
             st.plotly_chart(fig, width='stretch')
-        if not sales_df.empty:
+
+            low = low_stock_summary()
+            st.subheader("Low Stock")
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Items Below Reorder Point", low["items_below"])
+            col2.metric("Units Short", low["total_shortfall"])
+            col3.metric("Cost to Restock", f"${low['reorder_value']:,.2f}")
+            if low["items_below"]:
+                st.dataframe(low_stock_items(limit=10), width='stretch', hide_index=True)
+        bounds = data_bounds()
+        if bounds:
+            totals = sales_totals()
             st.subheader("Sales Summary")
-            st.metric("Total Sales", f"${sales_df['total_sale'].sum():,.2f}")
-            st.metric("Total Profit", f"${sales_df['profit'].sum():,.2f}")
-            fig2 = px.line(sales_df, x='date', y='profit', title="Profit Trend Over Time")
-            st.plotly_chart(fig2, width='stretch')
+            st.metric("Total Sales", f"${totals['total_sale']:,.2f}")
+            st.metric("Total Profit", f"${totals['profit']:,.2f}")
+
+            today = date.today()
+            ranges = {
+                "Last 30 days": today - timedelta(days=29),
+                "Last 90 days": today - timedelta(days=89),
+                "Last 12 months": today - timedelta(days=364),
+                "All time": bounds[0],
+            }
+            col1, col2 = st.columns(2)
+            range_label = col1.radio("Range", list(ranges), index=len(ranges) - 1, horizontal=True)
+            resolution = col2.selectbox("Resolution", ["Auto", "day", "week", "month"])
+            start_date, end_date = min(ranges[range_label], today), max(today, bounds[1])
+            series_df = sales_series(start_date, end_date, None if resolution == "Auto" else resolution)
+            res = series_df.attrs["resolution"]
+            st.plotly_chart(line_chart(series_df, "bucket", ["total_sale", "profit"],
+                                       f"Sales and Profit per {res}"), width='stretch')
+            installs_df = installations_series(start_date, end_date, res)
+            st.plotly_chart(line_chart(installs_df, "bucket", "quantity",
+                                       f"Installed Quantity per {res}"), width='stretch')
 
     # ---------------- ADD/UPDATE STOCK ----------------
     elif menu == "Add/Update Stock":
         st.title("Add or Update Stock")
-        items_df = view_items()
-        existing_items = sorted(items_df['item'].dropna().unique()) if not items_df.empty else []
-        existing_categories = sorted(items_df['category'].dropna().unique()) if not items_df.empty else []
-        item_options = ["Add New"] + existing_items
-        category_options = ["Add New"] + existing_categories
+        items = catalog()
+        item_options = ["Add New"] + items.names
+        category_options = ["Add New"] + items.categories
 
         # Session state initialization
         if 'item_name' not in st.session_state: st.session_state.item_name = ""
@@ -254,7 +304,7 @@ elif st.session_state.logged_in:
 
         current_stock = None
         if selected_item != "Add New":
-            item_details = items_df[items_df['item'] == selected_item].iloc[0]
+            item_details = items.find(selected_item)
             st.session_state.unit_cost = float(item_details['unit_cost'] or 0)
             st.session_state.selling_price = float(item_details['selling_price'] or 0)
             st.session_state.unit = item_details.get('unit', "") if isinstance(item_details.get('unit', ""), str) else ""
@@ -311,148 +361,17 @@ elif st.session_state.logged_in:
         st.title("File Upload (Stocks)")
         uploaded_file = st.file_uploader("Upload CSV or Excel file", type=["csv", "xlsx", "xls"])
 
-        import re, os, pandas as pd
-
-        def clean_currency_str(x: str) -> str:
-            if x is None:
-                return ""
-            s = str(x).strip()
-            if s == "" or s.lower() in ("nan", "none", "null"):
-                return ""
-            s = re.sub(r"[^\d,.\-]", "", s)
-            if "," in s and "." in s:
-                s = s.replace(",", "")
-            elif "," in s and "." not in s:
-                s = s.replace(",", ".")
-            return s
-
-        def as_float_safe(v, default=0.0):
-            try:
-                if v is None or (isinstance(v, float) and (v != v)):
-                    return float(default)
-                s = clean_currency_str(v)
-                if s == "":
-                    return float(default)
-                f = float(s)
-                if f in (float("inf"), float("-inf")):
-                    return float(default)
-                return float(f)
-            except Exception:
-                return float(default)
-
-        def as_int_safe(v, default=0):
-            try:
-                f = as_float_safe(v, default=default)
-                return int(round(f))
-            except Exception:
-                return int(default)
-
-        def as_str_safe(v, default=""):
-            if v is None:
-                return default
-            s = str(v).strip()
-            if s.lower() in ("nan", "none", "null"):
-                return default
-            return s
-
-        if uploaded_file is not None:
-            ext = os.path.splitext(uploaded_file.name)[1].lower()
-            try:
-                if ext == ".csv":
-                    df = pd.read_csv(uploaded_file)
-                else:
-                    df = pd.read_excel(uploaded_file)
-            except Exception as e:
-                st.error(f"Failed to read file: {e}")
-                st.stop()
-
-            df.columns = [c.strip() for c in df.columns]
-
-            required_cols = ["item", "category", "quantity", "unit_cost", "selling_price"]
-            missing = [c for c in required_cols if c not in df.columns]
-            if missing:
-                st.error(f"Missing required columns: {missing}. Found: {list(df.columns)}")
-                st.stop()
+        if uploaded_file is not None and validate_upload(uploaded_file, "items"):
+            st.caption("Preview of the first rows. Rows are upserted on (item, category) in the background.")
+            if st.button("Start Import"):
+                path = save_upload(uploaded_file)
+                st.session_state.stock_import_job = get_job_runner().submit(
+                    "import_items", {"path": path, "batch_size": 500, "workers": 4}, st.session_state.username)
 
-            records, errors_prepare = [], []
-            for idx, row in df.iterrows():
-                item = as_str_safe(row.get("item", ""))
-                category = as_str_safe(row.get("category", ""))
-                quantity = as_int_safe(row.get("quantity", 0))
-                unit_cost = as_float_safe(row.get("unit_cost", 0.0))
-                selling_price = as_float_safe(row.get("selling_price", 0.0))
-                unit = as_str_safe(row.get("unit", "")) if "unit" in df.columns else ""
-
-                if not item:
-                    errors_prepare.append((idx + 1, "Missing item name"))
-                    continue
-
-                records.append({
-                    "item": item.strip(),
-                    "category": category.strip(),
-                    "quantity": quantity,
-                    "unit_cost": unit_cost,
-                    "selling_price": selling_price,
-                    "unit": unit or None
-                })
-
-            if errors_prepare:
-                st.warning("Some rows were skipped during preparation:")
-                st.dataframe(pd.DataFrame(errors_prepare, columns=["Row # (1-based)", "Reason"]), use_container_width=True)
-
-            if not records:
-                st.info("No valid rows to import after cleaning.")
-                st.stop()
+        if st.session_state.get("stock_import_job"):
+            st.subheader("Import Progress")
+            render_job(st.session_state.stock_import_job)
 
-            from db_supabase import get_supabase
-            sb = get_supabase()
-            ok_count, fail_rows = 0, []
-
-            st.info(f"Attempting batch upsert of {len(records)} rows...")
-            try:
-                BATCH = 500
-                for i in range(0, len(records), BATCH):
-                    chunk = records[i:i+BATCH]
-                    safe_chunk = [{
-                        "item": r["item"],
-                        "category": r["category"] or "",
-                        "quantity": int(r["quantity"] or 0),
-                        "unit_cost": float(r["unit_cost"] or 0.0),
-                        "selling_price": float(r["selling_price"] or 0.0),
-                        "unit": r["unit"] if r["unit"] else None
-                    } for r in chunk]
-
-                    # ✅ Correct Supabase syntax: conflict columns as list
-                    sb.table("items").upsert(safe_chunk, on_conflict=["item", "category"]).execute()
-                    #sb.table("items").upsert(safe_chunk, on_conflict="items_item_category_key").execute()
-                    ok_count += len(safe_chunk)
-
-                st.success(f"✅ Imported {ok_count} rows successfully (batch upsert).")
-            except Exception as batch_err:
-                st.info("Batch upsert fell back to per‑row mode. Data is still being updated correctly.")
-                ok_count = 0
-                for idx, r in enumerate(records):
-                    try:
-                        add_or_update_item(
-                            item=r["item"],
-                            category=r["category"] or "",
-                            quantity=int(r["quantity"] or 0),
-                            unit_cost=float(r["unit_cost"] or 0.0),
-                            selling_price=float(r["selling_price"] or 0.0),
-                            unit=r["unit"] or "",
-                            user=st.session_state.username,
-                        )
-                        ok_count += 1
-                    except Exception as row_err:
-                        fail_rows.append((idx + 1, r.get("item", ""), str(row_err)))
-
-                st.success(f"✅ Imported {ok_count}/{len(records)} rows successfully (per-row).")
-                if fail_rows:
-                    st.error("Some rows failed:")
-                    st.dataframe(pd.DataFrame(fail_rows, columns=["Row # (1-based)", "Item", "Error"]), use_container_width=True)
-
-            st.toast("Upload complete.", icon="✅")
-            
     # ---------------- VIEW INVENTORY ----------------
     elif menu == "View Inventory":
         st.title("Inventory Data")
@@ -460,25 +379,91 @@ elif st.session_state.logged_in:
         if data.empty:
             st.warning("No items found.")
         else:
-            categories = data['category'].dropna().unique().tolist()
+            categories = catalog().categories
             selected_category = st.selectbox("Filter by Category", ["All"] + categories)
 
             if selected_category != "All":
                 data = data[data['category'] == selected_category]
 
-            def highlight_low_stock(row):
-                return ['background-color: #CC0000' if row['quantity'] < stock_threshold else '' for _ in row]
-
             paged_df, total_pages = paginate_dataframe(data, page_size=100)
             st.write(f"Showing {len(paged_df)} rows (Page size: 100)")
             st.dataframe(
                 paged_df.style
-                    .apply(highlight_low_stock, axis=1)
+                    .apply(low_stock_styles, axis=None)
                     .format({"unit_cost": "{:.2f}", "selling_price": "{:.2f}"}),
                 width='stretch'
             )
-            csv_inventory = data.to_csv(index=False)
-            st.download_button("Download Inventory CSV", data=csv_inventory, file_name="inventory.csv", mime="text/csv")
+            with st.expander("Reorder Settings"):
+                reorder_item = search_select("Item", "items", "reorder_item", placeholder="Item, category or barcode")
+                if reorder_item is not None:
+                    current = catalog().get(reorder_item) or {}
+                    col1, col2 = st.columns(2)
+                    reorder_point = col1.number_input("Reorder Point", min_value=0,
+                                                      value=int(current.get("reorder_point", 1) or 0))
+                    lead_time = col2.number_input("Lead Time (days)", min_value=0,
+                                                  value=int(current.get("lead_time_days", 7) or 0))
+                    if st.button("Save Reorder Settings"):
+                        st.success(set_reorder_point(reorder_item, reorder_point, lead_time))
+
+            inventory_filters = (("eq", "category", selected_category),) if selected_category != "All" else ()
+            export_buttons("Download Inventory", ExportQuery("items", order="item", filters=inventory_filters),
+                           "inventory", key="export_inventory")
+
+    # ---------------- SCAN STOCK ----------------
+    elif menu == "Scan Stock":
+        st.title("Scan Stock")
+        st.caption("Photograph labelled boxes (several per photo is fine). Labels can carry the item barcode "
+                   "or its ID (e.g. ITEM-42).")
+        mode = st.radio("Mode", ["Receive (stock in)", "Issue (installation)"], horizontal=True)
+        photos = st.file_uploader("Label photos", type=["jpg", "jpeg", "png"], accept_multiple_files=True)
+        frame = st.camera_input("Or capture from camera")
+
+        if st.button("Decode"):
+            images = [p.getvalue() for p in photos or []] + ([frame.getvalue()] if frame else [])
+            if not images:
+                st.warning("Add at least one photo.")
+            else:
+                items_df = view_items()
+                results = decode_batch(images)
+                counts, unknown = tally([codes for codes, _ in results], items_df)
+                st.session_state.scan_counts = dict(counts)
+                st.session_state.scan_unknown = dict(unknown)
+                st.session_state.scan_unreadable = sum(1 for codes, err in results if err or not codes)
+
+        counts = st.session_state.get("scan_counts")
+        if counts:
+            items = catalog()
+            rows = {item_id: items.get(item_id) for item_id in counts}
+            counts = {item_id: qty for item_id, qty in counts.items() if rows[item_id] is not None}
+            scan_df = pd.DataFrame([{
+                "id": item_id,
+                "item": rows[item_id]["item"],
+                "category": rows[item_id]["category"],
+                "on_hand": int(rows[item_id]["quantity"]),
+                "scanned": qty,
+            } for item_id, qty in counts.items()])
+            st.subheader(f"Scanned {int(scan_df['scanned'].sum())} labels across {len(scan_df)} items")
+            st.dataframe(scan_df, width='stretch')
+            if st.session_state.get("scan_unknown"):
+                st.warning("Unrecognized codes: " + ", ".join(f"{c} ×{n}" for c, n in st.session_state.scan_unknown.items()))
+            if st.session_state.get("scan_unreadable"):
+                st.info(f"{st.session_state.scan_unreadable} photo(s) had no readable label.")
+
+            if mode.startswith("Issue"):
+                customer_id = search_select("Select Customer", "customers", "scan_customer",
+                                            placeholder="Name, phone or email")
+                if customer_id is None:
+                    st.stop()
+                installed_by = st.text_input("Installed By: ")
+                installed_date = st.date_input("Installation Date: ")
+
+            if st.button("Commit Scanned Stock"):
+                if mode.startswith("Receive"):
+                    results = receive_counts(counts, view_items(), st.session_state.username)
+                else:
+                    results = issue_counts(counts, customer_id, installed_by, installed_date)
+                st.session_state.scan_counts = None
+                st.dataframe(pd.DataFrame(results, columns=["Item ID", "Quantity", "Result"]), width='stretch')
 
     # ---------------- DELETE ALL INVENTORY ----------------
     elif menu == "Delete All Inventory":
@@ -498,8 +483,11 @@ elif st.session_state.logged_in:
         start_date = st.date_input("Start Date")
         end_date = st.date_input("End Date")
 
+        audit_filters = ()
         if st.button("Filter"):
             audit_df = view_audit_log(start_date, end_date)
+            audit_filters = (("gte", "timestamp", _to_date_str(start_date) + "T00:00:00Z"),
+                             ("lte", "timestamp", _to_date_str(end_date) + "T23:59:59Z"))
         else:
             audit_df = view_audit_log()
 
@@ -509,19 +497,18 @@ elif st.session_state.logged_in:
             paged_audit, total_pages = paginate_dataframe(audit_df, page_size=20)
             st.write(f"Showing {len(paged_audit)} rows (Page size: 20)")
             st.dataframe(paged_audit, width='stretch')
-            csv_audit = audit_df.to_csv(index=False)
-            st.download_button("Download Audit Log CSV", data=csv_audit, file_name="audit_log.csv", mime="text/csv")
+            export_buttons("Download Audit Log",
+                           ExportQuery("audit_log", order="timestamp", desc=True, filters=audit_filters),
+                           "audit_log", key="export_audit")
 
     # ---------------- DELETE ITEM ----------------
     elif menu == "Delete Item":
         st.title("Delete Item")
-        data = view_items()
-        if data.empty:
+        items = catalog()
+        if not len(items):
             st.warning("No items to delete.")
         else:
-            data['label'] = data.apply(lambda row: f"{row['id']} - {row['category']} - {row['item']}", axis=1)
-            selected_label = st.selectbox("Select Item to Delete", data['label'])
-            item_id = int(selected_label.split(" - ")[0])
+            item_id = st.selectbox("Select Item to Delete", items.ids, format_func=items.label)
             if st.button("Delete"):
                 delete_item(item_id, st.session_state.username)
                 st.success(f"Item with ID {item_id} deleted successfully!")
@@ -555,62 +542,32 @@ elif st.session_state.logged_in:
 
             # --- Delete customer option ---
             st.subheader("Delete a Customer")
-            customer_names = data['name'].tolist()
-            selected_customer = st.selectbox("Select Customer to Delete", customer_names)
+            delete_id = search_select("Select Customer to Delete", "customers", "delete_customer",
+                                      placeholder="Name, phone or email")
 
-            if st.button("Delete Customer"):
-                delete_customer(selected_customer)
+            if delete_id is not None and st.button("Delete Customer"):
+                selected_customer = search_index("customers").title(delete_id)
+                delete_customer(selected_customer, customer_id=delete_id)
                 st.success(f"Customer '{selected_customer}' has been deleted.")
-                st.session_state["refresh_customers"] = True
-
-            if st.session_state.get("refresh_customers", False):
-                data = view_customers()
-                st.session_state["refresh_customers"] = False
 
     # ---------------- FILE UPLOAD (CUSTOMERS) ----------------
     elif menu == "File Upload (Customers)":
         st.title("File Upload (Customers)")
         uploaded_file = st.file_uploader("Upload CSV or Excel file", type=["csv", "xlsx", "xls"])
 
-        if uploaded_file is not None:
-            ext = os.path.splitext(uploaded_file.name)[1].lower()
-            try:
-                if ext == ".csv":
-                    df = pd.read_csv(uploaded_file)
-                else:
-                    df = pd.read_excel(uploaded_file)
-            except Exception as e:
-                st.error(f"Failed to read file: {e}")
-                st.stop()
-
-            df.columns = [c.strip() for c in df.columns]
-            required_cols = ["name", "phone", "email", "address"]
-            missing = [c for c in required_cols if c not in df.columns]
-            if missing:
-                st.error(f"Missing required columns: {missing}. Found: {list(df.columns)}")
-                st.stop()
-
-            success_count, fail_rows = 0, []
-            for idx, row in df.iterrows():
-                name = str(row.get("name", "")).strip().upper()
-                phone = str(row.get("phone", "")).strip()
-                email = str(row.get("email", "")).strip().upper()
-                address = str(row.get("address", "")).strip().upper()
+        if uploaded_file is not None and validate_upload(uploaded_file, "customers"):
+            st.caption("Preview of the first rows. Names that already exist are skipped.")
+            skip_duplicates = st.checkbox("Also skip likely duplicates (same phone/email or near-identical name)",
+                                          value=True)
+            if st.button("Start Import"):
+                path = save_upload(uploaded_file)
+                st.session_state.customer_import_job = get_job_runner().submit(
+                    "import_customers", {"path": path, "batch_size": 500, "workers": 4,
+                                         "skip_duplicates": skip_duplicates}, st.session_state.username)
 
-                if not name:
-                    fail_rows.append((idx + 1, "Missing customer name"))
-                    continue
-
-                result = add_customer(name, phone, email, address)
-                if "already exists" in result.lower() or "error" in result.lower():
-                    fail_rows.append((idx + 1, name, result))
-                else:
-                    success_count += 1
-
-            st.success(f"✅ Imported {success_count} customers successfully.")
-            if fail_rows:
-                st.warning("Some rows were not imported:")
-                st.dataframe(pd.DataFrame(fail_rows, columns=["Row # (1-based)", "Customer Name", "Error"]), use_container_width=True)
+        if st.session_state.get("customer_import_job"):
+            st.subheader("Import Progress")
+            render_job(st.session_state.customer_import_job)
 
     # ---------------- VIEW INSTALLATIONS FOR A CUSTOMER ----------------
     elif menu == "View Installations for a Customer":
@@ -619,22 +576,17 @@ elif st.session_state.logged_in:
         if data.empty:
             st.info("No customers yet.")
         else:
-            customer_names = data['name'].tolist()
-            selected_customer_view = st.selectbox("Select Customer to View Installations", customer_names, key="view_install_customer")
-            customer_row = data[data['name'] == selected_customer_view].iloc[0]
-            customer_id = int(customer_row['id'])
+            customer_id = search_select("Select Customer to View Installations", "customers",
+                                        "view_install_customer", placeholder="Name, phone or email")
+            if customer_id is None:
+                st.stop()
             installations_df = view_installations()
             if not installations_df.empty:
                 customer_installs = installations_df[installations_df['customer_id'] == customer_id]
                 if not customer_installs.empty:
                     st.dataframe(customer_installs, width='stretch')
-                    csv_installs = customer_installs.to_csv(index=False)
-                    st.download_button(
-                        "Download Customer Installations CSV",
-                        data=csv_installs,
-                        file_name=f"customer_{customer_id}_installations.csv",
-                        mime="text/csv"
-                    )
+                    export_buttons("Download Customer Installations", installations_export(customer_id),
+                                   f"customer_{customer_id}_installations", key="export_installs")
                 else:
                     st.info("No installations recorded yet for this customer.")
 
@@ -643,43 +595,36 @@ elif st.session_state.logged_in:
             customer_installs_df = installations_df[installations_df['customer_id'] == customer_id] if not installations_df.empty else pd.DataFrame()
 
             if not customer_installs_df.empty:
-                install_labels = customer_installs_df.apply(
-                    lambda row: f"{row['id']} - {row['item_name']} ({row['quantity']} units on {row['date']})",
-                    axis=1
-                ).tolist()
-
-                selected_label = st.selectbox("Select Installation to Delete", install_labels)
-                install_id = int(selected_label.split(" - ")[0])
+                install_labels = dict(zip(
+                    customer_installs_df['id'].astype(int),
+                    customer_installs_df['item_name'].astype(str) + " (" + customer_installs_df['quantity'].astype(str)
+                    + " units on " + customer_installs_df['date'].astype(str) + ")"
+                ))
+                install_id = st.selectbox("Select Installation to Delete", list(install_labels),
+                                          format_func=install_labels.get)
 
                 if st.button("Delete Installation"):
                     result = delete_customer_installation(install_id)
                     st.success(result)
-                    st.session_state["refresh_customers"] = True
             else:
                 st.info("No installations recorded yet for this customer.")
 
     # ---------------- RECORD INSTALLATIONS ----------------
     elif menu == "Record Installations":
         st.title("Record Installations")
-        items_df = view_items()
         customers_df = view_customers()
 
-        if items_df.empty:
+        if not len(catalog()):
             st.warning("No items available in inventory.")
         elif customers_df.empty:
             st.warning("No customers available. Please add a customer first.")
         else:
-            customer_label = st.selectbox(
-                "Select Customer",
-                customers_df.apply(lambda row: f"{row['id']} - {row['name']}", axis=1)
-            )
-            customer_id = int(customer_label.split(" - ")[0])
-
-            item_label = st.selectbox(
-                "Select Item to Install",
-                items_df.apply(lambda row: f"{row['id']} - {row['item']}", axis=1)
-            )
-            item_id = int(item_label.split(" - ")[0])
+            customer_id = search_select("Select Customer", "customers", "install_customer",
+                                        placeholder="Name, phone or email")
+            item_id = search_select("Select Item to Install", "items", "install_item",
+                                    placeholder="Item, category or barcode")
+            if customer_id is None or item_id is None:
+                st.stop()
 
             quantity = st.number_input("Quantity to Install", min_value=1)
             installed_by = st.text_input("Installed By: ")
@@ -699,13 +644,8 @@ elif st.session_state.logged_in:
                 customer_installs = installations_df[installations_df['customer_id'] == customer_id]
                 if not customer_installs.empty:
                     st.dataframe(customer_installs, width='stretch')
-                    csv_installs = customer_installs.to_csv(index=False)
-                    st.download_button(
-                        "Download Customer Installations CSV",
-                        data=csv_installs,
-                        file_name=f"customer_{customer_id}_installations.csv",
-                        mime="text/csv"
-                    )
+                    export_buttons("Download Customer Installations", installations_export(customer_id),
+                                   f"customer_{customer_id}_installations", key="export_installs")
                 else:
                     st.info("No installations recorded yet for this customer.")
             else:
@@ -727,8 +667,96 @@ elif st.session_state.logged_in:
             paged_sales, total_pages = paginate_dataframe(sales_df, page_size=20)
             st.write(f"Showing {len(paged_sales)} rows (Page size: 20)")
             st.dataframe(paged_sales, width='stretch')
-            csv_sales = sales_df.to_csv(index=False)
-            st.download_button("Download Sales CSV", data=csv_sales, file_name="sales.csv", mime="text/csv")
+            export_buttons("Download Sales", ExportQuery("sales", order="date", desc=True), "sales", key="export_sales")
+
+    # ---------------- STOCK LEVEL OVER TIME ----------------
+    elif menu == "Stock Level Over Time":
+        st.title("Stock Level Over Time")
+        ensure_recent_snapshot()
+        items_df = view_items()
+        if items_df.empty:
+            st.warning("No items in inventory.")
+        else:
+            today = date.today()
+            col1, col2 = st.columns(2)
+            start_date = col1.date_input("Start Date", value=today.replace(day=1), key="ledger_start")
+            end_date = col2.date_input("End Date", value=today, key="ledger_end")
+            if start_date > end_date:
+                st.error("Start date must be on or before the end date.")
+            else:
+                item_id = search_select("Item", "items", "ledger_item", placeholder="Item, category or barcode")
+                if item_id is None:
+                    st.stop()
+                series_df = stock_level_series(item_id, start_date, end_date)
+                fig = line_chart(series_df, "date", "quantity", "Quantity on Hand", line_shape="hv")
+                st.plotly_chart(fig, width='stretch')
+                fig = line_chart(series_df, "date", "value", "Stock Value", line_shape="hv")
+                st.plotly_chart(fig, width='stretch')
+                with st.expander("Movements"):
+                    st.dataframe(view_movements(item_id, start_date, end_date), width='stretch')
+                with st.expander("Open Cost Lots (FIFO)"):
+                    lots_df = view_open_lots(item_id)
+                    if lots_df.empty:
+                        st.info("No open lots for this item.")
+                    else:
+                        st.dataframe(lots_df, width='stretch', hide_index=True)
+
+                st.subheader("Total Stock Value")
+                history_df = stock_value_history(start_date, end_date)
+                if history_df.empty:
+                    st.info("No snapshots in the selected period yet.")
+                else:
+                    st.plotly_chart(line_chart(history_df, "taken_on", "value", "Total Stock Value by Day"),
+                                    width='stretch')
+
+                as_of_df = stock_value_at(end_date)
+                if not as_of_df.empty:
+                    as_of_df = as_of_df.merge(items_df[["id", "item", "category"]], left_on="item_id",
+                                              right_on="id", how="left").drop(columns="id")
+                    st.subheader(f"Inventory as of {end_date}")
+                    col1, col2 = st.columns(2)
+                    col1.metric("Stock Value", f"${as_of_df['value'].sum():,.2f}")
+                    lot_df = stock_lot_value()
+                    col2.metric("Current Value at Lot Cost", f"${pd.to_numeric(lot_df['value']).sum():,.2f}")
+                    st.dataframe(as_of_df, width='stretch')
+
+    # ---------------- STOCK ALERTS ----------------
+    elif menu == "Stock Alerts":
+        st.title("Stock Alerts")
+        if st.button("Evaluate Now"):
+            transitions = evaluate()
+            st.success(f"{len(transitions)} new transition(s) recorded.")
+        low_df = low_stock_items()
+        if low_df.empty:
+            st.success("No items are below their reorder point.")
+        else:
+            st.subheader(f"{len(low_df)} item(s) below reorder point")
+            st.dataframe(low_df, width='stretch', hide_index=True)
+        st.subheader("Recent Transitions")
+        alerts_df = recent_alerts()
+        if alerts_df.empty:
+            st.info("No alerts recorded yet.")
+        else:
+            st.dataframe(alerts_df, width='stretch', hide_index=True)
+
+    # ---------------- DEMAND FORECAST ----------------
+    elif menu == "Demand Forecast":
+        st.title("Demand Forecast & Reorder Suggestions")
+        st.caption("Weekly demand from sales and installations; each item uses whichever of moving average, "
+                   "exponential smoothing or seasonal naive had the lowest error over the last 12 weeks.")
+        with st.spinner("Updating forecasts..."):
+            forecast_df = suggestions()
+        to_order = forecast_df[forecast_df["suggested_order"] > 0]
+        col1, col2 = st.columns(2)
+        col1.metric("Items to Reorder", len(to_order))
+        col2.metric("Estimated Order Cost", f"${suggested_order_total(to_order):,.2f}")
+        show_all = st.checkbox("Show all items", value=False)
+        st.dataframe(forecast_df if show_all else to_order, width='stretch', hide_index=True)
+
+        forecast_item = search_select("Demand history", "items", "forecast_item", placeholder="Item, category or barcode")
+        if forecast_item is not None:
+            history_df = forecaster().history(forecast_item)
+            st.plotly_chart(line_chart(history_df, "week", "demand", "Weekly Demand"), width='stretch')
 
     # ---------------- CUSTOMER SOA ----------------
     elif menu == "Customer Statement of Account":
@@ -737,12 +765,11 @@ elif st.session_state.logged_in:
         if customers_df.empty:
             st.warning("No customers found.")
         else:
-            customer_label = st.selectbox(
-                "Select Customer",
-                customers_df.apply(lambda row: f"{row['id']} - {row['name']}", axis=1)
-            )
-            customer_id = int(customer_label.split(" - ")[0])
-            customer_name = customer_label.split(" - ")[1]
+            customer_id = search_select("Select Customer", "customers", "soa_customer",
+                                        placeholder="Name, phone or email")
+            if customer_id is None:
+                st.stop()
+            customer_name = search_index("customers").title(customer_id)
 
             start_date = st.date_input("Start Date")
             end_date = st.date_input("End Date")
@@ -756,13 +783,51 @@ elif st.session_state.logged_in:
                 st.write(f"Showing {len(paged_sales_customer)} rows (Page size: 20)")
                 st.dataframe(paged_sales_customer, width='stretch')
 
-                csv_sales = sales_customer.to_csv(index=False)
-                st.download_button("Download Sales CSV", data=csv_sales, file_name="sales_customer.csv", mime="text/csv")
+                soa_filters = (("eq", "customer_id", int(customer_id)),)
+                if start_date and end_date:
+                    soa_filters += (("gte", "date", _to_date_str(start_date)), ("lte", "date", _to_date_str(end_date)))
+                export_buttons("Download Sales", ExportQuery("sales", order="date", desc=True, filters=soa_filters),
+                               "sales_customer", key="export_soa_sales")
 
                 if st.button("Generate SOA"):
-                    pdf_file = generate_soa_pdf(customer_name, customer_id, start_date, end_date, sales_customer)
-                    with open(pdf_file, "rb") as f:
-                        st.download_button("Download SOA PDF", data=f, file_name=pdf_file, mime="application/pdf")
+                    st.session_state.soa_job = get_job_runner().submit("soa", {
+                        "customer_id": customer_id, "customer_name": customer_name,
+                        "start_date": str(start_date), "end_date": str(end_date),
+                    }, st.session_state.username)
+                if st.session_state.get("soa_job"):
+                    render_job(st.session_state.soa_job)
+
+    # ---------------- DUPLICATE CUSTOMERS ----------------
+    elif menu == "Duplicate Customers":
+        st.title("Duplicate Customers")
+        st.caption("Pairs that share a phone or email, or have near-identical names. "
+                   "Tick the pairs to merge: the kept record takes over their sales and installations.")
+        if st.button("Scan for Duplicates"):
+            with st.spinner("Comparing customers..."):
+                st.session_state.duplicate_pairs = find_duplicates(view_customers())
+        pairs = st.session_state.get("duplicate_pairs")
+        if pairs is None:
+            st.info("Run a scan to list likely duplicates.")
+        elif pairs.empty:
+            st.success("No likely duplicates found.")
+        else:
+            st.write(f"{len(pairs)} likely duplicate pair(s), best matches first (showing up to 500).")
+            review = pairs.head(500).copy()
+            review.insert(0, "merge", False)
+            edited = st.data_editor(review, hide_index=True, width='stretch', key="duplicate_review",
+                                    disabled=[c for c in review.columns if c != "merge"])
+            selected = edited[edited["merge"]]
+            if st.button("Merge Selected", disabled=selected.empty):
+                merged = set()
+                for keep_id, duplicate_ids in plan_merges(zip(selected["keep_id"], selected["duplicate_id"])).items():
+                    result = merge_customers(keep_id, duplicate_ids, st.session_state.username)
+                    if result.startswith("Error"):
+                        st.error(result)
+                    else:
+                        st.success(result)
+                        merged.update(duplicate_ids)
+                st.session_state.duplicate_pairs = pairs[~pairs["keep_id"].isin(merged)
+                                                         & ~pairs["duplicate_id"].isin(merged)].reset_index(drop=True)
 
     # ---------------- DELETE ALL CUSTOMERS ----------------
     elif menu == "Delete All Customers":
@@ -771,8 +836,99 @@ elif st.session_state.logged_in:
         confirm = st.text_input("Type 'DELETE' to confirm")
         if st.button("Delete All Customers"):
             if confirm == "DELETE":
-                delete_all_customers()
-                st.success("All customers have been deleted.")
+                st.session_state.delete_customers_job = get_job_runner().submit(
+                    "delete_all_customers", {}, st.session_state.username)
             else:
                 st.error("Confirmation text does not match. Customers not deleted.")
-
+        if st.session_state.get("delete_customers_job"):
+            render_job(st.session_state.delete_customers_job)
+
+    # ---------------- JOBS ----------------
+    elif menu == "Jobs":
+        st.title("Background Jobs")
+        jobs_list = get_job_runner().store.recent(limit=50)
+        if not jobs_list:
+            st.info("No jobs submitted yet.")
+        else:
+            jobs_df = pd.DataFrame(jobs_list)[
+                ["id", "kind", "status", "progress", "message", "submitted_by", "created_at", "finished_at"]
+            ]
+            st.dataframe(jobs_df, width='stretch')
+            labels = {j["id"]: f"{j['created_at']} · {j['kind']} · {j['status']}" for j in jobs_list}
+            selected_job = st.selectbox("Job", list(labels), format_func=labels.get)
+            render_job(selected_job)
+
+    # ---------------- KIOSK CHECK-IN ----------------
+    elif menu == "Kiosk Check-in":
+        st.title("Kiosk Check-in")
+        st.caption("First scan of the day checks in; later scans record the check-out time.")
+        frame = st.camera_input("Scan badge", key="kiosk_camera")
+        if frame is not None and st.session_state.get("kiosk_last_frame") != frame.file_id:
+            st.session_state.kiosk_last_frame = frame.file_id
+            rows, unknown = check_in_badges([frame.getvalue()])
+            for row in rows:
+                action = "Checked out" if row["check_out_time"] else "Checked in"
+                st.success(f"{action}: employee {row['employee_id']} at {row['check_out_time'] or row['check_in_time']}")
+            if unknown:
+                st.error("Unrecognized badge: " + ", ".join(unknown))
+            elif not rows:
+                st.info("No badge found, or already scanned within the last minute.")
+
+        with st.expander("Batch check-in (crew photos)"):
+            photos = st.file_uploader("Badge photos", type=["jpg", "jpeg", "png"], accept_multiple_files=True)
+            if st.button("Check In All") and photos:
+                rows, unknown = check_in_badges([p.getvalue() for p in photos])
+                st.success(f"Recorded {len(rows)} scan(s).")
+                if rows:
+                    st.dataframe(pd.DataFrame(rows), width='stretch')
+                if unknown:
+                    st.warning("Unrecognized badges: " + ", ".join(unknown))
+
+        with st.expander("Manual entry"):
+            badge = st.text_input("Badge code or employee ID")
+            if st.button("Submit"):
+                employee_id = parse_badge(badge)
+                if employee_id is None:
+                    st.error("Enter a badge code like EMP-12 or an employee ID.")
+                else:
+                    try:
+                        row = check_in(employee_id)
+                        st.success(f"Recorded: {row}" if row else "Already scanned within the last minute.")
+                    except Exception as e:
+                        st.error(f"Check-in failed: {e}")
+
+    # ---------------- ATTENDANCE LOG ----------------
+    elif menu == "Attendance Log":
+        st.title("Attendance Log")
+        start_date = st.date_input("Start Date")
+        end_date = st.date_input("End Date")
+        log_df = view_attendance(start_date, end_date)
+        if log_df.empty:
+            st.warning("No attendance records in the selected period.")
+        else:
+            paged_log, total_pages = paginate_dataframe(log_df, page_size=50)
+            st.write(f"Showing {len(paged_log)} rows (Page size: 50)")
+            st.dataframe(paged_log, width='stretch')
+
+    # ---------------- EMPLOYEE QR CODES ----------------
+    elif menu == "Employee QR Codes":
+        st.title("Employee QR Codes")
+        employees_df = view_employees()
+        if employees_df.empty:
+            st.warning("No employees found.")
+        else:
+            force = st.checkbox("Regenerate existing badges")
+            if st.button("Generate QR Codes"):
+                st.session_state.qr_job = get_job_runner().submit(
+                    "generate_employee_qr", {"force": force}, st.session_state.username)
+            if st.session_state.get("qr_job"):
+                render_job(st.session_state.qr_job)
+
+            labels = dict(zip(employees_df["employee_id"], employees_df["name"]))
+            employee_id = st.selectbox("Employee", list(labels), format_func=lambda i: f"{i} - {labels[i]}")
+            png = qr_png(int(employee_id))
+            if png:
+                st.image(png, width=200)
+                st.download_button("Download Badge", data=png, file_name=f"employee_{employee_id}_qr.png", mime="image/png")
+            else:
+                st.info("No badge generated for this employee yet.")
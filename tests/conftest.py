@@ -0,0 +1,35 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# The app modules live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+@pytest.fixture
+def schema_db(tmp_path):
+    """Empty SQLite file with the tables of the bundled inventory.db, before any migration."""
+    src = sqlite3.connect(f"file:{os.path.join(ROOT, 'inventory.db')}?mode=ro", uri=True)
+    try:
+        ddl = [r[0] for r in src.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY rowid")]
+    finally:
+        src.close()
+    path = str(tmp_path / "inventory.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(";\n".join(ddl))
+    conn.close()
+    return path
+
+@pytest.fixture
+def migrated_db(schema_db):
+    """schema_db with every migrations/sqlite file applied; yields an open connection."""
+    from migrate import apply_sqlite
+
+    apply_sqlite(schema_db)
+    conn = sqlite3.connect(schema_db)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
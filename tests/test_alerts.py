@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+import alerts
+from alerts import DEFAULT_REORDER_POINT, LOW_STOCK_COLUMNS, low_stock_items, low_stock_mask
+from frame_cache import FrameCache
+
+class _Rpc:
+    def __init__(self, data):
+        self.data = data
+
+    def execute(self):
+        return self
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows, self.calls = rows, []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return _Rpc(self.rows)
+
+@pytest.fixture
+def backend(monkeypatch):
+    cache = FrameCache()
+    cache.get("items", lambda: pd.DataFrame({"id": [1], "item": ["Panel"], "quantity": [0]}))
+    sb = FakeSupabase([{"id": 1, "item": "Panel", "category": "Mono", "quantity": 2, "reorder_point": 5,
+                        "lead_time_days": 7, "shortfall": 3, "unit_cost": 100}])
+    monkeypatch.setattr(alerts, "get_frame_cache", lambda: cache)
+    monkeypatch.setattr(alerts, "get_supabase", lambda: sb)
+    alerts._low_stock.clear()
+    yield cache, sb
+    alerts._low_stock.clear()
+
+# ---------------- Queries ----------------
+def test_low_stock_items_come_from_the_rpc(backend):
+    cache, sb = backend
+    df = low_stock_items(limit=20)
+    assert list(df.columns) == LOW_STOCK_COLUMNS
+    assert df.loc[0, "shortfall"] == 3 and df.loc[0, "reorder_point"] == 5
+    assert sb.calls == [("low_stock_items", {"p_limit": 20})]
+
+def test_low_stock_items_are_re_read_after_an_item_write(backend):
+    cache, sb = backend
+    low_stock_items()
+    low_stock_items()
+    assert len(sb.calls) == 1
+    cache.upsert("items", [{"id": 1, "item": "Panel", "quantity": 9}])
+    low_stock_items()
+    assert len(sb.calls) == 2
+
+# ---------------- Styling ----------------
+def test_mask_uses_each_items_reorder_point():
+    df = pd.DataFrame({"quantity": [2, 5, 0, None, 3], "reorder_point": [5, 5, None, 4, "x"]})
+    assert low_stock_mask(df).tolist() == [True, False, 0 < DEFAULT_REORDER_POINT, False, 3 < DEFAULT_REORDER_POINT]
+
+def test_mask_without_reorder_points_uses_the_default():
+    df = pd.DataFrame({"quantity": [0, DEFAULT_REORDER_POINT]})
+    assert low_stock_mask(df).tolist() == [True, False]
+    assert low_stock_mask(pd.DataFrame()).tolist() == []
+
+# ---------------- Schema ----------------
+def test_sqlite_finds_low_stock_from_the_reorder_point_index(migrated_db):
+    migrated_db.executemany("INSERT INTO items (item, category, quantity, reorder_point) VALUES (?, ?, ?, ?)",
+                            [("Panel", "Mono", 2, 5), ("Cable", "Wire", 50, 10), ("Clamp", "Mount", 0, 1)])
+    migrated_db.execute("INSERT INTO items (item, category, quantity) VALUES ('Bolt', 'Mount', 0)")   # default point
+    sql = "SELECT item FROM items WHERE quantity < reorder_point ORDER BY reorder_point - quantity DESC, item"
+    assert [r[0] for r in migrated_db.execute(sql)] == ["Panel", "Bolt", "Clamp"]
+    plan = " ".join(r[-1] for r in migrated_db.execute("EXPLAIN QUERY PLAN " + sql))
+    assert "idx_items_below_reorder" in plan
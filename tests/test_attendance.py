@@ -0,0 +1,55 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from attendance import SchemaOutOfDate, check_in, check_in_many, parse_badge, view_attendance
+
+T0 = datetime(2024, 5, 6, 8, 0, 0)
+
+@pytest.fixture
+def db(schema_db, migrated_db):
+    migrated_db.executemany("INSERT INTO employees (employee_id, name) VALUES (?, ?)",
+                            [(1, "Ana"), (2, "Ben"), (3, "Cora")])
+    migrated_db.commit()
+    return schema_db
+
+def test_parse_badge():
+    assert parse_badge("EMP-12") == 12
+    assert parse_badge(" emp-7 ") == 7
+    assert parse_badge("12") == 12
+    assert parse_badge("ITEM-12") is None
+
+def test_second_scan_inside_the_debounce_window_is_ignored(db):
+    first = check_in(1, T0, db_path=db)
+    assert (first["check_in_time"], first["check_out_time"]) == (T0.isoformat(), None)
+    assert check_in(1, T0 + timedelta(seconds=30), db_path=db) is None
+    later = check_in(1, T0 + timedelta(hours=9), db_path=db)
+    assert later["attendance_id"] == first["attendance_id"]
+    assert (later["check_in_time"], later["check_out_time"]) == (T0.isoformat(), (T0 + timedelta(hours=9)).isoformat())
+
+def test_check_out_moves_forward_and_a_new_day_checks_in_again(db):
+    check_in(1, T0, db_path=db)
+    check_in(1, T0 + timedelta(hours=4), db_path=db)
+    assert check_in(1, T0 + timedelta(hours=8), db_path=db)["check_out_time"] == (T0 + timedelta(hours=8)).isoformat()
+    tomorrow = check_in(1, T0 + timedelta(days=1), db_path=db)
+    assert tomorrow["date"] == "2024-05-07" and tomorrow["check_out_time"] is None
+    assert len(view_attendance(db_path=db)) == 2
+
+def test_unknown_employee_is_rejected(db):
+    with pytest.raises(sqlite3.IntegrityError):
+        check_in(99, T0, db_path=db)
+
+def test_check_in_many_reports_unknown_ids(db):
+    rows, missing = check_in_many([1, 99, 3, 42], T0, db_path=db)
+    assert sorted(r["employee_id"] for r in rows) == [1, 3]
+    assert missing == [99, 42]
+    rows, missing = check_in_many([1, 2], T0 + timedelta(seconds=10), db_path=db)
+    assert [r["employee_id"] for r in rows] == [2] and missing == []   # 1 was debounced
+
+def test_check_in_many_with_no_ids(db):
+    assert check_in_many([], T0, db_path=db) == ([], [])
+
+def test_pending_migrations_block_attendance(schema_db):
+    with pytest.raises(SchemaOutOfDate, match="python migrate.py sqlite"):
+        check_in(1, T0, db_path=schema_db)
@@ -0,0 +1,154 @@
+import pandas as pd
+import pytest
+
+import catalog as catalog_module
+from catalog import Catalog
+from frame_cache import FrameCache
+
+def _items():
+    return pd.DataFrame({
+        "id": [3, 1, 2, 4],
+        "item": ["Battery", "Panel", "Panel", "Inverter"],
+        "category": ["Storage", "Mono", "Poly", None],
+        "quantity": [5, 10, 4, 2],
+    }).sort_values("item", kind="stable", ignore_index=True)
+
+@pytest.fixture
+def cache():
+    c = FrameCache()
+    c.get("items", _items, sort_by="item")
+    return c
+
+@pytest.fixture
+def items(cache):
+    c = Catalog()
+    cache.subscribe("items", c.on_change)
+    c.rebuild(cache.version("items"), cache.peek("items"))
+    return c
+
+def _assert_matches_rebuild(c: Catalog, cache: FrameCache):
+    """Incremental state equals a catalog built from scratch on the patched frame."""
+    fresh = Catalog()
+    fresh.rebuild(cache.version("items"), cache.peek("items"))
+    assert c.version == cache.version("items")
+    assert c.names == fresh.names
+    assert c.categories == fresh.categories
+    assert c.ids == fresh.ids
+    assert c.labels == fresh.labels
+    assert c.by_name == fresh.by_name
+    assert c.by_key == fresh.by_key
+    assert sorted(c.by_id) == sorted(fresh.by_id)
+
+# ---------------- Lookups ----------------
+def test_sorted_names_and_categories(items):
+    assert items.names == ["Battery", "Inverter", "Panel"]
+    assert items.categories == ["Mono", "Poly", "Storage"]
+
+def test_find_by_name_and_by_item_category(items):
+    assert items.find("Panel", "Poly")["id"] == 2
+    assert items.find("Panel", "Mono")["id"] == 1
+    assert items.find("Panel")["id"] == 1   # lowest id when no category is given
+    assert items.find("Panel", "Storage") is None
+    assert items.find("Cable") is None
+
+def test_get_returns_a_copy(items):
+    row = items.get(3)
+    row["quantity"] = 0
+    assert items.get("3")["quantity"] == 5
+    assert items.get(99) is None
+
+def test_labels_and_ids(items):
+    assert items.label(1) == "1 - Mono - Panel"
+    assert items.label(4) == "4 -  - Inverter"
+    assert items.label(99) == "99"
+    assert items.ids == [3, 4, 1, 2]
+    assert len(items) == 4 and 2 in items and 99 not in items
+
+def test_empty_frame():
+    c = Catalog()
+    c.rebuild(1, pd.DataFrame(columns=["id", "item", "category", "quantity"]))
+    assert len(c) == 0 and c.names == [] and c.ids == [] and c.find("Panel") is None
+    c.rebuild(2, None)
+    assert c.version == 2 and len(c) == 0
+
+# ---------------- Writes ----------------
+def test_upsert_new_item(items, cache):
+    cache.upsert("items", [{"id": 5, "item": "Cable", "category": "Wiring", "quantity": 30}])
+    assert items.find("Cable", "Wiring")["quantity"] == 30
+    assert items.names == ["Battery", "Cable", "Inverter", "Panel"]
+    assert items.categories == ["Mono", "Poly", "Storage", "Wiring"]
+    assert items.label(5) == "5 - Wiring - Cable"
+    _assert_matches_rebuild(items, cache)
+
+def test_upsert_rename_and_recategorize(items, cache):
+    cache.upsert("items", [{"id": 3, "item": "Lithium Battery", "category": "Mono"}])
+    assert "Battery" not in items.names and "Storage" not in items.categories
+    assert items.find("Lithium Battery", "Mono")["quantity"] == 5
+    assert items.find("Battery") is None
+    assert items.ids == [4, 3, 1, 2]
+    _assert_matches_rebuild(items, cache)
+
+def test_upsert_quantity_only_keeps_indexes(items, cache):
+    cache.upsert("items", [{"id": 2, "quantity": 9}])
+    assert items.find("Panel", "Poly")["quantity"] == 9
+    assert items.label(2) == "2 - Poly - Panel"
+    _assert_matches_rebuild(items, cache)
+
+def test_remove_item(items, cache):
+    cache.remove("items", [1])
+    assert items.find("Panel")["id"] == 2
+    assert items.find("Panel", "Mono") is None
+    assert "Mono" not in items.categories and "Panel" in items.names
+    assert 1 not in items and items.ids == [3, 4, 2]
+    cache.remove("items", [2])
+    assert "Panel" not in items.names and "Panel" not in items.by_name
+    _assert_matches_rebuild(items, cache)
+
+def test_adjust_stock_by_id_and_by_name(items, cache):
+    cache.adjust("items", "quantity", -3, "id", 3)
+    assert items.get(3)["quantity"] == 2
+    cache.adjust("items", "quantity", 1, "item", "Panel")
+    assert (items.get(1)["quantity"], items.get(2)["quantity"]) == (11, 5)
+    assert items.version == cache.version("items")
+
+def test_clear(items, cache):
+    cache.clear("items")
+    assert len(items) == 0 and items.names == [] and items.categories == []
+    _assert_matches_rebuild(items, cache)
+
+def test_other_changes_rebuild_from_the_frame(items, cache):
+    cache.apply("items", lambda df: df[df["category"] == "Mono"])
+    assert items.ids == [1]
+    _assert_matches_rebuild(items, cache)
+
+def test_invalidate_marks_the_catalog_stale(items, cache):
+    cache.invalidate("items")
+    assert items.version == -1
+
+def test_failed_patch_marks_the_catalog_stale(items):
+    with pytest.raises(KeyError):
+        items.on_change(7, "upsert", [{"item": "no id"}], None)
+    assert items.version == -1
+
+# ---------------- Shared instance ----------------
+def test_catalog_follows_the_shared_frame_cache(monkeypatch):
+    cache = FrameCache()
+    loads = []
+
+    def view_items():
+        loads.append(1)
+        return cache.get("items", _items, sort_by="item")
+
+    monkeypatch.setattr(catalog_module, "get_frame_cache", lambda: cache)
+    monkeypatch.setattr(catalog_module, "view_items", view_items)
+    catalog_module.get_catalog.clear()
+    try:
+        c = catalog_module.catalog()
+        assert c.find("Panel", "Poly")["id"] == 2 and loads == [1]
+        assert catalog_module.catalog() is c and loads == [1]   # fresh frame: no reload, no rebuild
+
+        cache.upsert("items", [{"id": 6, "item": "Breaker", "category": "Wiring", "quantity": 8}])
+        assert catalog_module.catalog().find("Breaker")["id"] == 6
+        assert c.version == cache.version("items")
+    finally:
+        catalog_module.get_catalog.clear()
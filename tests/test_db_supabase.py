@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+import db_supabase
+from frame_cache import FrameCache
+
+class _Rpc:
+    def __init__(self, data):
+        self.data = data
+
+    def execute(self):
+        return self
+
+class FakeSupabase:
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return _Rpc([{"id": 99, "item": params["p_item"], "quantity": params["p_quantity"], "profit": 12.5}])
+
+@pytest.fixture
+def cache(monkeypatch):
+    c = FrameCache()
+    c.get("items", lambda: pd.DataFrame({
+        "id": [1, 2, 3],
+        "item": ["Panel", "Panel", "Inverter"],
+        "category": ["Mono", "Poly", "Hybrid"],
+        "quantity": [10, 10, 5],
+    }), sort_by="item")
+    c.get("sales", lambda: pd.DataFrame(columns=["id", "item", "quantity", "profit"]))
+    monkeypatch.setattr(db_supabase, "get_frame_cache", lambda: c)
+    monkeypatch.setattr(db_supabase, "get_supabase", FakeSupabase)
+    return c
+
+def test_record_sale_patches_an_unambiguous_item_by_id(cache):
+    assert db_supabase.record_sale("Inverter", 2, "tester", None) == "Sale recorded. Profit: $12.50"
+    stock = cache.peek("items").set_index("id")["quantity"].to_dict()
+    assert stock == {1: 10, 2: 10, 3: 3}
+    assert cache.peek("sales")["id"].tolist() == [99]
+
+def test_record_sale_reloads_items_when_the_name_is_shared(cache):
+    db_supabase.record_sale("Panel", 2, "tester", None)
+    assert cache.peek("items") is None   # invalidated, not decremented on both Panels
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+import dedupe
+from dedupe import find_duplicates, match_incoming, name_tokens, normalize_email, normalize_phone, plan_merges
+
+def _customers(rows):
+    return pd.DataFrame(rows, columns=["id", "name", "phone", "email"])
+
+def _pairs(df):
+    return {(r.keep_id, r.duplicate_id) for r in find_duplicates(df).itertuples()}
+
+@pytest.mark.parametrize("phone", ["09171234567", "+63 917 123 4567", "63-917-123-4567", "(0917) 123-4567"])
+def test_normalize_phone_formats_agree(phone):
+    assert normalize_phone(phone) == "9171234567"
+
+@pytest.mark.parametrize("phone", [None, "", "n/a", "12345"])
+def test_normalize_phone_rejects_non_numbers(phone):
+    assert normalize_phone(phone) == ""
+
+def test_normalize_email_ignores_tags_dots_and_generic_local_parts():
+    assert normalize_email("Juan.Cruz+solar@Gmail.com") == ("JUANCRUZ@GMAIL.COM", "JUANCRUZ")
+    assert normalize_email("info@alphacj.ph") == ("INFO@ALPHACJ.PH", "")
+    assert normalize_email("not an email") == ("", "")
+
+def test_name_tokens_drop_titles_and_particles():
+    assert name_tokens("Engr. Juan dela Cruz Jr.") == name_tokens("CRUZ, JUAN") == ("CRUZ", "JUAN")
+
+def test_same_phone_in_different_formats():
+    df = _customers([(1, "JUAN CRUZ", "0917 123 4567", ""), (2, "J. CRUZ", "+63-917-123-4567", "")])
+    result = find_duplicates(df)
+    assert list(result[["keep_id", "duplicate_id"]].iloc[0]) == [1, 2]
+    assert "same phone" in result["reasons"].iloc[0]
+
+def test_same_email_with_tag():
+    df = _customers([(4, "MARIA SANTOS", "", "maria.santos@gmail.com"),
+                     (9, "MA. SANTOS", "", "mariasantos+solar@gmail.com")])
+    assert _pairs(df) == {(4, 9)}
+
+def test_similar_names_without_contact():
+    df = _customers([(1, "JUAN DELA CRUZ", "", ""), (2, "JUAN DE LA CRUZ", "", ""),
+                     (3, "JUAN CRUS", "", ""), (4, "PEDRO REYES", "", "")])
+    assert _pairs(df) == {(1, 2), (1, 3), (2, 3)}
+
+def test_different_people_are_not_flagged():
+    df = _customers([(1, "JUAN CRUZ", "09171234567", "juan@example.com"),
+                     (2, "MARIA SANTOS", "09181112222", "maria@example.com"),
+                     (3, "JOSE CRUZADO", "", "info@example.com"),
+                     (4, "ANA CRUZADO", "", "sales@example.com")])
+    assert _pairs(df) == set()
+
+def test_lower_id_is_kept_and_best_pairs_come_first():
+    df = _customers([(8, "PEDRO REYES", "09221234567", ""), (3, "PEDRO REYES", "09221234567", ""),
+                     (5, "PEDRO REYEZ", "", "")])
+    result = find_duplicates(df)
+    assert (result["keep_id"] < result["duplicate_id"]).all()
+    assert result["score"].is_monotonic_decreasing
+    assert tuple(result[["keep_id", "duplicate_id"]].iloc[0]) == (3, 8)
+
+def test_empty_frame():
+    assert find_duplicates(_customers([])).empty
+
+def test_common_name_blocks_are_skipped(monkeypatch):
+    monkeypatch.setattr(dedupe, "MAX_BLOCK", 2)
+    df = _customers([(1, "JUAN CRUZ A", "", ""), (2, "JUAN CRUZ B", "", ""), (3, "JUAN CRUZ C", "", "")])
+    assert _pairs(df) == set()
+
+def test_plan_merges_groups_chains_under_the_lowest_id():
+    assert plan_merges([(2, 3), (3, 7), (10, 4), (2, 7)]) == {2: [3, 7], 4: [10]}
+    assert plan_merges([]) == {}
+
+def test_match_incoming_against_existing_and_within_file():
+    existing = _customers([(7, "ANNA LIM", "09175551234", ""), (8, "PEDRO REYES", "", "")])
+    incoming = [
+        {"name": "ANA LIM", "phone": "0917-555-1234", "email": ""},
+        {"name": "ROSA DIAZ", "phone": "09991234567", "email": ""},
+        {"name": "NEW PERSON", "phone": "", "email": ""},
+        {"name": "ROSA M DIAZ", "phone": "+63 999 123 4567", "email": ""},
+    ]
+    likely = match_incoming(existing, incoming)
+    assert sorted(likely) == [0, 3]
+    assert likely[0][:2] == (7, "ANNA LIM")
+    assert likely[3][0] is None   # repeat of row 1 of the same file
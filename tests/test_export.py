@@ -0,0 +1,82 @@
+import csv
+
+import pytest
+
+from export import CHUNK_SIZE, ExportQuery, _write_csv, _write_parquet, _write_xlsx
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+SALES = ExportQuery("sales", order="date", desc=True)
+
+def _sales(n=CHUNK_SIZE + 5):
+    # Walk-in sales (no customer) fill the whole first chunk; whole-valued prices arrive as ints
+    rows = []
+    for i in range(n):
+        later = i >= CHUNK_SIZE
+        rows.append({"id": i + 1, "item": "Panel", "quantity": 1,
+                     "selling_price": 10.5 if later else 10, "total_sale": 10.5 if later else 10,
+                     "cost": 7, "profit": 3.5 if later else 3, "date": "2024-05-01",
+                     "customer_id": 42 if later else None})
+    return rows
+
+def test_parquet_types_come_from_the_declared_columns(tmp_path):
+    path = tmp_path / "sales.parquet"
+    _write_parquet(iter(_sales()), str(path), SALES.column_types())
+    table = pq.read_table(path)
+    assert table.schema.field("customer_id").type == pa.int64()
+    assert table.schema.field("selling_price").type == pa.float64()
+    rows = table.to_pylist()
+    assert rows[0]["customer_id"] is None and rows[0]["selling_price"] == 10.0
+    assert rows[-1]["customer_id"] == 42 and rows[-1]["selling_price"] == 10.5
+    assert rows[-1]["profit"] == 3.5
+    assert table.num_rows == CHUNK_SIZE + 5
+
+def test_undeclared_int_column_fails_instead_of_truncating(tmp_path):
+    rows = [{"id": i, "weight": 2} for i in range(CHUNK_SIZE)] + [{"id": CHUNK_SIZE, "weight": 2.5}]
+    with pytest.raises(pa.ArrowInvalid):
+        _write_parquet(iter(rows), str(tmp_path / "x.parquet"), {})
+
+def test_undeclared_column_empty_in_first_chunk_fails_on_a_later_int(tmp_path):
+    rows = [{"id": i, "ref": None} for i in range(CHUNK_SIZE)] + [{"id": CHUNK_SIZE, "ref": 7}]
+    with pytest.raises(pa.ArrowTypeError):
+        _write_parquet(iter(rows), str(tmp_path / "x.parquet"), {})
+
+def test_declared_int_column_rejects_decimals(tmp_path):
+    rows = [{"id": 1, "quantity": 2.5}]
+    with pytest.raises(pa.ArrowInvalid):
+        _write_parquet(iter(rows), str(tmp_path / "x.parquet"), {"id": "int64", "quantity": "int64"})
+
+def test_empty_parquet_keeps_the_schema(tmp_path):
+    path = tmp_path / "empty.parquet"
+    _write_parquet(iter([]), str(path), SALES.column_types())
+    table = pq.read_table(path)
+    assert table.num_rows == 0
+    assert table.schema.names == list(SALES.column_types())
+    assert table.schema.field("customer_id").type == pa.int64()
+
+def test_empty_csv_has_the_header(tmp_path):
+    path = tmp_path / "empty.csv"
+    _write_csv(iter([]), str(path), SALES.column_types())
+    with open(path, newline="") as f:
+        assert list(csv.reader(f)) == [list(SALES.column_types())]
+
+def test_csv_rows(tmp_path):
+    path = tmp_path / "sales.csv"
+    _write_csv(iter(_sales(3)), str(path), SALES.column_types())
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 3 and rows[0]["customer_id"] == "" and rows[0]["selling_price"] == "10"
+
+def test_empty_xlsx_has_the_header(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    path = tmp_path / "empty.xlsx"
+    _write_xlsx(iter([]), str(path), SALES.column_types())
+    ws = openpyxl.load_workbook(path)["data"]
+    assert [c.value for c in next(ws.iter_rows())] == list(SALES.column_types())
+
+def test_column_types_for_explicit_columns():
+    query = ExportQuery("stock_snapshots", columns="item_id, quantity, taken_at")
+    assert query.column_types() == {"item_id": None, "quantity": None, "taken_at": None}
+    assert ExportQuery("stock_snapshots").column_types() == {}
+    assert ExportQuery("sales", schema=(("id", "int64"),)).column_types() == {"id": "int64"}
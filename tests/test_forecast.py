@@ -0,0 +1,129 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecast
+from forecast import HISTORY_PERIODS, Forecaster, parse_dates, period_of, period_start
+
+ITEMS = pd.DataFrame({"id": [1, 2], "item": ["Panel", "Inverter"]})
+
+class Movements:
+    """In-memory sales/installations served through a fake iter_rows (id and date filters applied)."""
+
+    def __init__(self):
+        self.tables = {"sales": [], "installations": []}
+
+    def add(self, table, **row):
+        rows = self.tables[table]
+        rows.append({"id": len(rows) + 1, **row})
+
+    def iter_rows(self, table, columns, order="id", filters=(), **kwargs):
+        ops = {"gt": lambda a, b: a > b, "gte": lambda a, b: str(a) >= str(b)}
+        for row in self.tables[table]:
+            if all(ops[op](row[col], val) for op, col, val in filters):
+                yield {c: row.get(c) for c in columns.split(",")}
+
+@pytest.fixture
+def moves(monkeypatch):
+    m = Movements()
+    monkeypatch.setattr(forecast, "iter_rows", m.iter_rows)
+    return m
+
+def _ts(s):
+    return pd.Timestamp(s, tz="UTC")
+
+# ---------------- Dates ----------------
+def test_parse_dates_accepts_mixed_iso_forms():
+    parsed = parse_dates(["2024-05-06T10:00:00Z", "2024-05-06T10:00:00.123456+00:00",
+                          "2024-05-06 10:00:00", "2024-05-06", "2024-05-06T18:00:00+08:00"])
+    assert parsed.notna().all()
+    assert parsed.iloc[0] == _ts("2024-05-06T10:00:00")
+    assert parsed.iloc[3] == _ts("2024-05-06")
+    assert parsed.iloc[4] == _ts("2024-05-06T10:00:00")
+
+def test_parse_dates_marks_unreadable_values_nat():
+    parsed = parse_dates(["2024-05-06", "06/05/2024 yesterday", None, ""])
+    assert parsed.isna().tolist() == [False, True, True, True]
+
+def test_period_of_weeks_start_on_monday():
+    monday, sunday, next_monday = period_of(["2024-05-06", "2024-05-12T23:59:59Z", "2024-05-13"])
+    assert monday == sunday == next_monday - 1
+    assert period_start(monday) == date(2024, 5, 6)
+    assert period_of(["1970-01-05"])[0] == 1 and period_start(0) == date(1969, 12, 29)
+
+def test_period_of_uses_utc():
+    # 07:00 on a Monday in Manila is still Sunday in UTC
+    assert period_of(["2024-05-13T07:00:00+08:00"])[0] == period_of(["2024-05-12"])[0]
+
+# ---------------- Window ----------------
+def test_advance_across_a_week_boundary():
+    f = Forecaster()
+    f.first_period = 1000
+    f._ensure_rows(np.array([1]))
+    f.demand[0] = np.arange(HISTORY_PERIODS + 1)
+    f._smooth()
+    f._advance(1000 + HISTORY_PERIODS + 1)   # one week later
+    assert f.first_period == 1001
+    assert f.demand[0, 0] == 1 and f.demand[0, HISTORY_PERIODS - 1] == HISTORY_PERIODS
+    assert f.demand[0, HISTORY_PERIODS] == 0      # the new running week starts empty
+    assert f.ses_valid == HISTORY_PERIODS - 1    # only the newly completed week needs smoothing
+
+def test_advance_is_a_no_op_within_the_week_and_clears_after_a_long_gap():
+    f = Forecaster()
+    f.first_period = 1000
+    f._ensure_rows(np.array([1]))
+    f.demand[0] = 1
+    f._advance(1000 + HISTORY_PERIODS)
+    assert f.first_period == 1000 and f.demand.sum() == HISTORY_PERIODS + 1
+    f._advance(1000 + 3 * HISTORY_PERIODS)
+    assert f.first_period == 1000 + 2 * HISTORY_PERIODS
+    assert f.demand.sum() == 0 and f.ses_valid == 0
+
+# ---------------- Incremental updates ----------------
+def test_mid_week_rows_are_kept_and_counted_once_the_week_ends(moves):
+    f = Forecaster()
+    moves.add("sales", item="Panel", quantity=2, date="2024-05-01T09:00:00Z")        # previous week
+    moves.add("installations", item_id=2, quantity=1, date="2024-05-06T08:00:00Z")   # Monday
+    f.update(ITEMS, now=_ts("2024-05-08T12:00:00"))                                 # Wednesday
+    hist = f.history(1)
+    assert hist["week"].iloc[-1] == pd.Timestamp("2024-04-29") and hist["demand"].iloc[-1] == 2
+    assert f.history(2)["demand"].sum() == 0                     # running week is not complete yet
+    assert f.demand[f.rows[2], HISTORY_PERIODS] == 1
+
+    # Fetched later in the same week: only the new row is read, nothing is counted twice
+    moves.add("installations", item_id=2, quantity=4, date="2024-05-09T08:00:00.5+00:00")
+    f.update(ITEMS, now=_ts("2024-05-10T12:00:00"))
+    assert f.demand[f.rows[2], HISTORY_PERIODS] == 5
+    assert f.watermarks == {"sales": 1, "installations": 2}
+
+    f.update(ITEMS, now=_ts("2024-05-14T12:00:00"))              # next Tuesday
+    hist = f.history(2)
+    assert hist["week"].iloc[-1] == pd.Timestamp("2024-05-06") and hist["demand"].iloc[-1] == 5
+    assert f.history(1)["demand"].iloc[-2] == 2
+
+def test_unparseable_dates_are_counted_and_skipped(moves):
+    f = Forecaster()
+    moves.add("sales", item="Panel", quantity=2, date="2024-05-06")
+    moves.add("sales", item="Panel", quantity=9, date="2024-05-06 ??")
+    f.update(ITEMS, now=_ts("2024-05-14"))
+    assert f.unparsed_rows == 1
+    assert f.history(1)["demand"].sum() == 2
+
+def test_sales_of_unknown_items_are_ignored(moves):
+    f = Forecaster()
+    moves.add("sales", item="Cable", quantity=3, date="2024-05-06")
+    f.update(ITEMS, now=_ts("2024-05-14"))
+    assert f.demand.sum() == 0 and sorted(f.rows) == [1, 2]
+
+def test_fit_picks_a_model_per_item(moves):
+    f = Forecaster()
+    for week in range(20):
+        day = pd.Timestamp("2024-01-01") + pd.Timedelta(weeks=week)
+        moves.add("installations", item_id=1, quantity=4, date=day.isoformat())
+    f.update(ITEMS, now=_ts("2024-05-21"))
+    fit = f.fit()
+    assert fit.loc[1, "weekly_forecast"] == pytest.approx(4, abs=0.5)
+    assert fit.loc[2, "weekly_forecast"] == 0
+    assert set(fit["model"]) <= set(forecast.MODELS)
@@ -0,0 +1,167 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from frame_cache import FrameCache
+
+def _items():
+    return pd.DataFrame({
+        "id": [1, 2, 3],
+        "item": ["Battery", "Inverter", "Panel"],
+        "quantity": [5, 2, 10],
+    })
+
+class Loader:
+    def __init__(self, frame=None, delay=0.0):
+        self.frame = frame if frame is not None else _items()
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("backend down")
+        return self.frame.copy()
+
+@pytest.fixture
+def cache():
+    c = FrameCache(ttl=60)
+    c.get("items", Loader(), sort_by="item")
+    return c
+
+def _events(cache, key="items"):
+    seen = []
+    cache.subscribe(key, lambda version, event, payload, frame: seen.append((version, event, payload)))
+    return seen
+
+# ---------------- Reads ----------------
+def test_get_loads_once_and_returns_copies():
+    c, load = FrameCache(), Loader()
+    df = c.get("items", load)
+    df.loc[0, "quantity"] = 999
+    assert c.get("items", load)["quantity"].tolist() == [5, 2, 10]
+    assert load.calls == 1
+    assert c.fresh("items") and c.version("items") == 1
+
+def test_expired_frame_is_reloaded():
+    c, load = FrameCache(ttl=0), Loader()
+    c.get("items", load)
+    c.get("items", load)
+    assert load.calls == 2 and c.version("items") == 2
+    assert not c.fresh("items")
+
+def test_expired_frame_is_served_when_reload_fails():
+    c, load = FrameCache(ttl=0), Loader()
+    c.get("items", load)
+    load.fail = True
+    assert c.get("items", load)["id"].tolist() == [1, 2, 3]
+    assert c.version("items") == 1
+
+def test_first_load_failure_raises():
+    load = Loader()
+    load.fail = True
+    with pytest.raises(ConnectionError):
+        FrameCache().get("items", load)
+
+def test_concurrent_misses_share_one_load():
+    c, load = FrameCache(), Loader(delay=0.2)
+    start = threading.Barrier(8)
+    results = []
+
+    def read():
+        start.wait()
+        results.append(len(c.get("items", load)))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert load.calls == 1
+    assert results == [3] * 8
+
+def test_peek_does_not_load():
+    c = FrameCache()
+    assert c.peek("items") is None
+    assert not c.fresh("items")
+
+# ---------------- Deltas ----------------
+def test_upsert_updates_and_inserts_in_sort_order(cache):
+    seen = _events(cache)
+    assert cache.upsert("items", [{"id": 2, "quantity": 7}, {"id": 4, "item": "Cable", "quantity": 30}])
+    df = cache.peek("items")
+    assert df["item"].tolist() == ["Battery", "Cable", "Inverter", "Panel"]
+    assert df.set_index("id")["quantity"].to_dict() == {1: 5, 4: 30, 2: 7, 3: 10}
+    assert seen == [(2, "upsert", [{"id": 2, "quantity": 7}, {"id": 4, "item": "Cable", "quantity": 30}])]
+
+def test_upsert_ignores_rows_without_id(cache):
+    assert not cache.upsert("items", [{"item": "No id"}])
+    assert not cache.upsert("items", None)
+    assert cache.version("items") == 1
+
+def test_remove(cache):
+    seen = _events(cache)
+    assert cache.remove("items", [1, 3])
+    assert cache.peek("items")["id"].tolist() == [2]
+    assert seen == [(2, "remove", ("id", [1, 3]))]
+    assert not cache.remove("items", [])
+
+def test_adjust(cache):
+    seen = _events(cache)
+    assert cache.adjust("items", "quantity", -2, "item", "Panel")
+    assert cache.peek("items").set_index("item")["quantity"]["Panel"] == 8
+    assert seen == [(2, "adjust", ("quantity", -2, "item", "Panel"))]
+
+def test_clear_keeps_columns(cache):
+    seen = _events(cache)
+    assert cache.clear("items")
+    df = cache.peek("items")
+    assert df.empty and list(df.columns) == ["id", "item", "quantity"]
+    assert seen == [(2, "clear", None)]
+
+def test_deltas_on_uncached_key_are_no_ops():
+    c = FrameCache()
+    seen = _events(c, "sales")
+    assert not c.upsert("sales", [{"id": 1}])
+    assert not c.remove("sales", [1])
+    assert not c.adjust("sales", "quantity", 1, "id", 1)
+    assert seen == [] and c.version("sales") == 0
+
+def test_deltas_keep_the_load_time():
+    c, load = FrameCache(ttl=0.2), Loader()
+    c.get("items", load)
+    time.sleep(0.25)
+    c.upsert("items", [{"id": 1, "quantity": 6}])
+    assert not c.fresh("items")
+    c.get("items", load)
+    assert load.calls == 2
+
+def test_invalidate(cache):
+    seen = _events(cache)
+    cache.invalidate("items")
+    assert cache.peek("items") is None
+    assert seen == [(2, "invalidate", None)]
+    cache.invalidate()
+    assert cache.version("items") == 2   # nothing cached left to bump
+
+def test_listener_errors_do_not_break_writes(cache):
+    def broken(*args):
+        raise RuntimeError("listener bug")
+
+    cache.subscribe("items", broken)
+    seen = _events(cache)
+    assert cache.remove("items", [2])
+    assert cache.peek("items")["id"].tolist() == [1, 3]
+    assert [e for _, e, _ in seen] == ["remove"]
+
+def test_reload_notifies_load_with_the_frame():
+    c, load = FrameCache(ttl=0), Loader()
+    frames = []
+    c.subscribe("items", lambda version, event, payload, frame: frames.append((version, event, len(frame))))
+    c.get("items", load)
+    c.get("items", load)
+    assert frames == [(1, "load", 3), (2, "load", 3)]
@@ -0,0 +1,154 @@
+import httpx
+import pandas as pd
+import pytest
+
+import db_supabase
+import importer
+from importer import _not_sent, import_file, main, upload_batches, with_retry
+
+class FakeBackend:
+    """Stands in for the db_supabase write functions used by the importer."""
+
+    def __init__(self, existing=None):
+        self.upserts, self.inserts, self.calls = [], [], 0
+        self.existing = existing if existing is not None else pd.DataFrame(columns=["id", "name", "phone", "email"])
+        self.fail = {}   # customer name -> exceptions raised on successive attempts
+
+    def upsert_items(self, records, batch_size=500):
+        self.upserts.append(list(records))
+
+    def insert_customers(self, records):
+        self.calls += 1
+        errors = self.fail.get(records[0]["name"])
+        if errors:
+            raise errors.pop(0)
+        self.inserts.append(list(records))
+        return records
+
+    def existing_customers(self):
+        return self.existing
+
+@pytest.fixture
+def backend(monkeypatch):
+    fake = FakeBackend()
+    monkeypatch.setattr(db_supabase, "upsert_items", fake.upsert_items)
+    monkeypatch.setattr(db_supabase, "insert_customers", fake.insert_customers)
+    monkeypatch.setattr(db_supabase, "existing_customers", fake.existing_customers)
+    monkeypatch.setattr(importer.time, "sleep", lambda s: None)
+    return fake
+
+def _items_csv(tmp_path, rows):
+    path = tmp_path / "items.csv"
+    pd.DataFrame(rows, columns=["item", "category", "quantity", "unit_cost", "selling_price"]).to_csv(path, index=False)
+    return str(path)
+
+def _customers_csv(tmp_path, rows):
+    path = tmp_path / "customers.csv"
+    pd.DataFrame(rows, columns=["name", "phone", "email", "address"]).to_csv(path, index=False)
+    return str(path)
+
+# ---------------- Batching ----------------
+def test_items_are_split_into_batches(tmp_path, backend):
+    path = _items_csv(tmp_path, [(f"Item {i}", "Cat", i, "1", "2") for i in range(7)])
+    stats, errors = import_file("items", path, batch_size=3, workers=2)
+    assert sorted(len(b) for b in backend.upserts) == [1, 3, 3]
+    assert (stats.rows_total, stats.rows_ok, stats.batches) == (7, 7, 3)
+    assert errors == []
+
+def test_file_chunks_are_streamed_and_the_last_repeat_wins(tmp_path, backend, monkeypatch):
+    path = _items_csv(tmp_path, [("Panel", "Mono", 1, "1", "2"), ("Cable", "Wire", 2, "1", "2"),
+                                 ("Panel", "Mono", 3, "1", "2"), ("Panel", "Mono", 9, "1", "2")])
+    read = importer.read_frames
+    monkeypatch.setattr(importer, "read_frames", lambda p, sheet=None: read(p, sheet, chunk_rows=2))
+    stats, errors = import_file("items", path, batch_size=10, workers=4)
+    # One batch per file chunk; the repeat in the second chunk is sent after the first chunk landed
+    assert [[(r["item"], r["quantity"]) for r in b] for b in backend.upserts] == [
+        [("Panel", 1), ("Cable", 2)], [("Panel", 9)]]
+    assert errors == [(None, "2 duplicate (item, category) rows collapsed to the last occurrence")]
+
+def test_barrier_waits_for_batches_in_flight():
+    order = []
+
+    def send(batch):
+        order.append(batch[0])
+
+    stats = upload_batches(iter([["a"], ["b"], None, ["c"]]), send, workers=4)
+    assert order.index("c") == 2 and stats.batches == 3
+
+def test_rows_without_a_name_are_reported(tmp_path, backend):
+    path = _items_csv(tmp_path, [("", "Cat", 1, "1", "2"), ("Panel", "Mono", 1, "1", "2")])
+    stats, errors = import_file("items", path)
+    assert errors == [(1, "Missing item name")] and stats.rows_skipped == 1
+
+def test_missing_columns_fail_before_any_write(tmp_path, backend):
+    path = tmp_path / "bad.csv"
+    pd.DataFrame({"item": ["Panel"]}).to_csv(path, index=False)
+    with pytest.raises(ValueError, match="Missing required columns"):
+        import_file("items", str(path))
+    assert backend.upserts == []
+
+# ---------------- Retries ----------------
+def test_item_upserts_retry_transient_errors():
+    attempts = []
+
+    def send():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise httpx.ReadTimeout("slow")
+        return "ok"
+
+    assert with_retry(send, retries=3, backoff=0) == "ok" and len(attempts) == 3
+
+def test_customer_insert_is_not_retried_after_a_timeout(tmp_path, backend):
+    backend.fail["ROSA DIAZ"] = [httpx.ReadTimeout("timed out")]
+    path = _customers_csv(tmp_path, [("Rosa Diaz", "", "", "")])
+    stats, _ = import_file("customers", path, batch_size=1)
+    assert backend.calls == 1 and backend.inserts == []
+    assert (stats.rows_failed, stats.retries) == (1, 0)
+
+def test_customer_insert_is_retried_when_never_sent(tmp_path, backend):
+    from transport import BackendUnavailable
+
+    backend.fail["ROSA DIAZ"] = [httpx.ConnectError("refused"), BackendUnavailable("circuit open")]
+    path = _customers_csv(tmp_path, [("Rosa Diaz", "", "", "")])
+    stats, _ = import_file("customers", path, batch_size=1)
+    assert backend.calls == 3 and len(backend.inserts) == 1
+    assert (stats.rows_ok, stats.retries) == (1, 2)
+
+def test_not_sent_classification():
+    assert _not_sent(httpx.ConnectTimeout("x"))
+    assert not _not_sent(httpx.ReadTimeout("x"))
+    assert not _not_sent(ValueError("x"))
+
+# ---------------- CLI ----------------
+def test_dry_run_writes_nothing(tmp_path, backend, capsys):
+    path = _items_csv(tmp_path, [("Panel", "Mono", 1, "1", "2"), ("", "Mono", 1, "1", "2")])
+    assert main(["items", "--file", path, "--dry-run", "--quiet"]) == 0
+    assert backend.upserts == []
+    assert "dry run: 1 rows valid, 1 skipped" in capsys.readouterr().out
+
+def test_skip_duplicates(tmp_path, backend, capsys):
+    backend.existing = pd.DataFrame({"id": [7], "name": ["ANNA LIM"], "phone": ["09175551234"], "email": [""]})
+    path = _customers_csv(tmp_path, [("Ana Lim", "0917-555-1234", "", ""), ("Rosa Diaz", "09991234567", "", ""),
+                                     ("Rosa M Diaz", "+63 999 123 4567", "", ""), ("Anna Lim", "", "", "")])
+    assert main(["customers", "--file", path, "--skip-duplicates", "--quiet"]) == 0
+    assert [r["name"] for b in backend.inserts for r in b] == ["ROSA DIAZ"]
+    out = capsys.readouterr().out
+    assert "Skipped ANA LIM: likely duplicate of #7 ANNA LIM" in out
+    assert "Skipped ROSA M DIAZ: likely duplicate of an earlier row in this file" in out
+    assert "1 customers already exist and were skipped" in out
+
+def test_without_skip_duplicates_only_exact_names_are_skipped(tmp_path, backend):
+    backend.existing = pd.DataFrame({"id": [7], "name": ["ANNA LIM"], "phone": ["09175551234"], "email": [""]})
+    path = _customers_csv(tmp_path, [("Ana Lim", "0917-555-1234", "", ""), ("Anna Lim", "", "", "")])
+    main(["customers", "--file", path, "--quiet"])
+    assert [r["name"] for b in backend.inserts for r in b] == ["ANA LIM"]
+
+def test_failed_rows_give_a_non_zero_exit(tmp_path, backend, capsys):
+    backend.fail["ROSA DIAZ"] = [httpx.ReadTimeout("timed out")]
+    path = _customers_csv(tmp_path, [("Rosa Diaz", "", "", ""), ("Pedro Reyes", "", "", "")])
+    assert main(["customers", "--file", path, "--batch-size", "1", "--quiet"]) == 1
+    assert "failed: timed out" in capsys.readouterr().out
+
+def test_unreadable_file_exits_with_2(tmp_path, backend):
+    assert main(["items", "--file", str(tmp_path / "feed.txt"), "--quiet"]) == 2
@@ -0,0 +1,113 @@
+import os
+import threading
+
+import pytest
+
+import jobs
+from jobs import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobRunner, JobStore
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_FILES_DIR", str(tmp_path / "job_files"))
+    return JobStore(str(tmp_path / "jobs.db"))
+
+@pytest.fixture
+def handlers(monkeypatch):
+    def register(kind, fn):
+        monkeypatch.setitem(jobs._HANDLERS, kind, fn)
+    return register
+
+def _finish(runner):
+    runner.pool.shutdown(wait=True)
+
+def test_job_runs_and_reports_its_result(store, handlers):
+    handlers("double", lambda ctx, params: {"value": params["n"] * 2})
+    runner = JobRunner(store)
+    job_id = runner.submit("double", {"n": 21}, user="ana")
+    _finish(runner)
+    row = store.get(job_id)
+    assert (row["status"], row["result"], row["progress"], row["submitted_by"]) == (SUCCEEDED, {"value": 42}, 1.0, "ana")
+
+def test_unknown_kind_is_rejected(store):
+    with pytest.raises(ValueError, match="Unknown job kind"):
+        JobRunner(store).submit("nope", {})
+
+def test_failing_job_records_the_error(store, handlers):
+    def boom(ctx, params):
+        raise RuntimeError("backend down")
+
+    handlers("boom", boom)
+    runner = JobRunner(store)
+    job_id = runner.submit("boom", {})
+    _finish(runner)
+    row = store.get(job_id)
+    assert row["status"] == FAILED and row["error"].startswith("backend down")
+    assert row["finished_at"]
+
+def test_cancel_stops_a_running_job_at_its_next_check(store, handlers):
+    started, release = threading.Event(), threading.Event()
+
+    def slow(ctx, params):
+        started.set()
+        release.wait(5)
+        ctx.raise_if_cancelled()
+        return {"done": True}
+
+    handlers("slow", slow)
+    runner = JobRunner(store)
+    job_id = runner.submit("slow", {})
+    started.wait(5)
+    runner.cancel(job_id)
+    release.set()
+    _finish(runner)
+    assert store.get(job_id)["status"] == CANCELLED
+
+def test_cancelled_queued_job_never_starts(store, handlers):
+    release, ran = threading.Event(), []
+    handlers("block", lambda ctx, params: release.wait(5) and {})
+    handlers("record", lambda ctx, params: ran.append(1) or {})
+    runner = JobRunner(store, workers=1)
+    runner.submit("block", {})
+    queued = runner.submit("record", {})
+    runner.cancel(queued)
+    release.set()
+    _finish(runner)
+    row = store.get(queued)
+    assert row["status"] == CANCELLED and row["started_at"] is None and ran == []
+
+def test_jobs_left_running_are_failed_on_the_next_start(store):
+    store.create("aaa", "import_items", {}, "")
+    store.create("bbb", "import_items", {}, "")
+    store.update("bbb", status=RUNNING)
+    store.create("ccc", "import_items", {}, "")
+    store.update("ccc", status=SUCCEEDED)
+    JobRunner(store)
+    status = {j["id"]: (j["status"], j["error"]) for j in store.recent()}
+    assert status["aaa"] == status["bbb"] == (FAILED, "Interrupted by server restart")
+    assert status["ccc"] == (SUCCEEDED, None)
+
+# ---------------- Artifacts ----------------
+def _artifact(store, job_id, name, status, finished_at):
+    store.create(job_id, "soa", {}, "")
+    store.update(job_id, status=status, finished_at=finished_at)
+    path = jobs.JobContext(store, job_id).artifact_path(name)
+    open(path, "wb").close()
+    return path
+
+def test_old_artifacts_are_pruned_on_start(store):
+    old = _artifact(store, "old1", "statement.pdf", SUCCEEDED, "2020-01-01T00:00:00+00:00")
+    failed = _artifact(store, "old2", "partial.pdf", FAILED, "2020-01-01T00:00:00+00:00")
+    recent = _artifact(store, "new1", "statement.pdf", SUCCEEDED, jobs._now())
+    queued = _artifact(store, "wait1", "upload.csv", QUEUED, None)
+    upload = os.path.join(jobs.JOB_FILES_DIR, "upload_abc.csv")
+    open(upload, "wb").close()
+    runner = JobRunner(store)
+    assert not os.path.exists(old) and not os.path.exists(failed)
+    assert os.path.exists(recent) and os.path.exists(upload)
+    assert store.get("wait1")["status"] == FAILED   # interrupted now, so its file is kept for this run
+    assert os.path.exists(queued)
+    store.update("new1", finished_at="2020-01-01T00:00:00+00:00")
+    assert runner.prune_artifacts() == 1 and not os.path.exists(recent)
+
+def test_prune_without_a_files_dir(store):
+    assert JobRunner(store).prune_artifacts() == 0
@@ -0,0 +1,53 @@
+def _movements(conn, item_id):
+    return [(r["kind"], r["quantity"]) for r in conn.execute(
+        "SELECT kind, quantity FROM stock_movements WHERE item_id = ? ORDER BY id", (item_id,))]
+
+def _lots(conn, item_id):
+    return [(r["kind"], r["quantity"], r["qty_remaining"]) for r in conn.execute(
+        "SELECT kind, quantity, qty_remaining FROM stock_lots WHERE item_id = ? ORDER BY id", (item_id,))]
+
+def _add(conn, quantity, unit_cost=10.0):
+    return conn.execute("INSERT INTO items (item, category, quantity, unit_cost) VALUES ('Panel', 'Mono', ?, ?)",
+                        (quantity, unit_cost)).lastrowid
+
+def _set(conn, item_id, quantity, unit_cost=None):
+    if unit_cost is None:
+        conn.execute("UPDATE items SET quantity = ? WHERE id = ?", (quantity, item_id))
+    else:
+        conn.execute("UPDATE items SET quantity = ?, unit_cost = ? WHERE id = ?", (quantity, unit_cost, item_id))
+
+# ---------------- Movements ----------------
+def test_every_quantity_change_is_recorded(migrated_db):
+    item_id = _add(migrated_db, 10)
+    _set(migrated_db, item_id, 7)
+    _set(migrated_db, item_id, 12)
+    migrated_db.execute("UPDATE items SET unit_cost = 11 WHERE id = ?", (item_id,))   # no quantity change
+    migrated_db.execute("DELETE FROM items WHERE id = ?", (item_id,))
+    assert _movements(migrated_db, item_id) == [("receipt", 10), ("issue", -3), ("receipt", 5), ("delete", -12)]
+
+def test_movements_replay_to_the_current_quantity(migrated_db):
+    item_id = _add(migrated_db, 0)
+    for q in (5, 2, 9, 9, 0, 4):
+        _set(migrated_db, item_id, q)
+    total = migrated_db.execute("SELECT SUM(quantity) FROM stock_movements WHERE item_id = ?", (item_id,)).fetchone()[0]
+    assert total == 4
+    assert ("receipt", 0) not in _movements(migrated_db, item_id)
+
+# ---------------- Lots ----------------
+def test_decreases_consume_the_oldest_lots_first(migrated_db):
+    item_id = _add(migrated_db, 5, 10.0)
+    _set(migrated_db, item_id, 8, 12.0)       # receive 3 @ 12
+    _set(migrated_db, item_id, 6)             # issue 2 from the first lot
+    assert _lots(migrated_db, item_id) == [("receipt", 5, 3), ("receipt", 3, 3)]
+    _set(migrated_db, item_id, 2)             # first lot empty, 1 left of the second
+    assert _lots(migrated_db, item_id) == [("receipt", 5, 0), ("receipt", 3, 2)]
+
+def test_deleting_an_item_closes_its_lots(migrated_db):
+    item_id = _add(migrated_db, 5)
+    migrated_db.execute("DELETE FROM items WHERE id = ?", (item_id,))
+    assert _lots(migrated_db, item_id) == [("receipt", 5, 0)]
+
+def test_going_negative_empties_every_lot(migrated_db):
+    item_id = _add(migrated_db, 5)
+    _set(migrated_db, item_id, -2)
+    assert _lots(migrated_db, item_id) == [("receipt", 5, 0)]
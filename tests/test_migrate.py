@@ -0,0 +1,46 @@
+import os
+import sqlite3
+
+import pytest
+
+import migrate
+from migrate import apply_sqlite, check_sqlite, migration_files, pending_sqlite
+
+VERSIONS = [v for v, _ in migration_files("sqlite")]
+
+def _tables(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+
+def test_pending_on_a_fresh_schema_is_read_only(schema_db):
+    assert pending_sqlite(schema_db) == VERSIONS
+    assert "schema_migrations" not in _tables(schema_db)
+
+def test_pending_for_a_missing_file_does_not_create_it(tmp_path):
+    path = str(tmp_path / "missing.db")
+    assert pending_sqlite(path) == VERSIONS
+    assert not os.path.exists(path)
+
+def test_apply_runs_every_migration_once(schema_db):
+    assert apply_sqlite(schema_db) == VERSIONS
+    assert pending_sqlite(schema_db) == []
+    assert apply_sqlite(schema_db) == []
+    assert check_sqlite(schema_db) == set()
+    assert {"stock_movements", "sales_daily", "stock_lots"} <= _tables(schema_db)
+
+def test_check_reports_missing_indexes(schema_db):
+    assert "idx_sales_date" in check_sqlite(schema_db)
+
+def test_a_failing_migration_is_rolled_back(schema_db, tmp_path, monkeypatch):
+    (tmp_path / "sqlite").mkdir()
+    (tmp_path / "sqlite" / "0001_ok.sql").write_text("CREATE TABLE ok_table (x INTEGER);")
+    (tmp_path / "sqlite" / "0002_bad.sql").write_text("CREATE TABLE half_done (x INTEGER);\nINSERT INTO nope VALUES (1);")
+    monkeypatch.setattr(migrate, "MIGRATIONS_DIR", str(tmp_path))
+    with pytest.raises(sqlite3.OperationalError, match="nope"):
+        apply_sqlite(schema_db)
+    tables = _tables(schema_db)
+    assert "ok_table" in tables and "half_done" not in tables
+    assert pending_sqlite(schema_db) == ["0002"]
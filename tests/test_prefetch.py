@@ -0,0 +1,105 @@
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+import prefetch
+from frame_cache import FrameCache
+from prefetch import DEFAULT_TRANSITIONS, LEARN_MIN_COUNT, PAGE_LOADS, Prefetcher, load_transitions
+
+@pytest.fixture
+def cache(monkeypatch):
+    c = FrameCache()
+    monkeypatch.setattr(prefetch, "get_frame_cache", lambda: c)
+    return c
+
+@pytest.fixture
+def loads(cache, monkeypatch):
+    """Replaces every loader with one that records its name."""
+    seen, lock = [], threading.Lock()
+
+    def loader(name):
+        def run():
+            with lock:
+                seen.append(name)
+        return run
+
+    monkeypatch.setattr(prefetch, "LOADERS", {name: loader(name) for name in prefetch.LOADERS})
+    return seen
+
+def _done(p):
+    p.pool.shutdown(wait=True)
+
+# ---------------- Prediction ----------------
+def test_configured_successors_come_first_then_learned_ones():
+    p = Prefetcher(DEFAULT_TRANSITIONS)
+    for _ in range(LEARN_MIN_COUNT - 1):
+        p.learn("View Inventory", "Scan Stock")
+    assert p.predict("View Inventory") == ["Add/Update Stock"]
+    p.learn("View Inventory", "Scan Stock")
+    p.learn("View Inventory", "View Inventory")
+    assert p.predict("View Inventory") == ["Add/Update Stock", "Scan Stock"]
+
+def test_prediction_is_capped_at_the_fanout():
+    p = Prefetcher({"pages": {"Home": ["A", "B", "C", "D"]}})
+    assert p.predict("Home") == ["A", "B", "C"]
+
+def test_navigation_learns_page_changes_only():
+    p = Prefetcher(DEFAULT_TRANSITIONS)
+    p.navigate("Inventory", "Inventory", "View Inventory", "View Inventory")
+    p.navigate("Inventory", "Inventory", "View Inventory", "Scan Stock")
+    p.navigate("Inventory", "Inventory", "Scan Stock", "Logout")   # not a page with loads
+    assert dict(p._learned) == {"View Inventory": {"Scan Stock": 1}}
+
+def test_transitions_file_replaces_entries(tmp_path):
+    path = tmp_path / "map.json"
+    path.write_text(json.dumps({"login": ["Stock Alerts"]}))
+    transitions = load_transitions(str(path))
+    assert transitions["login"] == ["Stock Alerts"]
+    assert transitions["pages"] == DEFAULT_TRANSITIONS["pages"]
+    assert load_transitions("") == DEFAULT_TRANSITIONS
+
+# ---------------- Warming ----------------
+def test_login_warms_home_and_its_successors(loads):
+    p = Prefetcher({"login": ["Home"], "pages": {"Home": ["View Customers"]}})
+    p.after_login()
+    _done(p)
+    assert sorted(loads) == sorted(set(PAGE_LOADS["Home"] + PAGE_LOADS["View Customers"]))
+
+def test_section_change_warms_the_section_but_not_the_current_page(loads):
+    p = Prefetcher(DEFAULT_TRANSITIONS)
+    p.navigate("Inventory", "Customer", "View Inventory", "View Customers")
+    _done(p)
+    # View Customers is the page being rendered; Record Installations and the SOA page are warmed
+    assert sorted(loads) == sorted(set(PAGE_LOADS["Record Installations"] + PAGE_LOADS["Customer Statement of Account"]))
+
+def test_fresh_frames_are_not_reloaded(cache, loads):
+    cache.get("items", lambda: pd.DataFrame({"id": [1]}))
+    p = Prefetcher({})
+    p.warm(["Scan Stock"])
+    _done(p)
+    assert loads == ["catalog"] and p.stats["fresh"] == 1
+
+def test_a_burst_of_warms_is_bounded(cache, monkeypatch):
+    release = threading.Event()
+    calls = []
+    monkeypatch.setattr(prefetch, "LOADERS", {n: (lambda n=n: calls.append(n) or release.wait(5)) for n in prefetch.LOADERS})
+    monkeypatch.setattr(prefetch, "PREFETCH_MAX_PENDING", 2)
+    p = Prefetcher({}, workers=1)
+    p.warm(["Record Installations"])   # five loads
+    p.warm(["Record Installations"])   # already pending or dropped, never queued twice
+    release.set()
+    _done(p)
+    assert p.stats["submitted"] == 2 and p.stats["dropped"] == 6
+    assert len(calls) == 2 and p._pending == set()
+
+def test_failed_warm_is_counted_and_released(cache, monkeypatch):
+    def boom():
+        raise RuntimeError("backend down")
+
+    monkeypatch.setattr(prefetch, "LOADERS", {"sales": boom})
+    p = Prefetcher({})
+    p.warm(["Profit/Loss Report"])
+    _done(p)
+    assert p.stats["failed"] == 1 and p._pending == set()
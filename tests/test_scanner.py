@@ -0,0 +1,60 @@
+import math
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyzbar.pyzbar", exc_type=ImportError)   # also needs the zbar library
+
+import db_supabase
+from scanner import build_code_index, receive_counts, resolve_code, tally
+
+ITEMS = pd.DataFrame({
+    "id": [1, 2, 3],
+    "item": ["Panel", "Panel", "Inverter"],
+    "category": ["Mono", "Poly", "Hybrid"],
+    "barcode": ["4800001", None, " inv-5kw "],
+    "unit_cost": [100.0, float("nan"), 250.0],
+    "selling_price": [150.0, 140.0, None],
+    "unit": ["pc", float("nan"), None],
+})
+
+# ---------------- Code -> item ----------------
+def test_resolve_code_prefers_the_barcode_then_the_id_label():
+    index = build_code_index(ITEMS)
+    known = {1, 2, 3}
+    assert index == {"4800001": 1, "INV-5KW": 3}
+    assert resolve_code(" inv-5KW", index, known) == 3
+    assert resolve_code("item-2", index, known) == 2
+    assert resolve_code("ITEM:2", index, known) == 2
+    assert resolve_code("2", index, known) == 2
+    assert resolve_code("ITEM-99", index, known) is None
+    assert resolve_code("Panel", index, known) is None   # names are ambiguous and never indexed
+
+def test_tally_counts_every_label_and_reports_unknown_codes():
+    counts, unknown = tally([["4800001", "4800001", "ITEM-3"], [], ["2", "ITEM-99", "ITEM-99"]], ITEMS)
+    assert counts == {1: 2, 3: 1, 2: 1}
+    assert unknown == {"ITEM-99": 2}
+
+def test_tally_without_items():
+    counts, unknown = tally([["ITEM-1"]], ITEMS.iloc[0:0])
+    assert not counts and unknown == {"ITEM-1": 1}
+
+# ---------------- Applying ----------------
+def test_receive_counts_never_passes_nan(monkeypatch):
+    calls = {}
+
+    def add_or_update_item(item, category, quantity, unit_cost, selling_price, unit, user):
+        calls[category] = (quantity, unit_cost, selling_price, unit)
+
+    monkeypatch.setattr(db_supabase, "add_or_update_item", add_or_update_item)
+    results = receive_counts({1: 2, 2: 3, 3: 1}, ITEMS, "tester")
+    assert sorted(r[2] for r in results) == ["Received 1", "Received 2", "Received 3"]
+    assert calls == {"Mono": (2, 100.0, 150.0, "pc"), "Poly": (3, 0.0, 140.0, ""), "Hybrid": (1, 250.0, 0.0, "")}
+    assert not any(isinstance(v, float) and math.isnan(v) for c in calls.values() for v in c)
+
+def test_receive_counts_reports_errors_per_item(monkeypatch):
+    def add_or_update_item(*args):
+        raise RuntimeError("backend down")
+
+    monkeypatch.setattr(db_supabase, "add_or_update_item", add_or_update_item)
+    assert receive_counts({1: 2}, ITEMS, "tester") == [(1, 2, "Error: backend down")]
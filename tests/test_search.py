@@ -0,0 +1,184 @@
+import pandas as pd
+import pytest
+
+import search
+from frame_cache import FrameCache
+from search import SearchIndex, _customer_rows, _item_rows, normalize
+
+CUSTOMERS = pd.DataFrame({
+    "id": [1, 2, 3, 4, 5],
+    "name": ["JUAN DELA CRUZ", "MARIA SANTOS", "JOSÉ RIZAL", "ANA CRUZADO", "PEDRO JUANITO"],
+    "phone": ["0917-123-4567", "09181112222", None, "", "0922 333 4444"],
+    "email": ["juan@example.com", "", "jose@example.com", None, ""],
+})
+
+ITEMS = pd.DataFrame({
+    "id": [10, 11, 12],
+    "item": ["Solar Panel 450W", "Inverter 5kW", "Panel Clamp"],
+    "category": ["Panels", "Inverters", "Mounting"],
+    "quantity": [12, 3, 40],
+    "barcode": ["4800001", None, "4800003"],
+})
+
+def _index(df=CUSTOMERS, rows=_customer_rows, version=1) -> SearchIndex:
+    index = SearchIndex()
+    index.sync(version, *rows(df))
+    return index
+
+def _built(df=CUSTOMERS, version=1) -> SearchIndex:
+    """An index whose rows are in the trigram base rather than the delta."""
+    index = SearchIndex()
+    index._build(*_customer_rows(df))
+    index.version = version
+    return index
+
+def _ids(results):
+    return [i for i, _ in results]
+
+def test_normalize_strips_accents_case_and_spacing():
+    assert normalize("  José   RIZAL ") == "jose rizal"
+
+def test_customer_search_by_name_prefix_and_substring():
+    index = _index()
+    # Name prefix ranks before a later word start and a plain substring
+    assert _ids(index.search("juan")) == [1, 5]
+    assert _ids(index.search("cruz")) == [4, 1]
+    assert _ids(index.search("ruz")) == [4, 1]
+
+def test_customer_search_by_phone_digits_and_email():
+    index = _index()
+    assert _ids(index.search("09171234567")) == [1]
+    assert _ids(index.search("0917-123")) == [1]
+    assert _ids(index.search("jose@example")) == [3]
+
+def test_accented_name_matches_plain_query():
+    assert _ids(_index().search("jose riz")) == [3]
+
+def test_short_queries_match_word_starts_only():
+    index = _index()
+    assert set(_ids(index.search("j"))) == {1, 3, 5}
+    assert _ids(index.search("sa")) == [2]
+    assert index.search("ua") == []
+
+def test_results_carry_ids_and_labels():
+    results = _index().search("maria")
+    assert results == [(2, "MARIA SANTOS · 09181112222")]
+
+def test_limit_and_empty_query():
+    index = _index()
+    assert len(index.search("j", limit=2)) == 2
+    assert _ids(index.search("", limit=3)) == [1, 2, 3]
+    assert index.search("zzz") == []
+
+def test_item_search_by_name_category_and_barcode():
+    index = _index(ITEMS, _item_rows)
+    assert _ids(index.search("panel")) == [12, 10]
+    assert _ids(index.search("inverters")) == [11]
+    assert _ids(index.search("4800003")) == [12]
+    assert index.search("inverter")[0] == (11, "Inverter 5kW (Inverters) · 3 on hand")
+
+def test_title():
+    index = _index()
+    assert index.title(2) == "MARIA SANTOS"
+    assert index.title(99) is None
+
+def test_sync_same_version_is_a_no_op():
+    index = _index()
+    index.sync(1, *_customer_rows(CUSTOMERS.iloc[:1]))
+    assert len(index.search("", limit=10)) == 5
+
+# ---------------- Writes and deletes ----------------
+def test_small_first_sync_is_served_from_the_delta():
+    index = _index()
+    assert sorted(index.delta) == [1, 2, 3, 4, 5]
+    assert _ids(index.search("juan")) == [1, 5]
+
+def test_sync_applies_inserts_updates_and_deletes_as_delta():
+    index = _built()
+    df = CUSTOMERS.copy()
+    df.loc[df["id"] == 2, "name"] = "MARIA REYES"
+    df = df[df["id"] != 3]
+    df = pd.concat([df, pd.DataFrame([{"id": 6, "name": "JUANA LIM", "phone": "", "email": ""}])],
+                   ignore_index=True)
+    index.sync(2, *_customer_rows(df))
+
+    assert index.delta.keys() == {2, 6}
+    assert index.tombstones == {2, 3}
+    assert _ids(index.search("santos")) == []
+    assert _ids(index.search("reyes")) == [2]
+    assert _ids(index.search("rizal")) == []
+    assert index.title(3) is None
+    # Both start with the query; the shorter title ranks first
+    assert _ids(index.search("juan")) == [6, 1, 5]
+    assert set(_ids(index.search("", limit=10))) == {1, 2, 4, 5, 6}
+
+def test_sync_rebuilds_when_delta_outgrows_limit(monkeypatch):
+    monkeypatch.setattr(search, "DELTA_LIMIT", 1)
+    index = _built()
+    index.sync(2, *_customer_rows(CUSTOMERS[CUSTOMERS["id"] > 2]))
+    assert index.delta == {} and index.tombstones == set()
+    assert sorted(index.row_of) == [3, 4, 5]
+    assert _ids(index.search("juan")) == [5]
+
+def test_index_follows_frame_cache_writes():
+    cache = FrameCache()
+    cache.get("customers", lambda: CUSTOMERS.copy(), sort_by="name")
+    index = _built(CUSTOMERS.sort_values("name"), version=cache.version("customers"))
+
+    def sync():
+        index.sync(cache.version("customers"), *_customer_rows(cache.peek("customers")))
+
+    sync()
+    cache.upsert("customers", [{"id": 7, "name": "ROSA DIAZ", "phone": "09991234567", "email": ""}])
+    sync()
+    assert _ids(index.search("rosa")) == [7]
+    assert _ids(index.search("0999123")) == [7]
+
+    cache.remove("customers", [7, 1])
+    sync()
+    assert index.search("rosa") == []
+    assert _ids(index.search("juan")) == [5]
+
+    cache.clear("customers")
+    sync()
+    assert index.search("") == []
+
+def test_search_index_reads_the_frame_only_when_it_changed(monkeypatch):
+    cache, index, views = FrameCache(), SearchIndex(), []
+
+    def view_customers():
+        views.append(1)
+        return cache.get("customers", lambda: CUSTOMERS.copy(), sort_by="name")
+
+    monkeypatch.setattr(search, "get_frame_cache", lambda: cache)
+    monkeypatch.setattr(search, "get_search_index", lambda kind: index)
+    monkeypatch.setitem(search._SOURCES, "customers", (view_customers, _customer_rows))
+
+    assert _ids(search.search("customers", "maria")) == [2]
+    search.search("customers", "mar")
+    assert len(views) == 1
+
+    cache.upsert("customers", [{"id": 7, "name": "ROSA DIAZ", "phone": "", "email": ""}])
+    assert _ids(search.search("customers", "rosa")) == [7]
+    assert len(views) == 2
+
+    cache.ttl = 0   # an expired frame is reloaded through view()
+    search.search("customers", "rosa")
+    assert len(views) == 3
+
+def test_search_among_50k_customers():
+    n = 50_000
+    df = pd.DataFrame({
+        "id": range(1, n + 1),
+        "name": [f"CUSTOMER {i:05d}" for i in range(n)],
+        "phone": [f"0917{i:07d}" for i in range(n)],
+        "email": [""] * n,
+    })
+    index = _index(df)
+    assert _ids(index.search("customer 04242")) == [4243]
+    assert _ids(index.search("09170012345")) == [12346]
+    assert len(index.search("customer", limit=20)) == 20
+
+@pytest.mark.parametrize("query", ["", "   ", "!!"])
+def test_blank_or_symbol_queries_do_not_fail(query):
+    assert isinstance(_index().search(query), list)
@@ -0,0 +1,105 @@
+import pytest
+
+starlette = pytest.importorskip("starlette")
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+
+import service
+
+class Result:
+    def __init__(self, data=None, count=None):
+        self.data = data if data is not None else []
+        self.count = count
+
+class Query:
+    """Records the builder calls of one PostgREST query."""
+
+    def __init__(self, log, *call):
+        self.log = log
+        self.calls = [call]
+        log.append(self.calls)
+
+    def __getattr__(self, name):
+        def step(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return step
+
+class FakeClient:
+    def __init__(self):
+        self.log = []
+
+    def table(self, name):
+        return Query(self.log, "table", name)
+
+    def rpc(self, name, params):
+        return Query(self.log, "rpc", name, params)
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+
+    async def run(query):
+        return Result([{"id": 1}], count=1)
+
+    monkeypatch.setattr(service.backend, "client", fake)
+    monkeypatch.setattr(service.backend, "run", run)
+    with TestClient(Starlette(routes=service.routes)) as c:
+        c.fake = fake
+        yield c
+
+def _eq_filters(query):
+    return [args for name, args, _ in query[1:] if name == "eq"]
+
+def test_delete_item_uses_the_route_id_not_the_query_string(client):
+    assert client.delete("/items/3?item_id=7").status_code == 200
+    assert client.fake.log[-1][0] == ("rpc", "delete_item_with_audit", {"p_item_id": 3, "p_user": "api"})
+
+def test_delete_installation_uses_the_route_id(client):
+    assert client.delete("/installations/5?installation_id=9").json() == {"deleted": 5}
+    assert _eq_filters(client.fake.log[-1]) == [("id", 5)]
+
+def test_list_filters_come_from_the_query_string(client):
+    assert client.get("/sales?customer_id=12").status_code == 200
+    assert ("customer_id", 12) in _eq_filters(client.fake.log[-1])
+    assert client.get("/sales?customer_id=x").status_code == 400
+
+@pytest.mark.parametrize("path, body, error", [
+    ("/items", {"item": "Panel", "quantity": 1, "unit_cost": "abc"}, "unit_cost must be a number"),
+    ("/items", {"item": "Panel", "quantity": "many"}, "quantity must be an integer"),
+    ("/items/bulk", {"records": [1]}, "records[0] must be an object"),
+    ("/items/bulk", {"records": [{"item": "a", "quantity": "z"}]}, "records[0]: quantity must be an integer"),
+    ("/installations", {"item_id": 1, "quantity": 1, "customer_id": 1, "date": "31/12/2024"},
+     "date must be a date (YYYY-MM-DD)"),
+])
+def test_malformed_bodies_are_rejected_with_400(client, path, body, error):
+    res = client.post(path, json=body)
+    assert res.status_code == 400 and res.json()["error"] == error
+
+def test_non_object_body_is_rejected(client):
+    assert client.post("/items", content=b"[1, 2]").status_code == 400
+    assert client.post("/items", content=b"not json").status_code == 400
+
+def test_list_pages_do_not_request_exact_counts(client):
+    client.get("/items?page=3")
+    select = [args_kwargs for name, *args_kwargs in client.fake.log[-1][1:] if name == "select"]
+    assert select == [[("*",), {"count": "estimated"}]]
+
+# ---------------- Auth ----------------
+def test_service_refuses_to_start_without_a_token():
+    with pytest.raises(RuntimeError, match="SERVICE_API_TOKEN"):
+        service.require_token(token="", allow_no_auth=False)
+    service.require_token(token="", allow_no_auth=True)
+    service.require_token(token="s3cret", allow_no_auth=False)
+
+@pytest.fixture
+def authed(client):
+    app = service.TokenAuthMiddleware(Starlette(routes=service.routes), "s3cret")
+    with TestClient(app) as c:
+        yield c
+
+def test_token_is_required_for_writes_and_reads(authed):
+    assert authed.delete("/items/3").status_code == 401
+    assert authed.get("/items", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert authed.get("/items", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+    assert authed.get("/health").status_code == 200
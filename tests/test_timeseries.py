@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+from timeseries import bucket_start, pick_resolution
+
+SALES_BY_DAY = """
+    SELECT date(date) AS day, SUM(total_sale), SUM(cost), SUM(profit), COUNT(*)
+    FROM sales GROUP BY 1 HAVING COUNT(*) > 0 ORDER BY 1
+"""
+INSTALLS_BY_DAY = "SELECT date(date) AS day, SUM(quantity), COUNT(*) FROM installations GROUP BY 1 ORDER BY 1"
+
+def _rollup(conn, sql):
+    return [tuple(r) for r in conn.execute(sql)]
+
+def _sale(conn, day, total, cost):
+    return conn.execute("INSERT INTO sales (item, quantity, total_sale, cost, profit, date) VALUES ('Panel', 1, ?, ?, ?, ?)",
+                        (total, cost, total - cost, day)).lastrowid
+
+# ---------------- Rollup triggers ----------------
+def test_sales_rollup_follows_inserts_updates_and_deletes(migrated_db):
+    a = _sale(migrated_db, "2024-05-06T09:00:00", 100.0, 60.0)
+    b = _sale(migrated_db, "2024-05-06T15:00:00", 50.0, 20.0)
+    _sale(migrated_db, "2024-05-07T10:00:00", 10.0, 5.0)
+    migrated_db.execute("UPDATE sales SET total_sale = 120, profit = 60 WHERE id = ?", (a,))
+    migrated_db.execute("UPDATE sales SET date = '2024-05-08T08:00:00' WHERE id = ?", (b,))   # moves to another day
+    migrated_db.execute("UPDATE sales SET item = 'Panel 2' WHERE id = ?", (a,))               # not a rolled-up column
+    rollup = _rollup(migrated_db, "SELECT day, total_sale, cost, profit, sales_count FROM sales_daily "
+                                  "WHERE sales_count > 0 ORDER BY day")
+    assert rollup == _rollup(migrated_db, SALES_BY_DAY)
+    assert rollup[0] == ("2024-05-06", 120.0, 60.0, 60.0, 1)
+    migrated_db.execute("DELETE FROM sales WHERE id = ?", (a,))
+    assert _rollup(migrated_db, "SELECT day, total_sale, cost, profit, sales_count FROM sales_daily "
+                                "WHERE sales_count > 0 ORDER BY day") == _rollup(migrated_db, SALES_BY_DAY)
+
+def test_installations_rollup_follows_updates(migrated_db):
+    ids = [migrated_db.execute("INSERT INTO installations (quantity, date) VALUES (?, ?)", (q, d)).lastrowid
+           for q, d in ((2, "2024-05-06 09:00:00"), (3, "2024-05-06 10:00:00"), (1, "2024-05-09 10:00:00"))]
+    migrated_db.execute("UPDATE installations SET quantity = 5 WHERE id = ?", (ids[0],))
+    migrated_db.execute("UPDATE installations SET date = '2024-05-09 12:00:00' WHERE id = ?", (ids[1],))
+    rollup = _rollup(migrated_db, "SELECT day, quantity, install_count FROM installations_daily "
+                                  "WHERE install_count > 0 ORDER BY day")
+    assert rollup == _rollup(migrated_db, INSTALLS_BY_DAY) == [("2024-05-06", 5, 1), ("2024-05-09", 4, 2)]
+
+# ---------------- Buckets ----------------
+@pytest.mark.parametrize("days, expected", [(30, "day"), (400, "day"), (401, "week"), (2800, "week"), (2801, "month"),
+                                            (365 * 20, "month"), (365 * 200, "year")])
+def test_pick_resolution_keeps_series_short(days, expected):
+    start = date(2000, 1, 1)
+    assert pick_resolution(start, date.fromordinal(start.toordinal() + days - 1)) == expected
+
+def test_bucket_start():
+    d = date(2024, 5, 9)   # a Thursday
+    assert bucket_start(d, "day") == d
+    assert bucket_start(d, "week") == date(2024, 5, 6)
+    assert bucket_start(d, "month") == date(2024, 5, 1)
+    assert bucket_start(d, "quarter") == date(2024, 4, 1)
+    assert bucket_start(d, "year") == date(2024, 1, 1)
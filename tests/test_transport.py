@@ -0,0 +1,158 @@
+import httpx
+import pytest
+
+import transport
+from transport import STALE_HEADER, BackendUnavailable, ResilientTransport, TransportConfig
+
+BASE = "https://project.supabase.co/rest/v1"
+
+class Inner(httpx.BaseTransport):
+    """Scripted inner transport: each request pops the next outcome (a status, (status, headers) or an exception)."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.sent = []
+
+    def handle_request(self, request):
+        self.sent.append(request)
+        outcome = self.outcomes.pop(0) if self.outcomes else 200
+        if isinstance(outcome, Exception):
+            raise outcome
+        status, headers = outcome if isinstance(outcome, tuple) else (outcome, {})
+        return httpx.Response(status, headers=headers, json={"n": len(self.sent)}, request=request)
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(transport.time, "monotonic", c)
+    return c
+
+def _transport(*outcomes, **config):
+    sleeps = []
+    t = ResilientTransport(TransportConfig(**{"retries": 3, "breaker_threshold": 2, "breaker_cooldown": 30.0, **config}),
+                           inner=Inner(*outcomes), sleep=sleeps.append)
+    t.sleeps = sleeps
+    return t
+
+def _get(path="/items"):
+    return httpx.Request("GET", BASE + path)
+
+def _post(path="/items", body=b'{"item": "Panel"}'):
+    return httpx.Request("POST", BASE + path, content=body)
+
+# ---------------- Retries ----------------
+def test_gets_are_retried_on_gateway_errors_and_timeouts(clock):
+    t = _transport(503, httpx.ReadTimeout("slow"), 200)
+    assert t.handle_request(_get()).status_code == 200
+    assert len(t.inner.sent) == 3 and len(t.sleeps) == 2
+    assert t.stats["retries"] == 2 and t.breaker.state == "closed"
+
+def test_retry_after_is_honoured_up_to_the_cap(clock):
+    t = _transport((429, {"retry-after": "1.5"}), (429, {"retry-after": "7"}), 200, backoff_cap=2.0)
+    t.handle_request(_get())
+    assert t.sleeps == [1.5, 2.0]
+
+def test_gets_give_up_after_the_configured_retries(clock):
+    t = _transport(503, 503, 503, 503, 503, breaker_threshold=10)
+    assert t.handle_request(_get()).status_code == 503
+    assert len(t.inner.sent) == 4 and t.breaker.failures == 1
+
+def test_posts_are_not_retried_after_the_request_went_out(clock):
+    t = _transport(httpx.ReadTimeout("slow"), 200)
+    with pytest.raises(httpx.ReadTimeout):
+        t.handle_request(_post())
+    assert len(t.inner.sent) == 1 and t.sleeps == []
+
+def test_posts_are_not_retried_on_5xx(clock):
+    t = _transport(503, 200)
+    assert t.handle_request(_post()).status_code == 503
+    assert len(t.inner.sent) == 1
+
+def test_posts_are_retried_when_the_connection_failed(clock):
+    t = _transport(httpx.ConnectError("refused"), httpx.ConnectTimeout("slow"), 201)
+    assert t.handle_request(_post()).status_code == 201
+    assert len(t.inner.sent) == 3 and len(t.sleeps) == 2
+
+def test_read_rpcs_are_retried_like_gets(clock):
+    t = _transport(httpx.ReadTimeout("slow"), 200)
+    assert t.handle_request(_post("/rpc/low_stock_items", b"{}")).status_code == 200
+    assert len(t.inner.sent) == 2
+
+def test_connect_errors_surface_as_backend_unavailable(clock):
+    t = _transport(*[httpx.ConnectError("refused")] * 4, breaker_threshold=10)
+    with pytest.raises(BackendUnavailable, match="refused"):
+        t.handle_request(_post())
+
+def test_rpc_timeouts_are_set_per_operation(clock):
+    t = _transport()
+    t.handle_request(_post("/rpc/take_stock_snapshots", b"{}"))
+    t.handle_request(_get())
+    slow, read = (r.extensions["timeout"] for r in t.inner.sent)
+    assert slow["read"] == 120.0 and read["read"] == t.config.read_timeout
+
+# ---------------- Circuit breaker ----------------
+def test_breaker_opens_and_rejects_without_sending(clock):
+    t = _transport(500, 500, retries=0)
+    t.handle_request(_post())
+    t.handle_request(_post())
+    assert t.breaker.state == "open"
+    with pytest.raises(BackendUnavailable, match="circuit open"):
+        t.handle_request(_post())
+    assert len(t.inner.sent) == 2 and t.stats["rejected"] == 1
+
+def test_breaker_half_opens_after_the_cooldown(clock):
+    t = _transport(500, 500, 500, 200, retries=0)
+    t.handle_request(_post())
+    t.handle_request(_post())
+    clock.now += 30
+    assert t.breaker.state == "half-open"
+    assert t.handle_request(_post()).status_code == 500     # the probe fails: open again
+    assert t.breaker.state == "open"
+    with pytest.raises(BackendUnavailable):
+        t.handle_request(_post())
+    clock.now += 30
+    assert t.handle_request(_post()).status_code == 200     # the probe succeeds: closed
+    assert t.breaker.state == "closed" and t.breaker.failures == 0
+
+def test_only_one_probe_is_let_through_while_half_open(clock):
+    t = _transport(500, 500, retries=0)
+    t.handle_request(_post())
+    t.handle_request(_post())
+    clock.now += 30
+    assert t.breaker.allow() is True
+    assert t.breaker.allow() is False
+
+# ---------------- Stale reads ----------------
+def test_stale_read_is_served_while_the_breaker_is_open(clock):
+    t = _transport(200, 500, 500, retries=0)
+    fresh = t.handle_request(_get())
+    t.handle_request(_post())
+    t.handle_request(_post())
+    assert t.breaker.state == "open"
+    stale = t.handle_request(_get())
+    assert stale.json() == fresh.json() and stale.headers[STALE_HEADER] == "1"
+    assert len(t.inner.sent) == 3 and t.stats["stale"] == 1
+    with pytest.raises(BackendUnavailable):
+        t.handle_request(_get("/sales"))   # nothing kept for this read
+
+def test_stale_read_replaces_a_5xx_after_retries(clock):
+    t = _transport(200, 503, 503, retries=1, breaker_threshold=10)
+    t.handle_request(_get())
+    response = t.handle_request(_get())
+    assert response.status_code == 200 and response.headers[STALE_HEADER] == "1"
+
+def test_writes_are_never_answered_from_the_stale_copy(clock):
+    t = _transport(200, 500, 500, retries=0)
+    t.handle_request(_post("/rpc/low_stock_items", b"{}"))
+    t.handle_request(_post())
+    t.handle_request(_post())
+    with pytest.raises(BackendUnavailable):
+        t.handle_request(_post())
+    assert t.handle_request(_post("/rpc/low_stock_items", b"{}")).headers[STALE_HEADER] == "1"
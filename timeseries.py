@@ -0,0 +1,97 @@
+# timeseries.py
+"""
+Bounded time series for dashboard charts.
+
+Sales and installations are read from the per-day rollup tables (migration
+0005) and re-bucketed on the server, so a chart costs one row per bucket
+regardless of how many sales exist. The bucket size is picked from the
+visible range to keep every series under MAX_POINTS.
+"""
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from db_supabase import _to_date_str, get_supabase
+
+MAX_POINTS = 400
+# Rollups change with every sale; keep cached series short-lived
+ROLLUP_TTL = 60
+
+RESOLUTIONS = ("day", "week", "month", "quarter", "year")
+_BUCKET_DAYS = {"day": 1, "week": 7, "month": 30.44, "quarter": 91.31, "year": 365.25}
+_FREQ = {"day": "D", "week": "W-MON", "month": "MS", "quarter": "QS", "year": "YS"}
+
+SALES_COLUMNS = ["total_sale", "cost", "profit", "sales_count"]
+INSTALLATION_COLUMNS = ["quantity", "install_count"]
+
+def pick_resolution(start: date, end: date, max_points: int = MAX_POINTS) -> str:
+    """Finest bucket that keeps the range under max_points."""
+    days = (end - start).days + 1
+    for res in RESOLUTIONS:
+        if days / _BUCKET_DAYS[res] <= max_points:
+            return res
+    return RESOLUTIONS[-1]
+
+def bucket_start(d: date, resolution: str) -> date:
+    """First day of the bucket containing d (weeks start on Monday, like date_trunc)."""
+    if resolution == "week":
+        return d - timedelta(days=d.weekday())
+    if resolution == "month":
+        return d.replace(day=1)
+    if resolution == "quarter":
+        return d.replace(month=3 * ((d.month - 1) // 3) + 1, day=1)
+    if resolution == "year":
+        return d.replace(month=1, day=1)
+    return d
+
+@st.cache_data(ttl=ROLLUP_TTL, max_entries=64, show_spinner=False)
+def _fetch(fn: str, resolution: str, start: Optional[str], end: Optional[str]) -> list:
+    sb = get_supabase()
+    return sb.rpc(fn, {"p_bucket": resolution, "p_start": start, "p_end": end}).execute().data or []
+
+@st.cache_data(ttl=ROLLUP_TTL, show_spinner=False)
+def data_bounds() -> Optional[Tuple[date, date]]:
+    """(first, last) day with sales or installations, or None when both are empty."""
+    sb = get_supabase()
+    days = []
+    for table in ("sales_daily", "installations_daily"):
+        for desc in (False, True):
+            res = sb.table(table).select("day").order("day", desc=desc).limit(1).execute()
+            if res.data:
+                days.append(date.fromisoformat(str(res.data[0]["day"])[:10]))
+    return (min(days), max(days)) if days else None
+
+def _series(fn: str, columns: list, start: date, end: date, resolution: Optional[str]) -> pd.DataFrame:
+    # An explicit resolution may only coarsen the automatic one, never exceed MAX_POINTS
+    auto = pick_resolution(start, end)
+    if not resolution or RESOLUTIONS.index(resolution) < RESOLUTIONS.index(auto):
+        resolution = auto
+    rows = _fetch(fn, resolution, _to_date_str(start), _to_date_str(end))
+    buckets = pd.date_range(bucket_start(start, resolution), end, freq=_FREQ[resolution])
+    df = pd.DataFrame(rows, columns=["bucket"] + columns)
+    df["bucket"] = pd.to_datetime(df["bucket"])
+    df[columns] = df[columns].apply(pd.to_numeric)
+    df = df.set_index("bucket").reindex(buckets, fill_value=0).rename_axis("bucket").reset_index()
+    df.attrs["resolution"] = resolution
+    return df
+
+def sales_series(start: date, end: date, resolution: Optional[str] = None) -> pd.DataFrame:
+    """total_sale / cost / profit / sales_count per bucket, zero-filled; resolution in df.attrs."""
+    return _series("sales_timeseries", SALES_COLUMNS, start, end, resolution)
+
+def installations_series(start: date, end: date, resolution: Optional[str] = None) -> pd.DataFrame:
+    """Installed quantity and installation count per bucket, zero-filled."""
+    return _series("installations_timeseries", INSTALLATION_COLUMNS, start, end, resolution)
+
+def sales_totals() -> dict:
+    """All-time totals, summed from the yearly buckets."""
+    rows = _fetch("sales_timeseries", "year", None, None)
+    df = pd.DataFrame(rows, columns=["bucket"] + SALES_COLUMNS)
+    return {c: float(pd.to_numeric(df[c]).sum()) for c in SALES_COLUMNS}
+
+def line_chart(df: pd.DataFrame, x: str, y, title: str, **kwargs):
+    """Plotly line drawn with WebGL (Scattergl), which stays responsive on long series."""
+    return px.line(df, x=x, y=y, title=title, render_mode="webgl", **kwargs)
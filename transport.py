@@ -0,0 +1,263 @@
+# transport.py
+"""
+HTTP transport for the Supabase client.
+
+get_supabase() hands supabase-py an httpx.Client built here: one pool of
+keep-alive connections (HTTP/2 when h2 is installed) and a transport that
+knows which requests are safe to repeat.
+
+- Reads (GET/HEAD and the read-only RPCs in READ_RPCS) are retried with
+  jittered exponential backoff on connection errors, timeouts, 429 and
+  5xx gateway errors. Writes are retried only when the connection failed
+  before the request went out.
+- Every request gets the timeout of its operation (read, write or the
+  per-RPC overrides in RPC_TIMEOUTS) instead of one client-wide value.
+- A circuit breaker stops calling a backend that keeps failing. While it
+  is open, reads are answered from the last good response when one is
+  small enough to have been kept; view_* frames fall back to FrameCache.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+log = logging.getLogger(__name__)
+
+# RPCs without side effects; safe to retry and to answer from a stale copy
+READ_RPCS = frozenset({
+    "schema_index_report", "low_stock_items", "low_stock_summary", "sales_timeseries",
+    "installations_timeseries", "stock_on_hand_at", "stock_value_at", "stock_value_history",
+    "stock_lot_value",
+})
+# Slow maintenance RPCs get longer than the default write timeout
+RPC_TIMEOUTS = {"evaluate_stock_alerts": 60.0, "take_stock_snapshots": 120.0, "merge_customers": 60.0}
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504, 520, 522, 524})
+# Only responses up to this size are kept for stale reads (large frames live in FrameCache)
+STALE_MAX_BYTES = 256 * 1024
+STALE_MAX_ENTRIES = 256
+STALE_HEADER = "x-alphacj-stale"
+
+def _env(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+@dataclass
+class TransportConfig:
+    max_connections: int = 20
+    max_keepalive: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    connect_timeout: float = 5.0
+    read_timeout: float = 15.0
+    write_timeout: float = 30.0
+    retries: int = 3
+    backoff_base: float = 0.2
+    backoff_cap: float = 2.0
+    breaker_threshold: int = 5
+    breaker_cooldown: float = 30.0
+    rpc_timeouts: Dict[str, float] = field(default_factory=lambda: dict(RPC_TIMEOUTS))
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        """Defaults overridden by ALPHACJ_HTTP_* environment variables."""
+        return cls(
+            max_connections=int(_env("ALPHACJ_HTTP_MAX_CONNECTIONS", cls.max_connections)),
+            max_keepalive=int(_env("ALPHACJ_HTTP_MAX_KEEPALIVE", cls.max_keepalive)),
+            http2=os.environ.get("ALPHACJ_HTTP2", "1") != "0",
+            connect_timeout=_env("ALPHACJ_HTTP_CONNECT_TIMEOUT", cls.connect_timeout),
+            read_timeout=_env("ALPHACJ_HTTP_READ_TIMEOUT", cls.read_timeout),
+            write_timeout=_env("ALPHACJ_HTTP_WRITE_TIMEOUT", cls.write_timeout),
+            retries=int(_env("ALPHACJ_HTTP_RETRIES", cls.retries)),
+            breaker_threshold=int(_env("ALPHACJ_HTTP_BREAKER_THRESHOLD", cls.breaker_threshold)),
+            breaker_cooldown=_env("ALPHACJ_HTTP_BREAKER_COOLDOWN", cls.breaker_cooldown),
+        )
+
+class BackendUnavailable(httpx.TransportError):
+    """Raised without sending the request (circuit open or no connection); nothing was written."""
+
+# ---------------- Circuit breaker ----------------
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive failures; after `cooldown`
+    seconds one probe request is let through (half-open) and its outcome
+    closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold, self.cooldown = threshold, cooldown
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures, self.opened_at, self._probing = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                if self.opened_at is None or self._probing:
+                    log.warning("Backend circuit opened after %d failures", self.failures)
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+# ---------------- Transport ----------------
+def _operation(request: httpx.Request) -> Tuple[bool, Optional[str]]:
+    """(is_read, rpc name or None) for a PostgREST request."""
+    path = request.url.path
+    rpc = path.rsplit("/rpc/", 1)[1] if "/rpc/" in path else None
+    if request.method in ("GET", "HEAD"):
+        return True, rpc
+    return rpc in READ_RPCS, rpc
+
+class ResilientTransport(httpx.BaseTransport):
+    """Retries, per-operation timeouts, circuit breaking and stale reads around a pooled HTTPTransport."""
+
+    def __init__(self, config: TransportConfig, inner: Optional[httpx.BaseTransport] = None, sleep=time.sleep):
+        self.config = config
+        http2 = config.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                http2 = False
+        self.inner = inner or httpx.HTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(max_connections=config.max_connections,
+                                max_keepalive_connections=config.max_keepalive,
+                                keepalive_expiry=config.keepalive_expiry),
+        )
+        self.breaker = CircuitBreaker(config.breaker_threshold, config.breaker_cooldown)
+        self._sleep = sleep
+        self._stale: "OrderedDict[tuple, Tuple[int, list, bytes]]" = OrderedDict()
+        self._stale_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "stale": 0, "rejected": 0}
+
+    def _timeout(self, is_read: bool, rpc: Optional[str]) -> dict:
+        c = self.config
+        total = c.rpc_timeouts.get(rpc) or (c.read_timeout if is_read else c.write_timeout)
+        return {"connect": c.connect_timeout, "read": total, "write": total, "pool": c.connect_timeout}
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after and retry_after.replace(".", "", 1).isdigit():
+            return min(float(retry_after), self.config.backoff_cap)
+        # Full jitter: concurrent sessions retrying the same blip spread out instead of stampeding
+        return random.uniform(0, min(self.config.backoff_cap, self.config.backoff_base * 2 ** attempt))
+
+    # ---------------- Stale reads ----------------
+    def _key(self, request: httpx.Request) -> tuple:
+        return request.method, str(request.url), request.content
+
+    def _remember(self, request: httpx.Request, response: httpx.Response):
+        content = response.read()
+        if len(content) > STALE_MAX_BYTES:
+            return
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in ("content-encoding", "content-length")]
+        with self._stale_lock:
+            self._stale[self._key(request)] = (response.status_code, headers, content)
+            self._stale.move_to_end(self._key(request))
+            while len(self._stale) > STALE_MAX_ENTRIES:
+                self._stale.popitem(last=False)
+
+    def _stale_response(self, request: httpx.Request) -> Optional[httpx.Response]:
+        with self._stale_lock:
+            hit = self._stale.get(self._key(request))
+        if hit is None:
+            return None
+        self.stats["stale"] += 1
+        status, headers, content = hit
+        return httpx.Response(status, headers=headers + [(STALE_HEADER, "1")], content=content, request=request)
+
+    def _stale_or_raise(self, request: httpx.Request, is_read: bool, error: Exception) -> httpx.Response:
+        stale = self._stale_response(request) if is_read else None
+        if stale is None:
+            raise error
+        return stale
+
+    # ---------------- Send ----------------
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        is_read, rpc = _operation(request)
+        request.extensions = {**request.extensions, "timeout": self._timeout(is_read, rpc)}
+        self.stats["requests"] += 1
+        if not self.breaker.allow():
+            self.stats["rejected"] += 1
+            return self._stale_or_raise(request, is_read, BackendUnavailable("Backend circuit open", request=request))
+
+        attempt = 0
+        while True:
+            try:
+                response = self.inner.handle_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # Never reached the server: safe to repeat even for writes
+                error, retry, response = BackendUnavailable(str(e) or type(e).__name__, request=request), True, None
+            except (httpx.ReadTimeout, httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError) as e:
+                error, retry, response = e, is_read, None
+            else:
+                if is_read and response.status_code in RETRY_STATUSES and attempt < self.config.retries:
+                    delay = self._backoff(attempt, response)
+                    response.close()
+                    self.stats["retries"] += 1
+                    self._sleep(delay)
+                    attempt += 1
+                    continue
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                    stale = self._stale_response(request) if is_read else None
+                    if stale is not None:
+                        response.close()
+                        return stale
+                else:
+                    self.breaker.record_success()
+                    if is_read and response.status_code < 300:
+                        self._remember(request, response)
+                return response
+
+            if retry and attempt < self.config.retries:
+                self.stats["retries"] += 1
+                self._sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            self.breaker.record_failure()
+            return self._stale_or_raise(request, is_read, error)
+
+    def close(self):
+        self.inner.close()
+
+# ---------------- Client ----------------
+_transport: Optional[ResilientTransport] = None
+
+def build_http_client(config: Optional[TransportConfig] = None) -> httpx.Client:
+    """The pooled httpx.Client for supabase-py (ClientOptions(httpx_client=...))."""
+    global _transport
+    config = config or TransportConfig.from_env()
+    _transport = ResilientTransport(config)
+    return httpx.Client(transport=_transport, timeout=httpx.Timeout(config.write_timeout,
+                                                                    connect=config.connect_timeout))
+
+def backend_state() -> str:
+    """Circuit state of the shared transport: closed, open or half-open."""
+    return _transport.breaker.state if _transport is not None else "closed"